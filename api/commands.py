@@ -12,7 +12,9 @@ from werkzeug.exceptions import NotFound
 
 from configs import dify_config
 from constants.languages import languages
+from core.helper.provider_configurations_cache import ProviderConfigurationsCache
 from core.plugin.entities.plugin import ToolProviderID
+from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.index_processor.constant.built_in_field import BuiltInField
@@ -26,7 +28,14 @@ from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
 from models import Tenant
-from models.dataset import Dataset, DatasetCollectionBinding, DatasetMetadata, DatasetMetadataBinding, DocumentSegment
+from models.dataset import (
+    Dataset,
+    DatasetCollectionBinding,
+    DatasetKeywordTable,
+    DatasetMetadata,
+    DatasetMetadataBinding,
+    DocumentSegment,
+)
 from models.dataset import Document as DatasetDocument
 from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation
 from models.provider import Provider, ProviderModel
@@ -139,6 +148,7 @@ def reset_encrypt_key_pair():
         db.session.query(Provider).where(Provider.provider_type == "custom", Provider.tenant_id == tenant.id).delete()
         db.session.query(ProviderModel).where(ProviderModel.tenant_id == tenant.id).delete()
         db.session.commit()
+        ProviderConfigurationsCache.invalidate(tenant.id)
 
         click.echo(
             click.style(
@@ -431,6 +441,44 @@ def migrate_knowledge_vector_database():
     )
 
 
+@click.command("migrate-keyword-index", help="Migrate keyword tables to the inverted keyword index.")
+def migrate_keyword_index():
+    """
+    Load the keyword tables stored by the `jieba` keyword store into the `jieba_inverted_index` store.
+    """
+    click.echo(click.style("Starting keyword index migration.", fg="green"))
+    migrated_count = 0
+    skipped_count = 0
+    keyword_tables = db.session.scalars(select(DatasetKeywordTable)).all()
+    for dataset_keyword_table in keyword_tables:
+        try:
+            dataset = db.session.get(Dataset, dataset_keyword_table.dataset_id)
+            keyword_table_dict = dataset_keyword_table.keyword_table_dict
+            if not dataset or not keyword_table_dict:
+                skipped_count += 1
+                continue
+            JiebaInvertedIndex(dataset).import_keyword_table(keyword_table_dict["__data__"]["table"])
+            click.echo(f"Successfully migrated keyword table of dataset {dataset.id}.")
+            migrated_count += 1
+        except Exception as e:
+            db.session.rollback()
+            click.echo(
+                click.style(
+                    f"Error migrating keyword table of dataset {dataset_keyword_table.dataset_id}: "
+                    f"{e.__class__.__name__} {str(e)}",
+                    fg="red",
+                )
+            )
+            continue
+
+    click.echo(
+        click.style(
+            f"Migration complete. Migrated {migrated_count} keyword tables. Skipped {skipped_count} keyword tables.",
+            fg="green",
+        )
+    )
+
+
 @click.command("convert-to-agent-apps", help="Convert Agent Assistant to Agent App.")
 def convert_to_agent_apps():
     """
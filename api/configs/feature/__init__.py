@@ -5,6 +5,7 @@ from pydantic import (
     Field,
     HttpUrl,
     NegativeInt,
+    NonNegativeFloat,
     NonNegativeInt,
     PositiveFloat,
     PositiveInt,
@@ -56,6 +57,39 @@ class SecurityConfig(BaseSettings):
         default=None,
     )
 
+    DECRYPTION_CACHE_ENABLED: bool = Field(
+        description="Whether to keep the parsed private keys of workspaces and the credentials decrypted with them"
+        " in a process-local cache",
+        default=False,
+    )
+
+    DECRYPTION_CACHE_TTL: PositiveInt = Field(
+        description="Time-to-live in seconds of the parsed private keys and decrypted credentials in the"
+        " process-local cache",
+        default=60,
+    )
+
+    DECRYPTION_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of decrypted credentials kept in the process-local cache",
+        default=10000,
+    )
+
+    API_TOKEN_AUTH_CACHE_ENABLED: bool = Field(
+        description="Whether to cache the tenant and owner account resolved from service API tokens, in process"
+        " and in Redis",
+        default=False,
+    )
+
+    API_TOKEN_AUTH_CACHE_TTL: PositiveInt = Field(
+        description="Time-to-live in seconds of the cached service API token authentication contexts",
+        default=60,
+    )
+
+    API_TOKEN_AUTH_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of service API token authentication contexts kept in the process-local cache",
+        default=10000,
+    )
+
 
 class AppExecutionConfig(BaseSettings):
     """
@@ -74,6 +108,28 @@ class AppExecutionConfig(BaseSettings):
         description="Maximum number of requests per app per day",
         default=5000,
     )
+    APP_TASK_STOP_PUBSUB_ENABLED: bool = Field(
+        description="Deliver task stop signals through Redis pub/sub instead of polling Redis for a stop flag."
+        " Falls back to polling while the subscription is unavailable.",
+        default=True,
+    )
+    APP_STREAM_EVENT_LOG_ENABLED: bool = Field(
+        description="Log the events of service API streamed responses in a Redis Stream per task, so clients can"
+        " reconnect with Last-Event-ID and resume the stream without running the app again.",
+        default=False,
+    )
+    APP_STREAM_EVENT_LOG_MAX_LENGTH: PositiveInt = Field(
+        description="Maximum number of events kept in the event log of a task",
+        default=10000,
+    )
+    APP_STREAM_EVENT_LOG_TTL: PositiveInt = Field(
+        description="Time in seconds the event log of a task is kept after its last event",
+        default=600,
+    )
+    APP_STREAM_EVENT_LOG_BUFFER_SIZE: PositiveInt = Field(
+        description="Maximum number of logged events waiting for a slow client, the task waits for the client beyond",
+        default=1000,
+    )
 
 
 class CodeExecutionSandboxConfig(BaseSettings):
@@ -106,6 +162,46 @@ class CodeExecutionSandboxConfig(BaseSettings):
         default=10.0,
     )
 
+    CODE_EXECUTION_BATCH_ENABLED: bool = Field(
+        description="Execute the Code node of iterations whose body is a single Code node for several items"
+        " in one code execution request, instead of one request per item",
+        default=False,
+    )
+
+    CODE_EXECUTION_BATCH_SIZE: PositiveInt = Field(
+        description="Maximum number of iteration items executed in one code execution request",
+        default=50,
+    )
+
+    JINJA2_LOCAL_RENDER_ENABLED: bool = Field(
+        description="Render Jinja2 templates in-process with a sandboxed environment when possible,"
+        " instead of sending every template to the code execution service",
+        default=False,
+    )
+
+    JINJA2_LOCAL_RENDER_MAX_TEMPLATE_LENGTH: PositiveInt = Field(
+        description="Maximum length of a Jinja2 template rendered in-process,"
+        " longer templates are rendered by the code execution service",
+        default=10000,
+    )
+
+    JINJA2_LOCAL_RENDER_MAX_OUTPUT_LENGTH: PositiveInt = Field(
+        description="Maximum output length of a Jinja2 template rendered in-process,"
+        " templates producing more are rendered by the code execution service",
+        default=400000,
+    )
+
+    JINJA2_LOCAL_RENDER_TIMEOUT: PositiveFloat = Field(
+        description="Maximum time in seconds to render a Jinja2 template in-process,"
+        " slower templates are rendered by the code execution service",
+        default=1.0,
+    )
+
+    JINJA2_LOCAL_RENDER_CACHE_SIZE: PositiveInt = Field(
+        description="Maximum number of compiled Jinja2 templates cached in-process",
+        default=512,
+    )
+
     CODE_MAX_NUMBER: PositiveInt = Field(
         description="Maximum allowed numeric value in code execution",
         default=9223372036854775807,
@@ -184,6 +280,26 @@ class PluginConfig(BaseSettings):
         default=15728640 * 12,
     )
 
+    PLUGIN_DAEMON_POOL_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of keep-alive connections to the plugin daemon kept in the connection pool",
+        default=100,
+    )
+
+    PLUGIN_DAEMON_POOL_BLOCK: bool = Field(
+        description="Wait for a free pooled connection instead of opening an extra one when the pool is exhausted",
+        default=False,
+    )
+
+    PLUGIN_DAEMON_CONNECT_TIMEOUT: PositiveFloat = Field(
+        description="Timeout in seconds for connecting to the plugin daemon",
+        default=10.0,
+    )
+
+    PLUGIN_DAEMON_READ_TIMEOUT: Optional[PositiveFloat] = Field(
+        description="Timeout in seconds between bytes received from the plugin daemon, unset to wait indefinitely",
+        default=None,
+    )
+
 
 class MarketplaceConfig(BaseSettings):
     """
@@ -397,6 +513,26 @@ class HttpConfig(BaseSettings):
         default=5,
     )
 
+    SSRF_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of concurrent connections of the pooled HTTP client for network requests (SSRF)",
+        default=100,
+    )
+
+    SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS: NonNegativeInt = Field(
+        description="Maximum number of idle keep-alive connections of the pooled HTTP client (SSRF)",
+        default=20,
+    )
+
+    SSRF_POOL_KEEPALIVE_EXPIRY: PositiveFloat = Field(
+        description="Time in seconds after which an idle keep-alive connection of the pooled HTTP client is closed",
+        default=5.0,
+    )
+
+    SSRF_POOL_HTTP2_ENABLED: bool = Field(
+        description="Enable HTTP/2 for the pooled HTTP client used for network requests, requires the h2 package",
+        default=False,
+    )
+
     RESPECT_XFORWARD_HEADERS_ENABLED: bool = Field(
         description="Enable handling of X-Forwarded-For, X-Forwarded-Proto, and X-Forwarded-Port headers"
         " when the app is behind a single trusted reverse proxy.",
@@ -477,6 +613,29 @@ class ModelLoadBalanceConfig(BaseSettings):
     )
 
 
+class ModelProviderCacheConfig(BaseSettings):
+    """
+    Configuration for caching the assembled model provider configurations of workspaces
+    """
+
+    PROVIDER_CONFIGURATIONS_CACHE_ENABLED: bool = Field(
+        description="Enable or disable caching the provider configurations of each workspace in memory and Redis",
+        default=False,
+    )
+
+    PROVIDER_CONFIGURATIONS_CACHE_TTL: PositiveInt = Field(
+        description="Maximum time in seconds a cached provider configuration is served,"
+        " bounds the staleness of changes made outside Dify such as plugin installations",
+        default=300,
+    )
+
+    PROVIDER_CONFIGURATIONS_CACHE_LOCAL_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum number of workspaces whose provider configurations are cached in process memory,"
+        " 0 to only use Redis",
+        default=256,
+    )
+
+
 class BillingConfig(BaseSettings):
     """
     Configuration for platform billing features
@@ -487,6 +646,22 @@ class BillingConfig(BaseSettings):
         default=False,
     )
 
+    FEATURE_SNAPSHOT_CACHE_ENABLED: bool = Field(
+        description="Whether to cache the features of workspaces in Redis and refresh them from the billing and"
+        " enterprise APIs in the background",
+        default=False,
+    )
+
+    FEATURE_SNAPSHOT_CACHE_FRESH_TTL: PositiveInt = Field(
+        description="Age in seconds after which a cached workspace features snapshot is refreshed in the background",
+        default=60,
+    )
+
+    FEATURE_SNAPSHOT_CACHE_STALE_TTL: PositiveInt = Field(
+        description="Time-to-live in seconds of the cached workspace features snapshots, stale ones included",
+        default=3600,
+    )
+
 
 class UpdateConfig(BaseSettings):
     """
@@ -529,6 +704,17 @@ class WorkflowConfig(BaseSettings):
         default=200 * 1024,
     )
 
+    WORKFLOW_GRAPH_CACHE_ENABLED: bool = Field(
+        description="Whether to keep the compiled graphs of workflows in a process-local cache,"
+        " so that runs of an unchanged workflow skip parsing and compiling its graph",
+        default=False,
+    )
+
+    WORKFLOW_GRAPH_CACHE_SIZE: PositiveInt = Field(
+        description="Maximum number of compiled workflow graphs kept in the process-local cache",
+        default=256,
+    )
+
 
 class WorkflowNodeExecutionConfig(BaseSettings):
     """
@@ -540,11 +726,67 @@ class WorkflowNodeExecutionConfig(BaseSettings):
         default=100,
     )
 
+    WORKFLOW_PARALLEL_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of threads shared by the parallel branches and parallel iterations"
+        " of all workflow runs in a process",
+        default=100,
+    )
+
+    WORKFLOW_PARALLEL_MAX_WORKERS_PER_RUN: PositiveInt = Field(
+        description="Maximum number of parallel branches of a workflow run, or iterations of a parallel"
+        " iteration node, running at the same time",
+        default=10,
+    )
+
+    DOCUMENT_EXTRACTOR_CACHE_ENABLED: bool = Field(
+        description="Cache the text extracted by document extractor nodes by file content,"
+        " so the same file is not downloaded and parsed again on every workflow run",
+        default=False,
+    )
+
+    DOCUMENT_EXTRACTOR_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds a text extracted by document extractor nodes stays cached",
+        default=86400,
+    )
+
+    DOCUMENT_EXTRACTOR_CACHE_MAX_TEXT_SIZE: PositiveInt = Field(
+        description="Maximum size in bytes of a cached extracted text, larger texts are not cached",
+        default=10 * 1024 * 1024,
+    )
+
+    DOCUMENT_EXTRACTOR_CACHE_REDIS_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum compressed size in bytes of an extracted text cached in Redis,"
+        " larger texts are cached in the storage",
+        default=64 * 1024,
+    )
+
+    DOCUMENT_EXTRACTOR_STREAMING_THRESHOLD: PositiveInt = Field(
+        description="Size in bytes from which PDF and spreadsheet files are downloaded to a temporary file"
+        " and extracted from it, instead of being loaded in memory",
+        default=20 * 1024 * 1024,
+    )
+
     WORKFLOW_NODE_EXECUTION_STORAGE: str = Field(
         default="rdbms",
         description="Storage backend for WorkflowNodeExecution. Options: 'rdbms', 'hybrid'",
     )
 
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED: bool = Field(
+        description="Buffer node execution updates in memory and persist them in bulk upserts instead of"
+        " committing every state transition",
+        default=False,
+    )
+
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_INTERVAL: PositiveFloat = Field(
+        description="Maximum time in seconds a buffered node execution update waits before being flushed",
+        default=1.0,
+    )
+
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE: PositiveInt = Field(
+        description="Number of buffered node executions that triggers an immediate flush",
+        default=100,
+    )
+
 
 class RepositoryConfig(BaseSettings):
     """
@@ -790,6 +1032,25 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    PLAN_SANDBOX_CLEAN_MESSAGE_BATCH_SIZE: PositiveInt = Field(
+        description="Number of messages deleted with their related records in one transaction"
+        " by message cleanup operations - plan: sandbox",
+        default=1000,
+    )
+
+    PLAN_SANDBOX_CLEAN_MESSAGE_BATCH_INTERVAL: NonNegativeFloat = Field(
+        description="Pause in seconds between two deleted batches of message cleanup operations, to throttle"
+        " the load on the database - plan: sandbox",
+        default=0.1,
+    )
+
+    KEYWORD_SCORE_USE_SEGMENT_KEYWORDS: bool = Field(
+        description="Score retrieved chunks against the query with the keywords stored on their segments,"
+        " instead of extracting keywords from the chunk content on every retrieval."
+        " Stored keywords are limited to the top keywords of each segment, so weighted rerank rankings change",
+        default=False,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -817,6 +1078,21 @@ class IndexingConfig(BaseSettings):
         default=50,
     )
 
+    EMBEDDING_CACHE_LOCAL_MAX_BYTES: NonNegativeInt = Field(
+        description="Maximum size in bytes of the process-local document embedding cache, 0 to disable",
+        default=64 * 1024 * 1024,
+    )
+
+    EMBEDDING_CACHE_REDIS_TTL: NonNegativeInt = Field(
+        description="Time-to-live in seconds of document embeddings cached in Redis, 0 to disable",
+        default=3600,
+    )
+
+    EMBEDDING_CACHE_DB_BATCH_SIZE: PositiveInt = Field(
+        description="Maximum number of text hashes resolved per query against the embeddings table",
+        default=500,
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
@@ -867,6 +1143,27 @@ class CeleryScheduleTasksConfig(BaseSettings):
     )
 
 
+class OpsTraceConfig(BaseSettings):
+    """
+    Configuration for the export of traces to the ops trace providers
+    """
+
+    TRACE_QUEUE_MANAGER_INTERVAL: PositiveInt = Field(
+        description="Maximum interval in seconds between two batches of trace tasks exported by a process",
+        default=5,
+    )
+
+    TRACE_QUEUE_MANAGER_BATCH_SIZE: PositiveInt = Field(
+        description="Maximum number of trace tasks exported in a single batch",
+        default=100,
+    )
+
+    TRACE_QUEUE_MANAGER_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of trace tasks queued in a process, new tasks are dropped once it is full",
+        default=10000,
+    )
+
+
 class PositionConfig(BaseSettings):
     POSITION_PROVIDER_PINS: str = Field(
         description="Comma-separated list of pinned model providers",
@@ -980,8 +1277,10 @@ class FeatureConfig(
     LoggingConfig,
     MailConfig,
     ModelLoadBalanceConfig,
+    ModelProviderCacheConfig,
     ModerationConfig,
     MultiModalTransferConfig,
+    OpsTraceConfig,
     PositionConfig,
     RagEtlConfig,
     RepositoryConfig,
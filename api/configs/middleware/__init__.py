@@ -90,11 +90,39 @@ class VectorStoreConfig(BaseSettings):
         default="Vector_index",
     )
 
+    VECTOR_CLIENT_REGISTRY_ENABLED: bool = Field(
+        description="Share long-lived vector database clients and connection pools across requests of a process",
+        default=True,
+    )
+
+    VECTOR_CLIENT_IDLE_TIMEOUT: PositiveInt = Field(
+        description="Seconds after which a shared vector database client that has not been used is closed",
+        default=600,
+    )
+
+    VECTOR_CLIENT_HEALTH_CHECK_INTERVAL: PositiveInt = Field(
+        description="Minimum interval in seconds between two health checks of a shared vector database client",
+        default=30,
+    )
+
+    VECTOR_CREATE_PIPELINE_ENABLED: bool = Field(
+        description="Overlap the embedding of the next batch of documents with the vector store insert of the"
+        " previous one when indexing documents",
+        default=False,
+    )
+
+    VECTOR_CREATE_PIPELINE_MAX_PENDING_BATCHES: PositiveInt = Field(
+        description="Maximum number of embedded batches of documents waiting for or being inserted into the vector"
+        " store when indexing documents in pipeline",
+        default=2,
+    )
+
 
 class KeywordStoreConfig(BaseSettings):
     KEYWORD_STORE: str = Field(
         description="Method for keyword extraction and storage."
-        " Default is 'jieba', a Chinese text segmentation library.",
+        " Default is 'jieba', a Chinese text segmentation library."
+        " 'jieba_inverted_index' stores keywords as per-keyword posting rows instead of one table per dataset.",
         default="jieba",
     )
 
@@ -187,6 +215,16 @@ class DatabaseConfig(BaseSettings):
         default=os.cpu_count() or 1,
     )
 
+    RETRIEVAL_SEGMENT_CACHE_TTL: NonNegativeInt = Field(
+        description="Time-to-live in seconds of the process-local cache of retrieved document segments, 0 to disable.",
+        default=0,
+    )
+
+    RETRIEVAL_SEGMENT_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of document segments and child chunks kept in the retrieval segment cache.",
+        default=10000,
+    )
+
     @computed_field  # type: ignore[misc]
     @property
     def SQLALCHEMY_ENGINE_OPTIONS(self) -> dict[str, Any]:
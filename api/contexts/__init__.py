@@ -9,6 +9,7 @@ if TYPE_CHECKING:
     from core.plugin.entities.plugin_daemon import PluginModelProviderEntity
     from core.tools.plugin_tool.provider import PluginToolProviderController
     from core.workflow.entities.variable_pool import VariablePool
+    from core.workflow.nodes.code.prefetch import PrefetchedCodeResults
 
 
 """
@@ -33,3 +34,7 @@ plugin_model_schema_lock: RecyclableContextVar[Lock] = RecyclableContextVar(Cont
 plugin_model_schemas: RecyclableContextVar[dict[str, "AIModelEntity"]] = RecyclableContextVar(
     ContextVar("plugin_model_schemas")
 )
+
+code_execution_prefetched_results: RecyclableContextVar["PrefetchedCodeResults | None"] = RecyclableContextVar(
+    ContextVar("code_execution_prefetched_results")
+)
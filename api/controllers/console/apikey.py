@@ -7,6 +7,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 from werkzeug.exceptions import Forbidden
 
+from core.helper.api_token_auth_cache import ApiTokenAuthCache
 from extensions.ext_database import db
 from libs.helper import TimestampField
 from libs.login import login_required
@@ -130,6 +131,7 @@ class BaseApiKeyResource(Resource):
 
         db.session.query(ApiToken).where(ApiToken.id == api_key_id).delete()
         db.session.commit()
+        ApiTokenAuthCache.invalidate(current_user.current_tenant_id)
 
         return {"result": "success"}, 204
 
@@ -17,6 +17,7 @@ from controllers.console.wraps import (
     setup_required,
 )
 from core.errors.error import LLMBadRequestError, ProviderTokenNotInitError
+from core.helper.api_token_auth_cache import ApiTokenAuthCache
 from core.indexing_runner import IndexingRunner
 from core.model_runtime.entities.model_entities import ModelType
 from core.plugin.entities.plugin import ModelProviderID
@@ -633,6 +634,7 @@ class DatasetApiDeleteApi(Resource):
 
         db.session.query(ApiToken).where(ApiToken.id == api_key_id).delete()
         db.session.commit()
+        ApiTokenAuthCache.invalidate(current_user.current_tenant_id)
 
         return {"result": "success"}, 204
 
@@ -41,6 +41,7 @@ from models.account import Account
 from services.account_service import AccountService
 from services.billing_service import BillingService
 from services.errors.account import CurrentPasswordIncorrectError as ServiceCurrentPasswordIncorrectError
+from services.feature_service import FeatureSnapshotCache
 
 
 class AccountInitApi(Resource):
@@ -343,7 +344,10 @@ class EducationApi(Resource):
         parser.add_argument("role", type=str, required=True, location="json")
         args = parser.parse_args()
 
-        return BillingService.EducationIdentity.activate(account, args["token"], args["institution"], args["role"])
+        result = BillingService.EducationIdentity.activate(account, args["token"], args["institution"], args["role"])
+        # the education discount shows up in the features of the workspace
+        FeatureSnapshotCache.invalidate(account.current_tenant_id)
+        return result
 
     @setup_required
     @login_required
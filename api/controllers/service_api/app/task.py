@@ -0,0 +1,42 @@
+import re
+
+from flask import request
+from flask_restful import Resource
+from werkzeug.exceptions import BadRequest, NotFound
+
+from controllers.service_api import api
+from controllers.service_api.wraps import FetchUserArg, WhereisUserArg, validate_app_token
+from core.app.apps.base_app_generator import BaseAppGenerator
+from core.app.apps.base_app_queue_manager import AppQueueManager
+from core.app.apps.stream_event_log import StreamEventLog
+from core.app.entities.app_invoke_entities import InvokeFrom
+from libs import helper
+from models.model import App, EndUser
+
+_EVENT_ID_PATTERN = re.compile(r"\d+(-\d+)?")
+
+
+class TaskEventsApi(Resource):
+    @validate_app_token(fetch_user_arg=FetchUserArg(fetch_from=WhereisUserArg.QUERY, required=True))
+    def get(self, app_model: App, end_user: EndUser, task_id: str):
+        """
+        Resume the event stream of a task after the event given by the Last-Event-ID header
+        """
+        event_log = StreamEventLog(task_id)
+        if (
+            not StreamEventLog.is_enabled()
+            or not AppQueueManager.is_task_owner(task_id, InvokeFrom.SERVICE_API, end_user.id)
+            or not event_log.exists()
+        ):
+            raise NotFound("Event stream not found.")
+
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        if last_event_id and not _EVENT_ID_PATTERN.fullmatch(last_event_id):
+            raise BadRequest("Invalid last event id.")
+
+        return helper.compact_generate_response(
+            BaseAppGenerator.convert_event_log_to_event_stream(event_log, last_event_id)
+        )
+
+
+api.add_resource(TaskEventsApi, "/tasks/<string:task_id>/events")
@@ -1,3 +1,4 @@
+import threading
 import time
 from collections.abc import Callable
 from datetime import timedelta
@@ -5,6 +6,7 @@ from enum import Enum
 from functools import wraps
 from typing import Optional
 
+from cachetools import TTLCache
 from flask import current_app, request
 from flask_login import user_logged_in  # type: ignore
 from flask_restful import Resource
@@ -13,15 +15,19 @@ from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from werkzeug.exceptions import Forbidden, NotFound, Unauthorized
 
+from core.helper.api_token_auth_cache import ApiTokenAuthCache, ApiTokenAuthContext
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from libs.datetime_utils import naive_utc_now
 from libs.login import _get_user
-from models.account import Account, Tenant, TenantAccountJoin, TenantStatus
+from models.account import Account, Tenant, TenantAccountJoin, TenantAccountRole, TenantStatus
 from models.dataset import Dataset, RateLimitLog
 from models.model import ApiToken, App, EndUser
 from services.feature_service import FeatureService
 
+_touched_api_tokens: TTLCache = TTLCache(maxsize=10000, ttl=60)
+_touched_api_tokens_lock = threading.Lock()
+
 
 class WhereisUserArg(Enum):
     """
@@ -42,9 +48,18 @@ def validate_app_token(view: Optional[Callable] = None, *, fetch_user_arg: Optio
     def decorator(view_func):
         @wraps(view_func)
         def decorated_view(*args, **kwargs):
-            api_token = validate_and_get_api_token("app")
+            auth_cache, auth_context = _get_cached_auth_context("app")
+            version: Optional[str] = None
+            if auth_context is not None:
+                app_id, tenant_id = auth_context.app_id, auth_context.tenant_id
+            else:
+                api_token = validate_and_get_api_token("app")
+                app_id, tenant_id = api_token.app_id, api_token.tenant_id
+                # read before the context is resolved, so a context resolved during an invalidation is not kept
+                if auth_cache is not None:
+                    version = ApiTokenAuthCache.get_version(tenant_id)
 
-            app_model = db.session.query(App).where(App.id == api_token.app_id).first()
+            app_model = db.session.query(App).where(App.id == app_id).first()
             if not app_model:
                 raise Forbidden("The app no longer exists.")
 
@@ -54,32 +69,20 @@ def validate_app_token(view: Optional[Callable] = None, *, fetch_user_arg: Optio
             if not app_model.enable_api:
                 raise Forbidden("The app's API service has been disabled.")
 
-            tenant = db.session.query(Tenant).where(Tenant.id == app_model.tenant_id).first()
-            if tenant is None:
-                raise ValueError("Tenant does not exist.")
-            if tenant.status == TenantStatus.ARCHIVE:
-                raise Forbidden("The workspace's status is archived.")
-
-            tenant_account_join = (
-                db.session.query(Tenant, TenantAccountJoin)
-                .where(Tenant.id == api_token.tenant_id)
-                .where(TenantAccountJoin.tenant_id == Tenant.id)
-                .where(TenantAccountJoin.role.in_(["owner"]))
-                .where(Tenant.status == TenantStatus.NORMAL)
-                .one_or_none()
-            )  # TODO: only owner information is required, so only one is returned.
-            if tenant_account_join:
-                tenant, ta = tenant_account_join
-                account = db.session.query(Account).where(Account.id == ta.account_id).first()
-                # Login admin
-                if account:
-                    account.current_tenant = tenant
-                    current_app.login_manager._update_request_context_with_user(account)  # type: ignore
-                    user_logged_in.send(current_app._get_current_object(), user=_get_user())  # type: ignore
-                else:
-                    raise Unauthorized("Tenant owner account does not exist.")
+            if auth_context is not None:
+                if auth_context.tenant.status == TenantStatus.ARCHIVE:
+                    raise Forbidden("The workspace's status is archived.")
+                _login_cached_tenant_owner(auth_context)
             else:
-                raise Unauthorized("Tenant does not exist.")
+                tenant = db.session.query(Tenant).where(Tenant.id == app_model.tenant_id).first()
+                if tenant is None:
+                    raise ValueError("Tenant does not exist.")
+                if tenant.status == TenantStatus.ARCHIVE:
+                    raise Forbidden("The workspace's status is archived.")
+
+                auth_context = _login_tenant_owner(tenant_id, app_id)
+                if auth_cache is not None and version is not None:
+                    auth_cache.set(version, auth_context)
 
             kwargs["app_model"] = app_model
 
@@ -120,8 +123,8 @@ def validate_app_token(view: Optional[Callable] = None, *, fetch_user_arg: Optio
 def cloud_edition_billing_resource_check(resource: str, api_token_type: str):
     def interceptor(view):
         def decorated(*args, **kwargs):
-            api_token = validate_and_get_api_token(api_token_type)
-            features = FeatureService.get_features(api_token.tenant_id)
+            tenant_id = _get_api_token_tenant_id(api_token_type)
+            features = FeatureService.get_features(tenant_id)
 
             if features.billing.enabled:
                 members = features.members
@@ -151,8 +154,8 @@ def cloud_edition_billing_knowledge_limit_check(resource: str, api_token_type: s
     def interceptor(view):
         @wraps(view)
         def decorated(*args, **kwargs):
-            api_token = validate_and_get_api_token(api_token_type)
-            features = FeatureService.get_features(api_token.tenant_id)
+            tenant_id = _get_api_token_tenant_id(api_token_type)
+            features = FeatureService.get_features(tenant_id)
             if features.billing.enabled:
                 if resource == "add_segment":
                     if features.billing.subscription.plan == "sandbox":
@@ -173,13 +176,13 @@ def cloud_edition_billing_rate_limit_check(resource: str, api_token_type: str):
     def interceptor(view):
         @wraps(view)
         def decorated(*args, **kwargs):
-            api_token = validate_and_get_api_token(api_token_type)
+            tenant_id = _get_api_token_tenant_id(api_token_type)
 
             if resource == "knowledge":
-                knowledge_rate_limit = FeatureService.get_knowledge_rate_limit(api_token.tenant_id)
+                knowledge_rate_limit = FeatureService.get_knowledge_rate_limit(tenant_id)
                 if knowledge_rate_limit.enabled:
                     current_time = int(time.time() * 1000)
-                    key = f"rate_limit_{api_token.tenant_id}"
+                    key = f"rate_limit_{tenant_id}"
 
                     redis_client.zadd(key, {current_time: current_time})
 
@@ -190,7 +193,7 @@ def cloud_edition_billing_rate_limit_check(resource: str, api_token_type: str):
                     if request_count > knowledge_rate_limit.limit:
                         # add ratelimit record
                         rate_limit_log = RateLimitLog(
-                            tenant_id=api_token.tenant_id,
+                            tenant_id=tenant_id,
                             subscription_plan=knowledge_rate_limit.subscription_plan,
                             operation="knowledge",
                         )
@@ -210,28 +213,16 @@ def validate_dataset_token(view=None):
     def decorator(view):
         @wraps(view)
         def decorated(*args, **kwargs):
-            api_token = validate_and_get_api_token("dataset")
-            tenant_account_join = (
-                db.session.query(Tenant, TenantAccountJoin)
-                .where(Tenant.id == api_token.tenant_id)
-                .where(TenantAccountJoin.tenant_id == Tenant.id)
-                .where(TenantAccountJoin.role.in_(["owner"]))
-                .where(Tenant.status == TenantStatus.NORMAL)
-                .one_or_none()
-            )  # TODO: only owner information is required, so only one is returned.
-            if tenant_account_join:
-                tenant, ta = tenant_account_join
-                account = db.session.query(Account).where(Account.id == ta.account_id).first()
-                # Login admin
-                if account:
-                    account.current_tenant = tenant
-                    current_app.login_manager._update_request_context_with_user(account)  # type: ignore
-                    user_logged_in.send(current_app._get_current_object(), user=_get_user())  # type: ignore
-                else:
-                    raise Unauthorized("Tenant owner account does not exist.")
+            auth_cache, auth_context = _get_cached_auth_context("dataset")
+            if auth_context is not None:
+                _login_cached_tenant_owner(auth_context)
             else:
-                raise Unauthorized("Tenant does not exist.")
-            return view(api_token.tenant_id, *args, **kwargs)
+                api_token = validate_and_get_api_token("dataset")
+                version = ApiTokenAuthCache.get_version(api_token.tenant_id) if auth_cache is not None else None
+                auth_context = _login_tenant_owner(api_token.tenant_id)
+                if auth_cache is not None and version is not None:
+                    auth_cache.set(version, auth_context)
+            return view(auth_context.tenant_id, *args, **kwargs)
 
         return decorated
 
@@ -247,15 +238,7 @@ def validate_and_get_api_token(scope: str | None = None):
     """
     Validate and get API token.
     """
-    auth_header = request.headers.get("Authorization")
-    if auth_header is None or " " not in auth_header:
-        raise Unauthorized("Authorization header must be provided and start with 'Bearer'")
-
-    auth_scheme, auth_token = auth_header.split(None, 1)
-    auth_scheme = auth_scheme.lower()
-
-    if auth_scheme != "bearer":
-        raise Unauthorized("Authorization scheme must be 'Bearer'")
+    auth_token = _get_auth_token()
 
     current_time = naive_utc_now()
     cutoff_time = current_time - timedelta(minutes=1)
@@ -284,6 +267,104 @@ def validate_and_get_api_token(scope: str | None = None):
     return api_token
 
 
+def _get_auth_token() -> str:
+    auth_header = request.headers.get("Authorization")
+    if auth_header is None or " " not in auth_header:
+        raise Unauthorized("Authorization header must be provided and start with 'Bearer'")
+
+    auth_scheme, auth_token = auth_header.split(None, 1)
+    auth_scheme = auth_scheme.lower()
+
+    if auth_scheme != "bearer":
+        raise Unauthorized("Authorization scheme must be 'Bearer'")
+
+    return auth_token
+
+
+def _get_cached_auth_context(
+    scope: str,
+) -> tuple[Optional[ApiTokenAuthCache], Optional[ApiTokenAuthContext]]:
+    """
+    Get the cached authentication context of the API token of the request.
+
+    :param scope: API token type
+    :return: cache of the token, None when disabled, and its cached context, None on miss
+    """
+    if not ApiTokenAuthCache.is_enabled():
+        return None, None
+
+    auth_token = _get_auth_token()
+    auth_cache = ApiTokenAuthCache(auth_token, scope)
+    auth_context = auth_cache.get()
+    if auth_context is not None:
+        _touch_api_token(auth_token, scope)
+    return auth_cache, auth_context
+
+
+def _get_api_token_tenant_id(scope: str) -> str:
+    auth_cache, auth_context = _get_cached_auth_context(scope)
+    if auth_context is not None:
+        return auth_context.tenant_id
+    return str(validate_and_get_api_token(scope).tenant_id)
+
+
+def _touch_api_token(auth_token: str, scope: str) -> None:
+    """
+    Update the last usage time of a token resolved from the cache, at most once a minute per process.
+    """
+    with _touched_api_tokens_lock:
+        if (scope, auth_token) in _touched_api_tokens:
+            return
+        _touched_api_tokens[(scope, auth_token)] = True
+
+    current_time = naive_utc_now()
+    with Session(db.engine) as session:
+        session.execute(
+            update(ApiToken)
+            .where(
+                ApiToken.token == auth_token,
+                (ApiToken.last_used_at.is_(None) | (ApiToken.last_used_at < current_time - timedelta(minutes=1))),
+                ApiToken.type == scope,
+            )
+            .values(last_used_at=current_time)
+        )
+        session.commit()
+
+
+def _login_tenant_owner(tenant_id: str, app_id: Optional[str] = None) -> ApiTokenAuthContext:
+    tenant_account_join = (
+        db.session.query(Tenant, TenantAccountJoin)
+        .where(Tenant.id == tenant_id)
+        .where(TenantAccountJoin.tenant_id == Tenant.id)
+        .where(TenantAccountJoin.role.in_(["owner"]))
+        .where(Tenant.status == TenantStatus.NORMAL)
+        .one_or_none()
+    )  # TODO: only owner information is required, so only one is returned.
+    if tenant_account_join:
+        tenant, ta = tenant_account_join
+        account = db.session.query(Account).where(Account.id == ta.account_id).first()
+        # Login admin
+        if account:
+            account.current_tenant = tenant
+            current_app.login_manager._update_request_context_with_user(account)  # type: ignore
+            user_logged_in.send(current_app._get_current_object(), user=_get_user())  # type: ignore
+        else:
+            raise Unauthorized("Tenant owner account does not exist.")
+    else:
+        raise Unauthorized("Tenant does not exist.")
+
+    return ApiTokenAuthContext(tenant_id=tenant_id, app_id=app_id, tenant=tenant, owner=account, owner_role=ta.role)
+
+
+def _login_cached_tenant_owner(auth_context: ApiTokenAuthContext) -> None:
+    account = auth_context.owner
+    # same as setting `current_tenant`, whose membership query is answered by the cached role
+    account.role = TenantAccountRole(auth_context.owner_role)
+    account._current_tenant = auth_context.tenant
+    current_app.login_manager._update_request_context_with_user(account)  # type: ignore
+    user_logged_in.send(current_app._get_current_object(), user=_get_user())  # type: ignore
+
+
 def create_or_update_end_user_for_user_id(app_model: App, user_id: Optional[str] = None) -> EndUser:
     """
     Create or update session terminal based on user ID.
@@ -87,6 +87,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
                 node_id=self.application_generate_entity.single_iteration_run.node_id,
                 user_inputs=dict(self.application_generate_entity.single_iteration_run.inputs),
             )
+            graph_config = self._workflow.graph_dict
         elif self.application_generate_entity.single_loop_run:
             # if only single loop run is requested
             graph, variable_pool = self._get_graph_and_variable_pool_of_single_loop(
@@ -94,6 +95,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
                 node_id=self.application_generate_entity.single_loop_run.node_id,
                 user_inputs=dict(self.application_generate_entity.single_loop_run.inputs),
             )
+            graph_config = self._workflow.graph_dict
         else:
             inputs = self.application_generate_entity.inputs
             query = self.application_generate_entity.query
@@ -162,7 +164,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=self._workflow.graph_dict)
+            graph_config, graph = self._get_workflow_graph(self._workflow)
 
         db.session.close()
 
@@ -173,7 +175,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             workflow_id=self._workflow.id,
             workflow_type=WorkflowType.value_of(self._workflow.type),
             graph=graph,
-            graph_config=self._workflow.graph_dict,
+            graph_config=graph_config,
             user_id=self.application_generate_entity.user_id,
             user_from=(
                 UserFrom.ACCOUNT
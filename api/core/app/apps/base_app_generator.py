@@ -1,10 +1,16 @@
+import contextvars
 import json
+import logging
+import queue
+import threading
 from collections.abc import Generator, Mapping, Sequence
 from typing import TYPE_CHECKING, Any, Optional, Union, final
 
+from flask import current_app, has_app_context
 from sqlalchemy.orm import Session
 
 from core.app.app_config.entities import VariableEntityType
+from core.app.apps.stream_event_log import StreamEventLog
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.file import File, FileUploadConfig
 from core.workflow.nodes.enums import NodeType
@@ -14,11 +20,14 @@ from core.workflow.repositories.draft_variable_repository import (
     NoopDraftVariableSaver,
 )
 from factories import file_factory
+from libs.flask_utils import preserve_flask_contexts
 from services.workflow_draft_variable_service import DraftVariableSaver as DraftVariableSaverImpl
 
 if TYPE_CHECKING:
     from core.app.app_config.entities import VariableEntity
 
+logger = logging.getLogger(__name__)
+
 
 class BaseAppGenerator:
     def _prepare_user_inputs(
@@ -153,12 +162,20 @@ class BaseAppGenerator:
         return value
 
     @classmethod
-    def convert_to_event_stream(cls, generator: Union[Mapping, Generator[Mapping | str, None, None]]):
+    def convert_to_event_stream(
+        cls,
+        generator: Union[Mapping, Generator[Mapping | str, None, None]],
+        invoke_from: Optional[InvokeFrom] = None,
+    ):
         """
         Convert messages into event stream
+        :param generator: messages, or the response of a blocking call
+        :param invoke_from: invoke source, events are only logged for the service API, which can resume streams
         """
-        if isinstance(generator, dict):
+        if isinstance(generator, Mapping):
             return generator
+        elif invoke_from == InvokeFrom.SERVICE_API and StreamEventLog.is_enabled() and has_app_context():
+            return cls._convert_to_logged_event_stream(generator)
         else:
 
             def gen():
@@ -170,6 +187,90 @@ class BaseAppGenerator:
 
             return gen()
 
+    @classmethod
+    def _convert_to_logged_event_stream(cls, generator: Generator[Mapping | str, None, None]):
+        """
+        Convert messages into an event stream whose events are logged for replay.
+
+        The messages are consumed in a separate thread, so the task keeps running and logging its events
+        after the client disconnected, the client reconnects with the id of the last event it received.
+        At most APP_STREAM_EVENT_LOG_BUFFER_SIZE events wait for a slow client, the task waits for it beyond.
+        """
+        flask_app = current_app._get_current_object()  # type: ignore
+        context = contextvars.copy_context()
+        messages: queue.Queue = queue.Queue(maxsize=StreamEventLog.buffer_size())
+        detached = threading.Event()
+
+        def forward(item) -> None:
+            # nobody reads the buffer once the client disconnected
+            while not detached.is_set():
+                try:
+                    messages.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+        def log_messages():
+            with preserve_flask_contexts(flask_app, context_vars=context):
+                event_log: Optional[StreamEventLog] = None
+                try:
+                    for message in generator:
+                        event_id = None
+                        if isinstance(message, Mapping):
+                            if event_log is None and message.get("task_id"):
+                                event_log = StreamEventLog(message["task_id"])
+                            if event_log is not None:
+                                event_id = event_log.append(message)
+                        forward((message, event_id))
+                except Exception as e:
+                    if detached.is_set():
+                        logger.exception("Failed to generate stream events after the client disconnected")
+                    forward(e)
+                finally:
+                    if event_log is not None:
+                        event_log.close()
+                    forward(None)
+
+        threading.Thread(target=log_messages, daemon=True).start()
+
+        def gen():
+            try:
+                while True:
+                    item = messages.get()
+                    if item is None:
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    message, event_id = item
+                    if not isinstance(message, Mapping):
+                        yield f"event: {message}\n\n"
+                    elif event_id:
+                        yield f"id: {event_id}\ndata: {json.dumps(message)}\n\n"
+                    else:
+                        yield f"data: {json.dumps(message)}\n\n"
+            finally:
+                detached.set()
+
+        return gen()
+
+    @classmethod
+    def convert_event_log_to_event_stream(cls, event_log: StreamEventLog, last_event_id: Optional[str] = None):
+        """
+        Convert the logged events of a task into an event stream, resuming after the last event received
+        :param event_log: event log of the task
+        :param last_event_id: id of the last event received by the client, None to replay all events
+        """
+
+        def gen():
+            for event in event_log.read(last_event_id):
+                if isinstance(event, str):
+                    yield f"event: {event}\n\n"
+                else:
+                    event_id, data = event
+                    yield f"id: {event_id}\ndata: {data}\n\n"
+
+        return gen()
+
     @final
     @staticmethod
     def _get_draft_var_saver_factory(invoke_from: InvokeFrom) -> DraftVariableSaverFactory:
@@ -1,12 +1,24 @@
+import datetime
+import decimal
+import functools
+import logging
 import queue
+import threading
 import time
+import types
+import typing
+import uuid
 from abc import abstractmethod
+from collections.abc import Mapping
 from enum import Enum
 from typing import Any, Optional
 
+from pydantic import BaseModel
+from redis import RedisError
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
+from core.app.apps.task_stop_subscriber import TASK_STOP_CHANNEL, TaskStopSubscriber
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.entities.queue_entities import (
     AppQueueEvent,
@@ -18,6 +30,8 @@ from core.app.entities.queue_entities import (
 )
 from extensions.ext_redis import redis_client
 
+logger = logging.getLogger(__name__)
+
 
 class PublishFrom(Enum):
     APPLICATION_MANAGER = 1
@@ -42,6 +56,12 @@ class AppQueueManager:
 
         self._q = q
 
+        self._stop_subscriber: Optional[TaskStopSubscriber] = None
+        self._stop_event = threading.Event()
+        if dify_config.APP_TASK_STOP_PUBSUB_ENABLED:
+            self._stop_subscriber = TaskStopSubscriber.get_instance()
+            self._stop_event = self._stop_subscriber.register(self._task_id)
+
     def listen(self):
         """
         Listen to queue
@@ -96,7 +116,7 @@ class AppQueueManager:
         :param pub_from:
         :return:
         """
-        self._check_for_sqlalchemy_models(event.model_dump())
+        self._check_for_sqlalchemy_models(event)
         self._publish(event, pub_from)
 
     @abstractmethod
@@ -115,25 +135,49 @@ class AppQueueManager:
         Set task stop flag
         :return:
         """
-        result: Optional[Any] = redis_client.get(cls._generate_task_belong_cache_key(task_id))
-        if result is None:
-            return
-
-        user_prefix = "account" if invoke_from in {InvokeFrom.EXPLORE, InvokeFrom.DEBUGGER} else "end-user"
-        if result.decode("utf-8") != f"{user_prefix}-{user_id}":
+        if not cls.is_task_owner(task_id, invoke_from, user_id):
             return
 
         stopped_cache_key = cls._generate_stopped_cache_key(task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
+        if dify_config.APP_TASK_STOP_PUBSUB_ENABLED:
+            try:
+                redis_client.publish(TASK_STOP_CHANNEL, task_id)
+            except RedisError:
+                # listeners fall back to polling the stop flag while the subscription is unavailable
+                logger.warning("Failed to publish stop signal of task %s", task_id, exc_info=True)
+
+    @classmethod
+    def is_task_owner(cls, task_id: str, invoke_from: InvokeFrom, user_id: str) -> bool:
+        """
+        Check if a task was started by a user
+        :param task_id: task id
+        :param invoke_from: invoke from
+        :param user_id: user id
+        :return:
+        """
+        result: Optional[Any] = redis_client.get(cls._generate_task_belong_cache_key(task_id))
+        if result is None:
+            return False
+
+        user_prefix = "account" if invoke_from in {InvokeFrom.EXPLORE, InvokeFrom.DEBUGGER} else "end-user"
+        return bool(result.decode("utf-8") == f"{user_prefix}-{user_id}")
 
     def _is_stopped(self) -> bool:
         """
         Check if task is stopped
         :return:
         """
+        if self._stop_event.is_set():
+            return True
+        # the stop signal is pushed to the local event while the subscription is active
+        if self._stop_subscriber is not None and self._stop_subscriber.is_active:
+            return False
+
         stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
         result = redis_client.get(stopped_cache_key)
         if result is not None:
+            self._stop_event.set()
             return True
 
         return False
@@ -157,11 +201,15 @@ class AppQueueManager:
         return f"generate_task_stopped:{task_id}"
 
     def _check_for_sqlalchemy_models(self, data: Any):
-        # from entity to dict or list
-        if isinstance(data, dict):
-            for key, value in data.items():
+        # only the fields whose type allows arbitrary objects are walked, events made of plain values only,
+        # like the text chunks, are published without being walked
+        if isinstance(data, BaseModel):
+            for field_name in _get_arbitrary_object_fields(type(data)):
+                self._check_for_sqlalchemy_models(getattr(data, field_name, None))
+        elif isinstance(data, Mapping):
+            for value in data.values():
                 self._check_for_sqlalchemy_models(value)
-        elif isinstance(data, list):
+        elif isinstance(data, (list, tuple, set, frozenset)):
             for item in data:
                 self._check_for_sqlalchemy_models(item)
         else:
@@ -169,3 +217,62 @@ class AppQueueManager:
                 raise TypeError(
                     "Critical Error: Passing SQLAlchemy Model instances that cause thread safety issues is not allowed."
                 )
+
+
+_PLAIN_TYPES = (
+    str,
+    bytes,
+    int,
+    float,
+    bool,
+    type(None),
+    decimal.Decimal,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    uuid.UUID,
+    Enum,
+)
+
+
+@functools.cache
+def _get_arbitrary_object_fields(model_class: type[BaseModel]) -> tuple[str, ...]:
+    """
+    Get the fields of a model whose type allows values other than plain values and models, inspected once per class.
+
+    :param model_class: model class
+    :return: field names
+    """
+    return tuple(
+        field_name
+        for field_name, field_info in model_class.model_fields.items()
+        if _allows_arbitrary_objects(field_info.annotation, frozenset({model_class}))
+    )
+
+
+def _allows_arbitrary_objects(annotation: Any, seen: frozenset[type]) -> bool:
+    origin = typing.get_origin(annotation)
+    if origin is typing.Literal:
+        return False
+    if origin is typing.Annotated:
+        return _allows_arbitrary_objects(typing.get_args(annotation)[0], seen)
+    if origin is not None:
+        args = typing.get_args(annotation)
+        # unparameterized containers, like `dict` or `list`, hold anything
+        if not args and origin is not typing.Union and origin is not types.UnionType:
+            return True
+        return any(arg is not Ellipsis and _allows_arbitrary_objects(arg, seen) for arg in args)
+    if not isinstance(annotation, type):
+        # Any, type variables and unresolved references
+        return True
+    if issubclass(annotation, _PLAIN_TYPES):
+        return False
+    if issubclass(annotation, BaseModel):
+        if annotation in seen:
+            return False
+        seen = seen | {annotation}
+        return any(
+            _allows_arbitrary_objects(field_info.annotation, seen) for field_info in annotation.model_fields.values()
+        )
+    # containers without parameters and any other class
+    return True
@@ -0,0 +1,102 @@
+import json
+import logging
+import time
+from collections.abc import Generator, Mapping
+from typing import Any, Optional
+
+from redis import RedisError
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class StreamEventLog:
+    """
+    Replayable log of the events streamed by a task, kept in a Redis Stream.
+
+    Every event is appended as an entry whose id is sent to the client as the SSE event id, so a client
+    whose connection dropped can reconnect to any API node with `Last-Event-ID` and read the events after
+    it instead of running the app again. The stream is trimmed to APP_STREAM_EVENT_LOG_MAX_LENGTH entries,
+    expires APP_STREAM_EVENT_LOG_TTL seconds after its last write and ends with an entry without data.
+    """
+
+    _DATA_FIELD = "data"
+    _END_FIELD = "end"
+    _READ_COUNT = 100
+    _READ_BLOCK_MS = 1000
+    _PING_INTERVAL = 10
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.stream_key = f"stream_event_log:{task_id}"
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.APP_STREAM_EVENT_LOG_ENABLED
+
+    @staticmethod
+    def buffer_size() -> int:
+        return dify_config.APP_STREAM_EVENT_LOG_BUFFER_SIZE
+
+    def append(self, message: Mapping[str, Any]) -> Optional[str]:
+        """
+        Append an event to the log.
+
+        :param message: streamed event
+        :return: entry id, None if the event could not be logged
+        """
+        return self._add({self._DATA_FIELD: json.dumps(message)})
+
+    def close(self) -> None:
+        """
+        Mark the end of the stream, readers stop after it.
+        """
+        self._add({self._END_FIELD: "1"})
+
+    def exists(self) -> bool:
+        return bool(redis_client.exists(self.stream_key))
+
+    def read(self, last_event_id: Optional[str] = None) -> Generator[tuple[str, str] | str, None, None]:
+        """
+        Read the events after an entry, waiting for the new ones until the end of the stream.
+
+        :param last_event_id: id of the last entry received by the client, None to read from the start
+        :return: entry ids with their serialized events, and "ping" while no event arrives
+        """
+        last_id = last_event_id or "0"
+        listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
+        last_entry_at = last_ping_at = time.time()
+        while True:
+            response = redis_client.xread({self.stream_key: last_id}, count=self._READ_COUNT, block=self._READ_BLOCK_MS)
+            entries = response[0][1] if response else []
+            for entry_id, fields in entries:
+                last_id = entry_id.decode("utf-8") if isinstance(entry_id, bytes) else entry_id
+                data = fields.get(self._DATA_FIELD.encode()) or fields.get(self._DATA_FIELD)
+                if data is None:
+                    return
+                yield last_id, data.decode("utf-8") if isinstance(data, bytes) else data
+
+            now = time.time()
+            if entries:
+                last_entry_at = now
+            elif now - last_entry_at > listen_timeout:
+                return
+            if now - last_ping_at >= self._PING_INTERVAL:
+                last_ping_at = now
+                yield "ping"
+
+    def _add(self, fields: Mapping[str, str]) -> Optional[str]:
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            pipeline.xadd(
+                self.stream_key, dict(fields), maxlen=dify_config.APP_STREAM_EVENT_LOG_MAX_LENGTH, approximate=True
+            )
+            pipeline.expire(self.stream_key, dify_config.APP_STREAM_EVENT_LOG_TTL)
+            entry_id, _ = pipeline.execute()
+        except RedisError:
+            # the live stream goes on, only its replay is lost
+            logger.warning("Failed to log stream event of task %s", self.task_id, exc_info=True)
+            return None
+        return entry_id.decode("utf-8") if isinstance(entry_id, bytes) else entry_id
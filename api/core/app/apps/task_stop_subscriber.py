@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+import weakref
+from typing import Optional
+
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+TASK_STOP_CHANNEL = "generate_task_stopped"
+
+# seconds to wait before re-subscribing after the subscription failed
+_RESUBSCRIBE_INTERVAL = 5
+
+
+class TaskStopSubscriber:
+    """
+    Process-wide subscriber of task stop notifications.
+
+    A single background thread subscribes to `TASK_STOP_CHANNEL` and sets the stop event of the
+    matching local task, so queue managers can check for stops without a Redis round-trip.
+    `is_active` is False until the subscription is confirmed and whenever it is lost; callers
+    must fall back to polling the stop flag during that time.
+    """
+
+    _instance: Optional["TaskStopSubscriber"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._stop_events: weakref.WeakValueDictionary[str, threading.Event] = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def get_instance(cls) -> "TaskStopSubscriber":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def is_active(self) -> bool:
+        return self._active.is_set()
+
+    def register(self, task_id: str) -> threading.Event:
+        """
+        Register a local task to be notified when it is stopped.
+
+        The subscriber only keeps a weak reference to the returned event, the caller must hold it
+        for as long as it wants to be notified.
+
+        :param task_id: task id
+        :return: event set when the task is stopped
+        """
+        stop_event = threading.Event()
+        with self._lock:
+            self._stop_events[task_id] = stop_event
+        self._ensure_started()
+        return stop_event
+
+    def notify(self, task_id: str) -> None:
+        """
+        Set the stop event of a local task, if any.
+
+        :param task_id: task id
+        """
+        with self._lock:
+            stop_event = self._stop_events.get(task_id)
+        if stop_event is not None:
+            stop_event.set()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="TaskStopSubscriber", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.pubsub()
+                pubsub.subscribe(TASK_STOP_CHANNEL)
+                self._wait_for_subscription(pubsub)
+                self._active.set()
+                # stops published before the subscription was confirmed were missed, read their flags instead
+                self._resync()
+                while True:
+                    message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if isinstance(message, dict) and message.get("type") == "message":
+                        data = message["data"]
+                        self.notify(data.decode("utf-8") if isinstance(data, bytes) else str(data))
+            except Exception:
+                logger.warning("Task stop subscription lost, falling back to polling", exc_info=True)
+            finally:
+                self._active.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        logger.debug("Failed to close task stop subscription", exc_info=True)
+            time.sleep(_RESUBSCRIBE_INTERVAL)
+
+    @staticmethod
+    def _wait_for_subscription(pubsub) -> None:
+        while True:
+            message = pubsub.get_message(timeout=1.0)
+            if isinstance(message, dict) and message.get("type") == "subscribe":
+                return
+
+    def _resync(self) -> None:
+        from core.app.apps.base_app_queue_manager import AppQueueManager
+
+        with self._lock:
+            task_ids = list(self._stop_events.keys())
+        if not task_ids:
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.exists(AppQueueManager._generate_stopped_cache_key(task_id))
+        for task_id, exists in zip(task_ids, pipe.execute()):
+            if exists:
+                self.notify(task_id)
@@ -64,6 +64,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
                 node_id=self.application_generate_entity.single_iteration_run.node_id,
                 user_inputs=self.application_generate_entity.single_iteration_run.inputs,
             )
+            graph_config = self._workflow.graph_dict
         elif self.application_generate_entity.single_loop_run:
             # if only single loop run is requested
             graph, variable_pool = self._get_graph_and_variable_pool_of_single_loop(
@@ -71,6 +72,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
                 node_id=self.application_generate_entity.single_loop_run.node_id,
                 user_inputs=self.application_generate_entity.single_loop_run.inputs,
             )
+            graph_config = self._workflow.graph_dict
         else:
             inputs = self.application_generate_entity.inputs
             files = self.application_generate_entity.files
@@ -93,7 +95,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=self._workflow.graph_dict)
+            graph_config, graph = self._get_workflow_graph(self._workflow)
 
         # RUN WORKFLOW
         workflow_entry = WorkflowEntry(
@@ -102,7 +104,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             workflow_id=self._workflow.id,
             workflow_type=WorkflowType.value_of(self._workflow.type),
             graph=graph,
-            graph_config=self._workflow.graph_dict,
+            graph_config=graph_config,
             user_id=self.application_generate_entity.user_id,
             user_from=(
                 UserFrom.ACCOUNT
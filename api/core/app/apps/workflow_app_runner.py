@@ -59,6 +59,7 @@ from core.workflow.graph_engine.entities.event import (
     ParallelBranchRunSucceededEvent,
 )
 from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.graph_cache import CompiledGraphCache
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.node_mapping import NODE_TYPE_CLASSES_MAPPING
 from core.workflow.system_variable import SystemVariable
@@ -99,6 +100,18 @@ class WorkflowBasedAppRunner:
 
         return graph
 
+    def _get_workflow_graph(self, workflow: Workflow) -> tuple[Mapping[str, Any], Graph]:
+        """
+        Get the graph config and the compiled graph of a workflow, from the compiled graph cache when enabled.
+        The returned graph config is shared with other runs and must not be mutated.
+        """
+        return CompiledGraphCache.get_or_compile(
+            workflow_id=workflow.id,
+            version=workflow.version,
+            serialized_graph=workflow.graph,
+            compile_graph=lambda graph_config: self._init_graph(graph_config=graph_config),
+        )
+
     def _get_graph_and_variable_pool_of_single_iteration(
         self,
         workflow: Workflow,
@@ -1,5 +1,5 @@
 import base64
-from collections.abc import Mapping
+from collections.abc import Generator, Mapping
 
 from configs import dify_config
 from core.helper import ssrf_proxy
@@ -105,6 +105,22 @@ def download(f: File, /):
     raise ValueError(f"unsupported transfer method: {f.transfer_method}")
 
 
+def download_stream(f: File, /) -> Generator[bytes, None, None]:
+    """
+    Download the content of a file chunk by chunk, without loading it in memory.
+    """
+    if f.transfer_method in (FileTransferMethod.TOOL_FILE, FileTransferMethod.LOCAL_FILE):
+        yield from storage.load_stream(f._storage_key)
+    elif f.transfer_method == FileTransferMethod.REMOTE_URL:
+        if f.remote_url is None:
+            raise ValueError("Missing URL for remote file")
+        with ssrf_proxy.stream("GET", f.remote_url, follow_redirects=True) as response:
+            response.raise_for_status()
+            yield from response.iter_bytes()
+    else:
+        raise ValueError(f"unsupported transfer method: {f.transfer_method}")
+
+
 def _download_file_content(path: str, /):
     """
     Download and return the contents of a file as bytes.
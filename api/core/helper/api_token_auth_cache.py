@@ -0,0 +1,203 @@
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Optional, TypeVar
+
+from cachetools import TTLCache
+from opentelemetry.metrics import get_meter
+from redis import RedisError
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.orm import Mapper, make_transient_to_detached
+
+from configs import dify_config
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.account import Account, Tenant
+
+logger = logging.getLogger(__name__)
+
+_ModelT = TypeVar("_ModelT", Account, Tenant)
+
+_auth_cache_meter = get_meter("api_token_auth_cache_metrics")
+_lookups_counter = _auth_cache_meter.create_counter(
+    "api_token_auth_cache.lookups",
+    unit="{lookup}",
+    description="Number of service API authentication context lookups, by result",
+)
+
+# never copied to the cache, they are loaded from the database if a request reads them
+_ACCOUNT_EXCLUDED_COLUMNS = frozenset({"password", "password_salt"})
+
+
+class ApiTokenAuthContext:
+    """
+    Authentication context resolved from a service API token.
+    """
+
+    def __init__(self, tenant_id: str, app_id: Optional[str], tenant: Tenant, owner: Account, owner_role: str):
+        self.tenant_id = tenant_id
+        self.app_id = app_id
+        self.tenant = tenant
+        self.owner = owner
+        self.owner_role = owner_role
+
+
+class ApiTokenAuthCache:
+    """
+    Versioned cache of the authentication context of service API tokens.
+
+    Entries hold the tenant of a token, the app it belongs to and the tenant owner logged in for the request,
+    in a process-local tier and in Redis, keyed by a hash of the token. They are stored under the version of
+    the tenant read before the context was resolved, and `invalidate` bumps that version, so revoking a
+    token, transferring the ownership or changing the status of a tenant takes effect in every process on
+    the next request. The app itself is not cached, it is loaded by primary key on every request so its
+    status and API access are always current.
+    """
+
+    _local_cache: Optional[TTLCache] = None
+    _local_lock = threading.Lock()
+
+    def __init__(self, token: str, scope: str):
+        token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        self.cache_key = f"api_token_auth:{scope}:{token_hash}"
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.API_TOKEN_AUTH_CACHE_ENABLED
+
+    @staticmethod
+    def get_version(tenant_id: str) -> Optional[str]:
+        """
+        Get the current version of the cached authentication contexts of a tenant.
+
+        :param tenant_id: workspace id
+        :return: version, None if it could not be read and the cache must be bypassed
+        """
+        try:
+            version = redis_client.get(ApiTokenAuthCache._version_key(tenant_id))
+        except RedisError:
+            logger.warning("Failed to read API token auth version of tenant %s", tenant_id)
+            return None
+        return version.decode("utf-8") if version else "0"
+
+    def get(self) -> Optional[ApiTokenAuthContext]:
+        """
+        Get the cached authentication context of the token, merged into the current session.
+
+        :return: authentication context, None on miss
+        """
+        local_cache = self._get_local_cache()
+        with self._local_lock:
+            entry = local_cache.get(self.cache_key)
+        result = "hit_local"
+
+        if entry is None:
+            result = "hit_redis"
+            try:
+                payload = redis_client.get(self.cache_key)
+            except RedisError:
+                logger.warning("Failed to read cached API token auth context")
+                payload = None
+            if payload is not None:
+                try:
+                    entry = json.loads(payload)
+                except ValueError:
+                    logger.warning("Discarding invalid cached API token auth context")
+
+        if entry is None or entry.get("version") != self.get_version(entry.get("tenant_id", "")):
+            _lookups_counter.add(1, {"result": "miss"})
+            return None
+
+        if result == "hit_redis":
+            with self._local_lock:
+                local_cache[self.cache_key] = entry
+        _lookups_counter.add(1, {"result": result})
+        return ApiTokenAuthContext(
+            tenant_id=entry["tenant_id"],
+            app_id=entry["app_id"],
+            tenant=self._restore(Tenant, entry["tenant"]),
+            owner=self._restore(Account, entry["owner"]),
+            owner_role=entry["owner_role"],
+        )
+
+    def set(self, version: str, context: ApiTokenAuthContext) -> None:
+        """
+        Cache the authentication context of the token.
+
+        :param version: version read before the context was resolved
+        :param context: authentication context
+        """
+        entry = {
+            "version": version,
+            "tenant_id": context.tenant_id,
+            "app_id": context.app_id,
+            "tenant": self._snapshot(context.tenant),
+            "owner": self._snapshot(context.owner, exclude=_ACCOUNT_EXCLUDED_COLUMNS),
+            "owner_role": context.owner_role,
+        }
+        local_cache = self._get_local_cache()
+        with self._local_lock:
+            local_cache[self.cache_key] = entry
+        try:
+            redis_client.setex(self.cache_key, dify_config.API_TOKEN_AUTH_CACHE_TTL, json.dumps(entry))
+        except RedisError:
+            logger.warning("Failed to cache API token auth context")
+
+    @classmethod
+    def invalidate(cls, tenant_id: str) -> None:
+        """
+        Invalidate the cached authentication contexts of the tokens of a tenant in every process.
+
+        :param tenant_id: workspace id
+        """
+        if not cls.is_enabled():
+            return
+        try:
+            redis_client.incr(cls._version_key(tenant_id))
+        except RedisError:
+            logger.exception("Failed to invalidate API token auth contexts of tenant %s", tenant_id)
+
+    @classmethod
+    def clear_local(cls) -> None:
+        with cls._local_lock:
+            cls._local_cache = None
+
+    @classmethod
+    def _get_local_cache(cls) -> TTLCache:
+        if cls._local_cache is None:
+            with cls._local_lock:
+                if cls._local_cache is None:
+                    cls._local_cache = TTLCache(
+                        maxsize=dify_config.API_TOKEN_AUTH_CACHE_MAX_SIZE,
+                        ttl=dify_config.API_TOKEN_AUTH_CACHE_TTL,
+                    )
+        return cls._local_cache
+
+    @staticmethod
+    def _version_key(tenant_id: str) -> str:
+        return f"api_token_auth_version:tenant_id:{tenant_id}"
+
+    @staticmethod
+    def _snapshot(instance: Account | Tenant, exclude: frozenset[str] = frozenset()) -> dict[str, Any]:
+        snapshot = {}
+        mapper: Mapper[Any] = inspect(type(instance))
+        for attr in mapper.column_attrs:
+            if attr.key in exclude:
+                continue
+            value = getattr(instance, attr.key)
+            snapshot[attr.key] = value.isoformat() if isinstance(value, datetime.datetime) else value
+        return snapshot
+
+    @staticmethod
+    def _restore(model: type[_ModelT], snapshot: dict[str, Any]) -> _ModelT:
+        row = dict(snapshot)
+        mapper: Mapper[Any] = inspect(model)
+        for attr in mapper.column_attrs:
+            if row.get(attr.key) and isinstance(attr.columns[0].type, DateTime):
+                row[attr.key] = datetime.datetime.fromisoformat(row[attr.key])
+        instance = model(**row)
+        make_transient_to_detached(instance)
+        # attach to the current session without emitting any SQL
+        return db.session.merge(instance, load=False)
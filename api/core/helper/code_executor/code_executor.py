@@ -1,5 +1,5 @@
 import logging
-from collections.abc import Mapping
+from collections.abc import Mapping, Sequence
 from enum import StrEnum
 from threading import Lock
 from typing import Any, Optional
@@ -10,6 +10,7 @@ from yarl import URL
 
 from configs import dify_config
 from core.helper.code_executor.javascript.javascript_transformer import NodeJsTemplateTransformer
+from core.helper.code_executor.jinja2.jinja2_local_renderer import Jinja2LocalRenderer
 from core.helper.code_executor.jinja2.jinja2_transformer import Jinja2TemplateTransformer
 from core.helper.code_executor.python3.python3_transformer import Python3TemplateTransformer
 from core.helper.code_executor.template_transformer import TemplateTransformer
@@ -128,6 +129,11 @@ class CodeExecutor:
         :param inputs: inputs
         :return:
         """
+        if language == CodeLanguage.JINJA2 and dify_config.JINJA2_LOCAL_RENDER_ENABLED:
+            rendered = Jinja2LocalRenderer.render(code, inputs)
+            if rendered is not None:
+                return {"result": rendered}
+
         template_transformer = cls.code_template_transformers.get(language)
         if not template_transformer:
             raise CodeExecutionError(f"Unsupported language {language}")
@@ -140,3 +146,40 @@ class CodeExecutor:
             raise e
 
         return template_transformer.transform_response(response)
+
+    @classmethod
+    def supports_batch(cls, language: CodeLanguage) -> bool:
+        """
+        Check whether code of a language can be executed in batches
+        :param language: code language
+        :return:
+        """
+        template_transformer = cls.code_template_transformers.get(language)
+        return template_transformer is not None and template_transformer.supports_batch
+
+    @classmethod
+    def execute_workflow_code_template_batch(
+        cls, language: CodeLanguage, code: str, inputs_list: Sequence[Mapping[str, Any]]
+    ) -> list[Mapping[str, Any] | CodeExecutionError]:
+        """
+        Execute code once for each inputs in a single code execution request
+        :param language: code language
+        :param code: code
+        :param inputs_list: inputs of each execution
+        :return: result of each execution, or the error it raised
+        """
+        if not cls.supports_batch(language):
+            raise CodeExecutionError(f"Batch execution is not supported for language {language}")
+
+        template_transformer = cls.code_template_transformers[language]
+        runner, preload = template_transformer.transform_batch_caller(code, inputs_list)
+        response = cls.execute_code(language, preload, runner)
+
+        try:
+            outcomes = template_transformer.transform_batch_response(response, len(inputs_list))
+        except ValueError as e:
+            raise CodeExecutionError(str(e))
+
+        return [
+            CodeExecutionError(outcome["error"]) if "error" in outcome else outcome["result"] for outcome in outcomes
+        ]
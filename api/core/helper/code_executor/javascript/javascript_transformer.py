@@ -4,6 +4,8 @@ from core.helper.code_executor.template_transformer import TemplateTransformer
 
 
 class NodeJsTemplateTransformer(TemplateTransformer):
+    supports_batch = True
+
     @classmethod
     def get_runner_script(cls) -> str:
         runner_script = dedent(
@@ -24,3 +26,30 @@ class NodeJsTemplateTransformer(TemplateTransformer):
             """
         )
         return runner_script
+
+    @classmethod
+    def get_batch_runner_script(cls) -> str:
+        runner_script = dedent(
+            f"""
+            // declare main function
+            {cls._code_placeholder}
+
+            // decode and prepare the input object of each call
+            var inputs_list = JSON.parse(Buffer.from('{cls._inputs_placeholder}', 'base64').toString('utf-8'))
+
+            // execute main function for each input object, an error only fails its own call
+            var outcomes = inputs_list.map(function (inputs_obj) {{
+                try {{
+                    return {{ result: main(inputs_obj) }}
+                }} catch (e) {{
+                    return {{ error: String(e) }}
+                }}
+            }})
+
+            // convert outcomes to json and print
+            var output_json = JSON.stringify(outcomes)
+            var result = `<<RESULT>>${{output_json}}<<RESULT>>`
+            console.log(result)
+            """
+        )
+        return runner_script
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from typing import Any, Optional
+
+from cachetools import LRUCache
+from jinja2 import Template
+from jinja2.exceptions import SecurityError
+from jinja2.sandbox import MAX_RANGE, ImmutableSandboxedEnvironment
+
+from configs import dify_config
+from core.variables.utils import SegmentJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class _RenderLimitExceededError(Exception):
+    pass
+
+
+class _LimitedSandboxedEnvironment(ImmutableSandboxedEnvironment):
+    """
+    Sandboxed environment whose templates stop rendering once the deadline of the current thread is passed.
+
+    The deadline is checked on every call made by a template and on every step of `range` loops, on top
+    of every output chunk, so most templates looping without producing any output are stopped too.
+    """
+
+    _state = threading.local()
+
+    def unsafe_undefined(self, obj: Any, attribute: str):  # type: ignore[override]
+        # the sandbox renders unsafe attributes, they must not silently render as empty strings here
+        raise SecurityError(f"access to attribute {attribute!r} of {type(obj).__name__!r} object is unsafe")
+
+    def call(self, context, obj, /, *args, **kwargs):  # type: ignore[override]
+        self.check_deadline()
+        return super().call(context, obj, *args, **kwargs)
+
+    @classmethod
+    def check_deadline(cls) -> None:
+        deadline = getattr(cls._state, "deadline", None)
+        if deadline is not None and time.monotonic() > deadline:
+            raise _RenderLimitExceededError("template rendering timed out")
+
+    @classmethod
+    def set_deadline(cls, deadline: Optional[float]) -> None:
+        cls._state.deadline = deadline
+
+
+def _limited_range(*args: int) -> Iterator[int]:
+    numbers = range(*args)
+    if len(numbers) > MAX_RANGE:
+        raise _RenderLimitExceededError(f"range of {len(numbers)} items exceeds {MAX_RANGE}")
+    for number in numbers:
+        _LimitedSandboxedEnvironment.check_deadline()
+        yield number
+
+
+class Jinja2LocalRenderer:
+    """
+    In-process renderer of Jinja2 templates, used instead of the code execution sandbox when
+    `JINJA2_LOCAL_RENDER_ENABLED` is set.
+
+    Templates are rendered by an immutable sandboxed environment with time and output limits, and
+    compiled templates are cached by the hash of their source. `render` returns None whenever a template
+    can not be rendered locally with the same result as the sandbox: templates that are too long, rely
+    on Python string escapes, hit a limit, are rejected by the sandboxed environment or fail to render.
+    The caller must then render them in the code execution sandbox.
+    """
+
+    _environment = _LimitedSandboxedEnvironment()
+    _environment.globals["range"] = _limited_range
+    _templates: Optional[LRUCache] = None
+    _templates_lock = threading.Lock()
+
+    @classmethod
+    def render(cls, template: str, inputs: Mapping[str, Any]) -> Optional[str]:
+        """
+        Render a template locally.
+
+        :param template: template
+        :param inputs: inputs
+        :return: rendered template, None if it must be rendered in the sandbox
+        """
+        if len(template) > dify_config.JINJA2_LOCAL_RENDER_MAX_TEMPLATE_LENGTH:
+            return None
+        # the sandbox embeds templates in a triple-quoted Python string literal, escapes would be interpreted
+        if "\\" in template or "'''" in template:
+            return None
+
+        try:
+            compiled = cls._get_template(template)
+            # inputs reach the sandbox as JSON, they must have the same types here
+            variables = json.loads(json.dumps(inputs, ensure_ascii=False, cls=SegmentJSONEncoder))
+            return cls._render_with_limits(compiled, variables)
+        except _RenderLimitExceededError as e:
+            logger.info("Rendering Jinja2 template in the sandbox: %s", e)
+        except Exception:
+            logger.debug("Failed to render Jinja2 template locally, rendering it in the sandbox", exc_info=True)
+        return None
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._templates_lock:
+            cls._templates = None
+
+    @classmethod
+    def _get_template(cls, template: str) -> Template:
+        key = hashlib.sha256(template.encode("utf-8")).hexdigest()
+        with cls._templates_lock:
+            if cls._templates is None:
+                cls._templates = LRUCache(maxsize=dify_config.JINJA2_LOCAL_RENDER_CACHE_SIZE)
+            compiled = cls._templates.get(key)
+        if compiled is None:
+            compiled = cls._environment.from_string(template)
+            with cls._templates_lock:
+                if cls._templates is not None:
+                    cls._templates[key] = compiled
+        return compiled
+
+    @classmethod
+    def _render_with_limits(cls, compiled: Template, variables: dict[str, Any]) -> str:
+        max_output_length = dify_config.JINJA2_LOCAL_RENDER_MAX_OUTPUT_LENGTH
+        _LimitedSandboxedEnvironment.set_deadline(time.monotonic() + dify_config.JINJA2_LOCAL_RENDER_TIMEOUT)
+        try:
+            chunks = []
+            output_length = 0
+            for chunk in compiled.generate(**variables):
+                output_length += len(chunk)
+                if output_length > max_output_length:
+                    raise _RenderLimitExceededError(f"output exceeds {max_output_length} characters")
+                _LimitedSandboxedEnvironment.check_deadline()
+                chunks.append(chunk)
+        finally:
+            _LimitedSandboxedEnvironment.set_deadline(None)
+        return "".join(chunks)
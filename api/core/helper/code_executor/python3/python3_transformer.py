@@ -4,6 +4,8 @@ from core.helper.code_executor.template_transformer import TemplateTransformer
 
 
 class Python3TemplateTransformer(TemplateTransformer):
+    supports_batch = True
+
     @classmethod
     def get_runner_script(cls) -> str:
         runner_script = dedent(f"""
@@ -25,3 +27,30 @@ class Python3TemplateTransformer(TemplateTransformer):
             print(result)
             """)
         return runner_script
+
+    @classmethod
+    def get_batch_runner_script(cls) -> str:
+        runner_script = dedent(f"""
+            # declare main function
+            {cls._code_placeholder}
+
+            import json
+            from base64 import b64decode
+
+            # decode and prepare the input dict of each call
+            inputs_list = json.loads(b64decode('{cls._inputs_placeholder}').decode('utf-8'))
+
+            # execute main function for each input dict, an error only fails its own call
+            outcomes = []
+            for inputs_obj in inputs_list:
+                try:
+                    outcomes.append(json.dumps({{"result": main(**inputs_obj)}}))
+                except Exception as e:
+                    outcomes.append(json.dumps({{"error": f"{{type(e).__name__}}: {{e}}"}}))
+
+            # convert outcomes to json and print
+            output_json = "[" + ",".join(outcomes) + "]"
+            result = f'''<<RESULT>>{{output_json}}<<RESULT>>'''
+            print(result)
+            """)
+        return runner_script
@@ -2,8 +2,8 @@ import json
 import re
 from abc import ABC, abstractmethod
 from base64 import b64encode
-from collections.abc import Mapping
-from typing import Any
+from collections.abc import Mapping, Sequence
+from typing import Any, cast
 
 from core.variables.utils import SegmentJSONEncoder
 
@@ -12,6 +12,15 @@ class TemplateTransformer(ABC):
     _code_placeholder: str = "{{code}}"
     _inputs_placeholder: str = "{{inputs}}"
     _result_tag: str = "<<RESULT>>"
+    # whether the transformer has a batch runner script, callers check it before taking the batch path
+    supports_batch: bool = False
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # fail when the transformer is defined rather than sending a broken script to the sandbox
+        implementer = next(base for base in cls.__mro__ if "get_batch_runner_script" in vars(base))
+        if cls.supports_batch and implementer is TemplateTransformer:
+            raise TypeError(f"{cls.__name__} supports batch execution but does not implement get_batch_runner_script")
 
     @classmethod
     def transform_caller(cls, code: str, inputs: Mapping[str, Any]) -> tuple[str, str]:
@@ -52,6 +61,58 @@ class TemplateTransformer(ABC):
         except Exception as e:
             raise ValueError(f"Unexpected error during response transformation: {str(e)}")
 
+        return cls._validate_result(result)
+
+    @classmethod
+    def transform_batch_caller(cls, code: str, inputs_list: Sequence[Mapping[str, Any]]) -> tuple[str, str]:
+        """
+        Transform code to a runner calling it once for each inputs
+        :param code: code
+        :param inputs_list: inputs of each call
+        :return: runner, preload
+        """
+        if not cls.supports_batch:
+            raise ValueError(f"{cls.__name__} does not support batch execution")
+
+        script = cls.get_batch_runner_script()
+        script = script.replace(cls._code_placeholder, code)
+        script = script.replace(cls._inputs_placeholder, cls.serialize_inputs(inputs_list))
+
+        return script, cls.get_preload_script()
+
+    @classmethod
+    def transform_batch_response(cls, response: str, count: int) -> list[Mapping[str, Any]]:
+        """
+        Transform response of a batch runner to the outcome of each call
+        :param response: response
+        :param count: number of calls
+        :return: outcome of each call, either {"result": result} or {"error": error message}
+        """
+        try:
+            outcomes = json.loads(cls.extract_result_str_from_response(response))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse JSON response: {str(e)}.")
+
+        if (
+            not isinstance(outcomes, list)
+            or len(outcomes) != count
+            or not all(isinstance(outcome, dict) for outcome in outcomes)
+        ):
+            raise ValueError(f"Batch result must be a list of {count} outcomes")
+
+        transformed: list[Mapping[str, Any]] = []
+        for outcome in outcomes:
+            if "error" in outcome:
+                transformed.append({"error": str(outcome["error"])})
+                continue
+            try:
+                transformed.append({"result": cls._validate_result(outcome.get("result"))})
+            except ValueError as e:
+                transformed.append({"error": str(e)})
+        return transformed
+
+    @classmethod
+    def _validate_result(cls, result: Any) -> Mapping[str, Any]:
         if not isinstance(result, dict):
             raise ValueError(f"Result must be a dict, got {type(result).__name__}")
         if not all(isinstance(k, str) for k in result):
@@ -59,7 +120,7 @@ class TemplateTransformer(ABC):
 
         # Post-process the result to convert scientific notation strings back to numbers
         result = cls._post_process_result(result)
-        return result
+        return cast(Mapping[str, Any], result)
 
     @classmethod
     def _post_process_result(cls, result: dict[Any, Any]) -> dict[Any, Any]:
@@ -92,7 +153,16 @@ class TemplateTransformer(ABC):
         pass
 
     @classmethod
-    def serialize_inputs(cls, inputs: Mapping[str, Any]) -> str:
+    def get_batch_runner_script(cls) -> str:
+        """
+        Get runner script calling the main function once for each inputs of a list, printing the list of
+        outcomes as {"result": output} or {"error": error message}.
+        Implemented by the transformers setting `supports_batch`.
+        """
+        raise NotImplementedError(f"{cls.__name__} does not support batch execution")
+
+    @classmethod
+    def serialize_inputs(cls, inputs: Mapping[str, Any] | Sequence[Mapping[str, Any]]) -> str:
         inputs_json_str = json.dumps(inputs, ensure_ascii=False, cls=SegmentJSONEncoder).encode()
         input_base64_encoded = b64encode(inputs_json_str).decode("utf-8")
         return input_base64_encoded
@@ -0,0 +1,163 @@
+import json
+import logging
+import threading
+from typing import Optional
+
+from cachetools import TTLCache
+from pydantic import ValidationError
+from redis import RedisError
+
+from configs import dify_config
+from core.entities.provider_configuration import (
+    ProviderConfiguration,
+    ProviderConfigurations,
+    original_provider_configurate_methods,
+)
+from core.model_runtime.entities.provider_entities import ConfigurateMethod
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderConfigurationsCache:
+    """
+    Versioned per-tenant cache of the provider configurations assembled by `ProviderManager`.
+
+    Entries are stored in a process-local tier and in Redis under the current version of the tenant.
+    `invalidate` bumps the version, so every process misses on its next read and old entries expire.
+    Any change to the provider, credential, model setting or load balancing records of a tenant must
+    call `invalidate` once committed.
+    """
+
+    _local_cache: Optional[TTLCache] = None
+    _local_lock = threading.Lock()
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self.version_key = f"provider_configurations_version:tenant_id:{tenant_id}"
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.PROVIDER_CONFIGURATIONS_CACHE_ENABLED
+
+    def get_version(self) -> Optional[str]:
+        """
+        Get the current version of the cached configurations of the tenant.
+
+        :return: version, None if it could not be read and the cache must be bypassed
+        """
+        try:
+            version = redis_client.get(self.version_key)
+        except RedisError:
+            logger.warning("Failed to read provider configurations version of tenant %s", self.tenant_id)
+            return None
+        return version.decode("utf-8") if version else "0"
+
+    def get(self, version: str) -> Optional[ProviderConfigurations]:
+        """
+        Get the cached configurations of the tenant.
+
+        :param version: version returned by `get_version`
+        :return: a fresh copy of the cached configurations, None on miss
+        """
+        local_cache = self._get_local_cache()
+        local_key = (self.tenant_id, version)
+        payload = None
+        if local_cache is not None:
+            with self._local_lock:
+                payload = local_cache.get(local_key)
+
+        if payload is None:
+            try:
+                payload = redis_client.get(self._data_key(version))
+            except RedisError:
+                logger.warning("Failed to read cached provider configurations of tenant %s", self.tenant_id)
+                return None
+            if payload is None:
+                return None
+            if local_cache is not None:
+                with self._local_lock:
+                    local_cache[local_key] = payload
+
+        try:
+            cached = json.loads(payload)
+            # `ProviderConfiguration.__init__` amends the configurate methods of providers based on the
+            # methods they originally declared, which must be known before the configurations are restored
+            for provider, configurate_methods in cached["original_configurate_methods"].items():
+                original_provider_configurate_methods.setdefault(
+                    provider, [ConfigurateMethod(method) for method in configurate_methods]
+                )
+            configurations = ProviderConfigurations(tenant_id=self.tenant_id)
+            for provider, configuration in cached["configurations"].items():
+                configurations[provider] = ProviderConfiguration.model_validate(configuration)
+        except (ValueError, KeyError, ValidationError):
+            logger.warning("Discarding invalid cached provider configurations of tenant %s", self.tenant_id)
+            return None
+
+        return configurations
+
+    def set(self, version: str, configurations: ProviderConfigurations) -> None:
+        """
+        Cache the configurations of the tenant.
+
+        :param version: version read before the configurations were assembled, so configurations assembled
+            while an invalidation happened are stored under a version that is never read again
+        :param configurations: provider configurations
+        """
+        payload = json.dumps(
+            {
+                "configurations": {
+                    provider: configuration.model_dump(mode="json")
+                    for provider, configuration in configurations.configurations.items()
+                },
+                "original_configurate_methods": {
+                    provider: [method.value for method in original_provider_configurate_methods[provider]]
+                    for provider in {configuration.provider.provider for configuration in configurations.values()}
+                    if provider in original_provider_configurate_methods
+                },
+            }
+        )
+
+        local_cache = self._get_local_cache()
+        if local_cache is not None:
+            with self._local_lock:
+                local_cache[(self.tenant_id, version)] = payload.encode("utf-8")
+        try:
+            redis_client.setex(self._data_key(version), dify_config.PROVIDER_CONFIGURATIONS_CACHE_TTL, payload)
+        except RedisError:
+            logger.warning("Failed to cache provider configurations of tenant %s", self.tenant_id)
+
+    @classmethod
+    def invalidate(cls, tenant_id: str) -> None:
+        """
+        Invalidate the cached configurations of a tenant in every process.
+
+        :param tenant_id: workspace id
+        """
+        if not cls.is_enabled():
+            return
+        try:
+            redis_client.incr(cls(tenant_id).version_key)
+        except RedisError:
+            logger.exception("Failed to invalidate cached provider configurations of tenant %s", tenant_id)
+
+    @classmethod
+    def clear_local(cls) -> None:
+        with cls._local_lock:
+            cls._local_cache = None
+
+    @classmethod
+    def _get_local_cache(cls) -> Optional[TTLCache]:
+        if dify_config.PROVIDER_CONFIGURATIONS_CACHE_LOCAL_MAX_SIZE <= 0:
+            return None
+        if cls._local_cache is None:
+            with cls._local_lock:
+                if cls._local_cache is None:
+                    cls._local_cache = TTLCache(
+                        maxsize=dify_config.PROVIDER_CONFIGURATIONS_CACHE_LOCAL_MAX_SIZE,
+                        ttl=dify_config.PROVIDER_CONFIGURATIONS_CACHE_TTL,
+                    )
+        return cls._local_cache
+
+    def _data_key(self, version: str) -> str:
+        return f"provider_configurations:tenant_id:{self.tenant_id}:version:{version}"
@@ -2,8 +2,17 @@
 Proxy requests to avoid SSRF
 """
 
+import asyncio
+import importlib.util
 import logging
+import os
+import threading
 import time
+import weakref
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Optional
 
 import httpx
 
@@ -34,7 +43,121 @@ class MaxRetriesExceededError(ValueError):
     pass
 
 
-def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+_ProxyKey = tuple[Optional[str], Optional[str], Optional[str]]
+
+_ClientKey = tuple[_ProxyKey, bool]
+
+# pooled clients, async clients are bound to the event loop they were created in
+_clients: dict[_ClientKey, httpx.Client] = {}
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[_ClientKey, httpx.AsyncClient]] = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def _proxy_key() -> _ProxyKey:
+    if dify_config.SSRF_PROXY_ALL_URL:
+        return dify_config.SSRF_PROXY_ALL_URL, None, None
+    if dify_config.SSRF_PROXY_HTTP_URL and dify_config.SSRF_PROXY_HTTPS_URL:
+        return None, dify_config.SSRF_PROXY_HTTP_URL, dify_config.SSRF_PROXY_HTTPS_URL
+    return None, None, None
+
+
+def _client_options(ssl_verify: bool) -> dict:
+    http2 = dify_config.SSRF_POOL_HTTP2_ENABLED
+    if http2 and importlib.util.find_spec("h2") is None:
+        logging.warning("SSRF_POOL_HTTP2_ENABLED is set but the h2 package is not installed, using HTTP/1.1")
+        http2 = False
+    return {
+        "verify": ssl_verify,
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=dify_config.SSRF_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=dify_config.SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=dify_config.SSRF_POOL_KEEPALIVE_EXPIRY,
+        ),
+        # clients are shared by every caller of the process, they must never keep cookies between requests
+        "cookies": CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    }
+
+
+def _build_client(proxy_key: _ProxyKey, ssl_verify: bool) -> httpx.Client:
+    all_url, http_url, https_url = proxy_key
+    options = _client_options(ssl_verify)
+    if all_url:
+        return httpx.Client(proxy=all_url, **options)
+    if http_url and https_url:
+        transport_options = {key: options[key] for key in ("verify", "http2", "limits")}
+        proxy_mounts = {
+            "http://": httpx.HTTPTransport(proxy=http_url, **transport_options),
+            "https://": httpx.HTTPTransport(proxy=https_url, **transport_options),
+        }
+        return httpx.Client(mounts=proxy_mounts, **options)
+    return httpx.Client(**options)
+
+
+def _build_async_client(proxy_key: _ProxyKey, ssl_verify: bool) -> httpx.AsyncClient:
+    all_url, http_url, https_url = proxy_key
+    options = _client_options(ssl_verify)
+    if all_url:
+        return httpx.AsyncClient(proxy=all_url, **options)
+    if http_url and https_url:
+        transport_options = {key: options[key] for key in ("verify", "http2", "limits")}
+        proxy_mounts = {
+            "http://": httpx.AsyncHTTPTransport(proxy=http_url, **transport_options),
+            "https://": httpx.AsyncHTTPTransport(proxy=https_url, **transport_options),
+        }
+        return httpx.AsyncClient(mounts=proxy_mounts, **options)
+    return httpx.AsyncClient(**options)
+
+
+def get_client(ssl_verify: bool = HTTP_REQUEST_NODE_SSL_VERIFY) -> httpx.Client:
+    """
+    Get the pooled client of this process for the current SSRF proxy settings.
+
+    :param ssl_verify: whether to verify the SSL certificates of the servers
+    :return: a shared client, it must not be closed by the caller
+    """
+    key = (_proxy_key(), ssl_verify)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _build_client(*key)
+    return client
+
+
+def get_async_client(ssl_verify: bool = HTTP_REQUEST_NODE_SSL_VERIFY) -> httpx.AsyncClient:
+    """
+    Get the pooled async client of the running event loop for the current SSRF proxy settings.
+
+    :param ssl_verify: whether to verify the SSL certificates of the servers
+    :return: a shared client, it must not be closed by the caller
+    """
+    loop = asyncio.get_running_loop()
+    key = (_proxy_key(), ssl_verify)
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            client = loop_clients[key] = _build_async_client(*key)
+    return client
+
+
+def _reset_clients() -> None:
+    # connections of the parent process must not be shared with forked workers
+    global _clients_lock
+    _clients_lock = threading.Lock()
+    _clients.clear()
+    _async_clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients)
+
+
+def _prepare_request_kwargs(kwargs: dict) -> bool:
     if "allow_redirects" in kwargs:
         allow_redirects = kwargs.pop("allow_redirects")
         if "follow_redirects" not in kwargs:
@@ -48,27 +171,16 @@ def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
             write=dify_config.SSRF_DEFAULT_WRITE_TIME_OUT,
         )
 
-    if "ssl_verify" not in kwargs:
-        kwargs["ssl_verify"] = HTTP_REQUEST_NODE_SSL_VERIFY
+    return bool(kwargs.pop("ssl_verify", HTTP_REQUEST_NODE_SSL_VERIFY))
 
-    ssl_verify = kwargs.pop("ssl_verify")
+
+def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+    ssl_verify = _prepare_request_kwargs(kwargs)
 
     retries = 0
     while retries <= max_retries:
         try:
-            if dify_config.SSRF_PROXY_ALL_URL:
-                with httpx.Client(proxy=dify_config.SSRF_PROXY_ALL_URL, verify=ssl_verify) as client:
-                    response = client.request(method=method, url=url, **kwargs)
-            elif dify_config.SSRF_PROXY_HTTP_URL and dify_config.SSRF_PROXY_HTTPS_URL:
-                proxy_mounts = {
-                    "http://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTP_URL, verify=ssl_verify),
-                    "https://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTPS_URL, verify=ssl_verify),
-                }
-                with httpx.Client(mounts=proxy_mounts, verify=ssl_verify) as client:
-                    response = client.request(method=method, url=url, **kwargs)
-            else:
-                with httpx.Client(verify=ssl_verify) as client:
-                    response = client.request(method=method, url=url, **kwargs)
+            response = get_client(ssl_verify).request(method=method, url=url, **kwargs)
 
             if response.status_code not in STATUS_FORCELIST:
                 return response
@@ -88,6 +200,32 @@ def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}")
 
 
+async def make_request_async(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+    ssl_verify = _prepare_request_kwargs(kwargs)
+
+    retries = 0
+    while retries <= max_retries:
+        try:
+            response = await get_async_client(ssl_verify).request(method=method, url=url, **kwargs)
+
+            if response.status_code not in STATUS_FORCELIST:
+                return response
+            else:
+                logging.warning(
+                    "Received status code %s for URL %s which is in the force list", response.status_code, url
+                )
+
+        except httpx.RequestError as e:
+            logging.warning("Request to URL %s failed on attempt %s: %s", url, retries + 1, e)
+            if max_retries == 0:
+                raise
+
+        retries += 1
+        if retries <= max_retries:
+            await asyncio.sleep(BACKOFF_FACTOR * (2 ** (retries - 1)))
+    raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}")
+
+
 def get(url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     return make_request("GET", url, max_retries=max_retries, **kwargs)
 
@@ -110,3 +248,17 @@ def delete(url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
 
 def head(url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     return make_request("HEAD", url, max_retries=max_retries, **kwargs)
+
+
+@contextmanager
+def stream(method, url, **kwargs) -> Iterator[httpx.Response]:
+    """
+    Send a request and stream the body of its response, which is not retried.
+
+    :param method: HTTP method
+    :param url: URL
+    :return: response whose body is read while the context is open
+    """
+    ssl_verify = _prepare_request_kwargs(kwargs)
+    with get_client(ssl_verify).stream(method=method, url=url, **kwargs) as response:
+        yield response
@@ -1,8 +1,11 @@
+from collections import defaultdict
 from collections.abc import Sequence
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import Row, and_, literal_column, or_, select
+from sqlalchemy.orm import aliased
 
+from constants import UUID_NIL
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
 from core.file import file_manager
 from core.model_manager import ModelInstance
@@ -15,14 +18,16 @@ from core.model_runtime.entities import (
     UserPromptMessage,
 )
 from core.model_runtime.entities.message_entities import PromptMessageContentUnionTypes
-from core.prompt.utils.extract_thread_messages import extract_thread_messages
 from extensions.ext_database import db
 from factories import file_factory
-from models.model import AppMode, Conversation, Message, MessageFile
+from models.model import App, AppMode, Conversation, Message, MessageFile
 from models.workflow import Workflow, WorkflowRun
 
 
 class TokenBufferMemory:
+    # number of messages of the first page fetched from the thread, each next page is twice as large
+    _FIRST_PAGE_SIZE = 20
+
     def __init__(
         self,
         conversation: Conversation,
@@ -41,33 +46,136 @@ class TokenBufferMemory:
         """
         app_record = self.conversation.app
 
-        # fetch limited messages, and return reversed
-        stmt = (
-            select(Message).where(Message.conversation_id == self.conversation.id).order_by(Message.created_at.desc())
-        )
-
         if message_limit and message_limit > 0:
             message_limit = min(message_limit, 500)
         else:
             message_limit = 500
 
-        stmt = stmt.limit(message_limit)
+        # instead of all messages from the conversation, we only need the messages
+        # that belong to the thread of last message, newest first
+        thread_message_ids = self._get_thread_message_ids(message_limit)
+
+        # fetch the thread by pages of growing size, older messages are only fetched
+        # while the newer ones fit in the token limit, as they would be pruned anyway
+        prompt_messages: list[PromptMessage] = []
+        curr_message_tokens = 0
+        offset = 0
+        page_size = self._FIRST_PAGE_SIZE
+        while offset < len(thread_message_ids):
+            messages = self._get_messages(thread_message_ids[offset : offset + page_size])
+            # for newly created message, its answer is temporarily empty, we don't need to add it to memory
+            if offset == 0 and messages and not messages[0].answer and messages[0].answer_tokens == 0:
+                messages.pop(0)
+            offset += page_size
+            page_size *= 2
+
+            prompt_messages = self._build_prompt_messages(list(reversed(messages)), app_record) + prompt_messages
+            if not prompt_messages:
+                continue
+
+            curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+            if curr_message_tokens > max_token_limit:
+                break
+
+        if not prompt_messages:
+            return []
+
+        # prune the chat message if it exceeds the max token limit
+        if curr_message_tokens > max_token_limit:
+            pruned_memory = []
+            while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
+                pruned_memory.append(prompt_messages.pop(0))
+                curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+
+        return prompt_messages
+
+    def _get_thread_message_ids(self, limit: int) -> list[str]:
+        """
+        Get the ids of the messages of the thread of the last message, newest first, following
+        `parent_message_id` from the last message in a recursive query.
+        :param limit: max number of messages
+        """
+        conversation_id = self.conversation.id
+        last_message_id = (
+            select(Message.id)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.created_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        thread = (
+            select(Message.id, Message.parent_message_id, Message.created_at, literal_column("1").label("depth"))
+            .where(Message.id == last_message_id)
+            .cte("thread", recursive=True)
+        )
+
+        parent_message = aliased(Message)
+        previous_message = aliased(Message)
+        # messages created before threads were supported have UUID_NIL as parent,
+        # their parent is the message created right before them
+        previous_message_id = (
+            select(previous_message.id)
+            .where(
+                previous_message.conversation_id == conversation_id,
+                previous_message.created_at < thread.c.created_at,
+            )
+            .order_by(previous_message.created_at.desc())
+            .limit(1)
+            .correlate(thread)
+            .scalar_subquery()
+        )
+        thread = thread.union_all(
+            select(
+                parent_message.id,
+                parent_message.parent_message_id,
+                parent_message.created_at,
+                (thread.c.depth + 1).label("depth"),
+            )
+            .join(
+                thread,
+                or_(
+                    and_(thread.c.parent_message_id != UUID_NIL, parent_message.id == thread.c.parent_message_id),
+                    and_(thread.c.parent_message_id == UUID_NIL, parent_message.id == previous_message_id),
+                ),
+            )
+            .where(parent_message.conversation_id == conversation_id, thread.c.depth < limit)
+        )
 
-        messages = db.session.scalars(stmt).all()
+        stmt = select(thread.c.id).order_by(thread.c.depth)
+        return list(db.session.scalars(stmt).all())
 
-        # instead of all messages from the conversation, we only need to extract messages
-        # that belong to the thread of last message
-        thread_messages = extract_thread_messages(messages)
+    @staticmethod
+    def _get_messages(message_ids: Sequence[str]) -> list[Row]:
+        """
+        Get the columns of messages needed by the memory, in the order of the given ids.
+        :param message_ids: message ids
+        """
+        if not message_ids:
+            return []
+        stmt = select(Message.id, Message.query, Message.answer, Message.answer_tokens, Message.workflow_run_id).where(
+            Message.id.in_(message_ids)
+        )
+        messages = {message.id: message for message in db.session.execute(stmt)}
+        return [messages[message_id] for message_id in message_ids if message_id in messages]
 
-        # for newly created message, its answer is temporarily empty, we don't need to add it to memory
-        if thread_messages and not thread_messages[0].answer and thread_messages[0].answer_tokens == 0:
-            thread_messages.pop(0)
+    def _build_prompt_messages(self, messages: Sequence[Row], app_record: Optional[App]) -> list[PromptMessage]:
+        """
+        Build the prompt messages of messages, oldest first.
+        :param messages: messages
+        :param app_record: app of the conversation
+        """
+        if not messages:
+            return []
 
-        messages = list(reversed(thread_messages))
+        message_files: dict[str, list[MessageFile]] = defaultdict(list)
+        for message_file in db.session.scalars(
+            select(MessageFile).where(MessageFile.message_id.in_([message.id for message in messages]))
+        ):
+            message_files[message_file.message_id].append(message_file)
 
         prompt_messages: list[PromptMessage] = []
         for message in messages:
-            files = db.session.query(MessageFile).where(MessageFile.message_id == message.id).all()
+            files = message_files.get(message.id)
             if files:
                 file_extra_config = None
                 if self.conversation.mode in {AppMode.AGENT_CHAT, AppMode.COMPLETION, AppMode.CHAT}:
@@ -114,18 +222,6 @@ class TokenBufferMemory:
 
             prompt_messages.append(AssistantPromptMessage(content=message.answer))
 
-        if not prompt_messages:
-            return []
-
-        # prune the chat message if it exceeds the max token limit
-        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
-
-        if curr_message_tokens > max_token_limit:
-            pruned_memory = []
-            while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
-                pruned_memory.append(prompt_messages.pop(0))
-                curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
-
         return prompt_messages
 
     def get_history_prompt_text(
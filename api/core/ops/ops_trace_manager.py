@@ -1,3 +1,4 @@
+import atexit
 import json
 import logging
 import os
@@ -10,12 +11,15 @@ from uuid import UUID, uuid4
 
 from cachetools import LRUCache
 from flask import current_app
+from opentelemetry.metrics import get_meter
+from pydantic import TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from configs import dify_config
 from core.helper.encrypter import decrypt_token, encrypt_token, obfuscated_token
 from core.ops.entities.config_entity import (
-    OPS_FILE_PATH,
+    OPS_BATCH_FILE_PATH,
     TracingProviderEnum,
 )
 from core.ops.entities.trace_entity import (
@@ -35,7 +39,7 @@ from extensions.ext_database import db
 from extensions.ext_storage import storage
 from models.model import App, AppModelConfig, Conversation, Message, MessageFile, TraceAppConfig
 from models.workflow import WorkflowAppLog, WorkflowRun
-from tasks.ops_trace_task import process_trace_tasks
+from tasks.ops_trace_task import process_trace_task_batch
 
 
 class OpsTraceProviderConfigMap(dict[str, dict[str, Any]]):
@@ -826,75 +830,157 @@ class TraceTask:
         return generate_name_trace_info
 
 
-trace_manager_timer: Optional[threading.Timer] = None
-trace_manager_queue: queue.Queue = queue.Queue()
-trace_manager_interval = int(os.getenv("TRACE_QUEUE_MANAGER_INTERVAL", 5))
-trace_manager_batch_size = int(os.getenv("TRACE_QUEUE_MANAGER_BATCH_SIZE", 100))
+trace_manager_interval = dify_config.TRACE_QUEUE_MANAGER_INTERVAL
+trace_manager_batch_size = dify_config.TRACE_QUEUE_MANAGER_BATCH_SIZE
+trace_manager_max_size = dify_config.TRACE_QUEUE_MANAGER_MAX_SIZE
+trace_manager_queue: queue.Queue = queue.Queue(maxsize=trace_manager_max_size)
+trace_manager_worker: Optional[threading.Thread] = None
+trace_manager_worker_lock = threading.Lock()
+trace_manager_flush_registered = False
+# seconds between two warnings about dropped trace tasks
+TRACE_DROP_WARNING_INTERVAL = 60
+_last_drop_warning_at = 0.0
+
+_task_data_list_adapter = TypeAdapter(list[TaskData])
+
+_trace_meter = get_meter("ops_trace_metrics")
+_trace_tasks_counter = _trace_meter.create_counter(
+    "ops_trace.tasks",
+    description="Number of trace tasks by outcome: queued, dropped when the queue is full, exported or failed",
+    unit="{task}",
+)
+_trace_batches_counter = _trace_meter.create_counter(
+    "ops_trace.batches",
+    description="Number of trace batches dispatched to Celery",
+    unit="{batch}",
+)
 
 
 class TraceQueueManager:
-    def __init__(self, app_id=None, user_id=None):
-        global trace_manager_timer
+    """
+    Process-wide queue of trace tasks exported in batches.
 
+    A single worker thread collects up to TRACE_QUEUE_MANAGER_BATCH_SIZE tasks, or whatever arrived within
+    TRACE_QUEUE_MANAGER_INTERVAL seconds, executes them and stores the whole batch as one storage object
+    handled by one Celery task. The queue holds at most TRACE_QUEUE_MANAGER_MAX_SIZE tasks, new tasks are
+    dropped and counted once it is full so a slow exporter never blocks or exhausts the app.
+    """
+
+    def __init__(self, app_id=None, user_id=None):
         self.app_id = app_id
         self.user_id = user_id
         self.trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
         self.flask_app = current_app._get_current_object()  # type: ignore
-        if trace_manager_timer is None:
-            self.start_timer()
+        self.start_worker()
 
     def add_trace_task(self, trace_task: TraceTask):
-        global trace_manager_timer, trace_manager_queue
         try:
             if self.trace_instance:
                 trace_task.app_id = self.app_id
-                trace_manager_queue.put(trace_task)
+                trace_manager_queue.put_nowait(trace_task)
+                _trace_tasks_counter.add(1, {"status": "queued"})
+        except queue.Full:
+            _trace_tasks_counter.add(1, {"status": "dropped"})
+            self._warn_dropped(trace_task)
         except Exception as e:
             logging.exception("Error adding trace task, trace_type %s", trace_task.trace_type)
-        finally:
-            self.start_timer()
 
-    def collect_tasks(self):
-        global trace_manager_queue
+    @staticmethod
+    def _warn_dropped(trace_task: TraceTask):
+        global _last_drop_warning_at
+        now = time.monotonic()
+        if now - _last_drop_warning_at >= TRACE_DROP_WARNING_INTERVAL:
+            _last_drop_warning_at = now
+            logging.warning(
+                "Trace queue is full (%s tasks), dropping trace tasks, trace_type %s",
+                trace_manager_max_size,
+                trace_task.trace_type,
+            )
+
+    def collect_tasks(self, timeout: Optional[float] = None) -> list[TraceTask]:
+        """
+        Collect a batch of trace tasks.
+
+        :param timeout: seconds to wait for the first task, and then for the batch to fill up.
+            If None, only the tasks already queued are collected.
+        :return: up to `trace_manager_batch_size` tasks
+        """
         tasks: list[TraceTask] = []
-        while len(tasks) < trace_manager_batch_size and not trace_manager_queue.empty():
-            task = trace_manager_queue.get_nowait()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while len(tasks) < trace_manager_batch_size:
+            try:
+                if deadline is None:
+                    task = trace_manager_queue.get_nowait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    task = trace_manager_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
             tasks.append(task)
             trace_manager_queue.task_done()
         return tasks
 
-    def run(self):
+    def run(self, timeout: Optional[float] = None):
         try:
-            tasks = self.collect_tasks()
+            tasks = self.collect_tasks(timeout)
             if tasks:
                 self.send_to_celery(tasks)
         except Exception as e:
             logging.exception("Error processing trace tasks")
 
-    def start_timer(self):
-        global trace_manager_timer
-        if trace_manager_timer is None or not trace_manager_timer.is_alive():
-            trace_manager_timer = threading.Timer(trace_manager_interval, self.run)
-            trace_manager_timer.name = f"trace_manager_timer_{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())}"
-            trace_manager_timer.daemon = False
-            trace_manager_timer.start()
+    def start_worker(self):
+        global trace_manager_worker, trace_manager_flush_registered
+        if trace_manager_worker is not None and trace_manager_worker.is_alive():
+            return
+        with trace_manager_worker_lock:
+            if trace_manager_worker is not None and trace_manager_worker.is_alive():
+                return
+            trace_manager_worker = threading.Thread(target=self._run_worker, name="trace_manager_worker", daemon=True)
+            trace_manager_worker.start()
+            if not trace_manager_flush_registered:
+                # the worker is a daemon thread, export what is left in the queue when the process exits
+                atexit.register(self.flush)
+                trace_manager_flush_registered = True
+
+    def _run_worker(self):
+        while True:
+            self.run(timeout=trace_manager_interval)
+
+    def flush(self):
+        """
+        Export all queued trace tasks, e.g. before the process exits.
+        """
+        while not trace_manager_queue.empty():
+            self.run()
 
     def send_to_celery(self, tasks: list[TraceTask]):
         with self.flask_app.app_context():
+            task_data_list: list[TaskData] = []
             for task in tasks:
                 if task.app_id is None:
                     continue
-                file_id = uuid4().hex
-                trace_info = task.execute()
-                task_data = TaskData(
-                    app_id=task.app_id,
-                    trace_info_type=type(trace_info).__name__,
-                    trace_info=trace_info.model_dump() if trace_info else None,
+                try:
+                    trace_info = task.execute()
+                except Exception:
+                    _trace_tasks_counter.add(1, {"status": "failed"})
+                    logging.exception("Error executing trace task, trace_type %s", task.trace_type)
+                    continue
+                task_data_list.append(
+                    TaskData(
+                        app_id=task.app_id,
+                        trace_info_type=type(trace_info).__name__,
+                        trace_info=trace_info.model_dump() if trace_info else None,
+                    )
                 )
-                file_path = f"{OPS_FILE_PATH}{task.app_id}/{file_id}.json"
-                storage.save(file_path, task_data.model_dump_json().encode("utf-8"))
-                file_info = {
-                    "file_id": file_id,
-                    "app_id": task.app_id,
-                }
-                process_trace_tasks.delay(file_info)
+
+            if not task_data_list:
+                return
+
+            batch_id = uuid4().hex
+            file_path = f"{OPS_BATCH_FILE_PATH}{batch_id}.json"
+            storage.save(file_path, _task_data_list_adapter.dump_json(task_data_list))
+            process_trace_task_batch.delay({"batch_id": batch_id})
+            _trace_tasks_counter.add(len(task_data_list), {"status": "exported"})
+            _trace_batches_counter.add(1)
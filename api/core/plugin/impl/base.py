@@ -1,11 +1,17 @@
 import inspect
 import json
 import logging
+import os
+import re
+import threading
+import time
 from collections.abc import Callable, Generator
 from typing import TypeVar
 
 import requests
+from opentelemetry.metrics import get_meter
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 from yarl import URL
 
@@ -37,6 +43,67 @@ T = TypeVar("T", bound=(BaseModel | dict | list | bool | str))
 
 logger = logging.getLogger(__name__)
 
+_request_duration_histogram = get_meter("plugin_daemon_metrics").create_histogram(
+    "plugin_daemon.request.duration",
+    description="Time until the plugin daemon responded with headers, by endpoint, method and status code",
+    unit="s",
+)
+
+# path segments made of ids or identifiers are replaced to keep the endpoint label low-cardinality
+_ENDPOINT_SEGMENT_PATTERN = re.compile(r"^[a-z_]+$")
+
+
+class _PluginDaemonSession:
+    """
+    Per-thread sessions sharing a single connection pool to the plugin daemon.
+    """
+
+    _adapter: HTTPAdapter | None = None
+    _local = threading.local()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls) -> requests.Session:
+        session: requests.Session | None = getattr(cls._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", cls._get_adapter())
+            session.mount("https://", cls._get_adapter())
+            cls._local.session = session
+        return session
+
+    @classmethod
+    def _get_adapter(cls) -> HTTPAdapter:
+        if cls._adapter is None:
+            with cls._lock:
+                if cls._adapter is None:
+                    cls._adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=dify_config.PLUGIN_DAEMON_POOL_MAX_SIZE,
+                        pool_block=dify_config.PLUGIN_DAEMON_POOL_BLOCK,
+                    )
+        return cls._adapter
+
+    @classmethod
+    def reset(cls) -> None:
+        # connections of the parent process must not be shared with forked workers
+        cls._adapter = None
+        cls._local = threading.local()
+        cls._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_PluginDaemonSession.reset)
+
+
+def _endpoint_label(path: str) -> str:
+    segments = path.strip("/").split("/")
+    if len(segments) > 1 and segments[0] == "plugin":
+        segments[1] = "{tenant_id}"
+    return "/".join(
+        segment if i < 2 or _ENDPOINT_SEGMENT_PATTERN.match(segment) else "{id}" for i, segment in enumerate(segments)
+    )
+
 
 class BasePluginClient:
     def _request(
@@ -60,13 +127,37 @@ class BasePluginClient:
         if headers.get("Content-Type") == "application/json" and isinstance(data, dict):
             data = json.dumps(data)
 
+        connect_timeout = dify_config.PLUGIN_DAEMON_CONNECT_TIMEOUT
+        read_timeout = dify_config.PLUGIN_DAEMON_READ_TIMEOUT
+        timeout = (connect_timeout, read_timeout)
+
+        status_code = "error"
+        started_at = time.perf_counter()
         try:
-            response = requests.request(
-                method=method, url=str(url), headers=headers, data=data, params=params, stream=stream, files=files
+            response = _PluginDaemonSession.get().request(
+                method=method,
+                url=str(url),
+                headers=headers,
+                data=data,
+                params=params,
+                stream=stream,
+                files=files,
+                timeout=timeout,
             )
+            status_code = str(response.status_code)
         except requests.exceptions.ConnectionError:
             logger.exception("Request to Plugin Daemon Service failed")
             raise PluginDaemonInnerError(code=-500, message="Request to Plugin Daemon Service failed")
+        finally:
+            _request_duration_histogram.record(
+                time.perf_counter() - started_at,
+                {
+                    "endpoint": _endpoint_label(path),
+                    "method": method.upper(),
+                    "status_code": status_code,
+                    "stream": stream,
+                },
+            )
 
         return response
 
@@ -24,6 +24,7 @@ from core.entities.provider_entities import (
 from core.helper import encrypter
 from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
 from core.helper.position_helper import is_filtered
+from core.helper.provider_configurations_cache import ProviderConfigurationsCache
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.entities.provider_entities import (
     ConfigurateMethod,
@@ -94,6 +95,27 @@ class ProviderManager:
         :param tenant_id:
         :return:
         """
+        if not ProviderConfigurationsCache.is_enabled():
+            return self._get_configurations(tenant_id)
+
+        provider_configurations_cache = ProviderConfigurationsCache(tenant_id)
+        version = provider_configurations_cache.get_version()
+        if version is None:
+            return self._get_configurations(tenant_id)
+
+        provider_configurations = provider_configurations_cache.get(version)
+        if provider_configurations is None:
+            provider_configurations = self._get_configurations(tenant_id)
+            provider_configurations_cache.set(version, provider_configurations)
+        return provider_configurations
+
+    def _get_configurations(self, tenant_id: str) -> ProviderConfigurations:
+        """
+        Assemble the model provider configurations of the workspace from its records.
+
+        :param tenant_id: workspace id
+        :return:
+        """
         # Get all provider records of the workspace
         provider_name_to_provider_records_dict = self._get_all_providers(tenant_id)
 
@@ -0,0 +1,164 @@
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from core.rag.datasource.keyword.jieba.jieba import KeywordTableConfig
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.keyword.keyword_base import BaseKeyword
+from core.rag.datasource.segment_loader import SegmentLoader
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from models.dataset import Dataset, DatasetKeywordIndex, DocumentSegment
+
+# maximum number of rows written or ids matched by a single statement
+_BATCH_SIZE = 1000
+# keywords longer than the column width can never be matched by a query keyword in practice
+_MAX_KEYWORD_LENGTH = 255
+
+
+class JiebaInvertedIndex(BaseKeyword):
+    """
+    Jieba keyword store backed by the `dataset_keyword_indexes` table.
+
+    Unlike `Jieba`, which rewrites the whole keyword table of a dataset on every change, each
+    (keyword, index node) pair is stored as its own posting row. Adds and deletes only touch the
+    affected rows and searches only read the posting lists of the query keywords.
+    """
+
+    def __init__(self, dataset: Dataset):
+        super().__init__(dataset)
+        self._config = KeywordTableConfig()
+
+    def create(self, texts: list[Document], **kwargs) -> BaseKeyword:
+        self.add_texts(texts, **kwargs)
+        return self
+
+    def add_texts(self, texts: list[Document], **kwargs):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords_list = kwargs.get("keywords_list")
+        node_keywords: dict[str, list[str]] = {}
+        for i, text in enumerate(texts):
+            if text.metadata is None:
+                continue
+            keywords = keywords_list[i] if keywords_list else None
+            if not keywords:
+                keywords = keyword_table_handler.extract_keywords(
+                    text.page_content, self._config.max_keywords_per_chunk
+                )
+            node_keywords[text.metadata["doc_id"]] = list(keywords)
+
+        if not node_keywords:
+            return
+        self._update_segments_keywords(node_keywords)
+        self._add_postings(node_keywords)
+
+    def text_exists(self, id: str) -> bool:
+        stmt = select(
+            select(DatasetKeywordIndex.node_id)
+            .where(DatasetKeywordIndex.dataset_id == self.dataset.id, DatasetKeywordIndex.node_id == id)
+            .exists()
+        )
+        return bool(db.session.scalar(stmt))
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        for i in range(0, len(ids), _BATCH_SIZE):
+            db.session.execute(
+                delete(DatasetKeywordIndex).where(
+                    DatasetKeywordIndex.dataset_id == self.dataset.id,
+                    DatasetKeywordIndex.node_id.in_(ids[i : i + _BATCH_SIZE]),
+                )
+            )
+        db.session.commit()
+
+    def delete(self) -> None:
+        db.session.execute(delete(DatasetKeywordIndex).where(DatasetKeywordIndex.dataset_id == self.dataset.id))
+        db.session.commit()
+
+    def search(self, query: str, **kwargs: Any) -> list[Document]:
+        k = kwargs.get("top_k", 4)
+        document_ids_filter = kwargs.get("document_ids_filter")
+
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords = [keyword for keyword in keyword_table_handler.extract_keywords(query) if keyword]
+        if not keywords:
+            return []
+
+        match_count = func.count(DatasetKeywordIndex.keyword)
+        stmt = (
+            select(DatasetKeywordIndex.node_id, match_count)
+            .where(DatasetKeywordIndex.dataset_id == self.dataset.id, DatasetKeywordIndex.keyword.in_(keywords))
+            .group_by(DatasetKeywordIndex.node_id)
+            .order_by(match_count.desc(), DatasetKeywordIndex.node_id)
+            .limit(k)
+        )
+        if document_ids_filter:
+            stmt = stmt.where(
+                DatasetKeywordIndex.node_id.in_(
+                    select(DocumentSegment.index_node_id).where(
+                        DocumentSegment.dataset_id == self.dataset.id,
+                        DocumentSegment.document_id.in_(document_ids_filter),
+                    )
+                )
+            )
+        sorted_chunk_indices = [node_id for node_id, _ in db.session.execute(stmt)]
+        if not sorted_chunk_indices:
+            return []
+
+        segment_map, _ = SegmentLoader.load_segments(dataset_ids=[self.dataset.id], index_node_ids=sorted_chunk_indices)
+
+        documents = []
+        for chunk_index in sorted_chunk_indices:
+            segment = segment_map.get(chunk_index)
+            if segment:
+                documents.append(
+                    Document(
+                        page_content=segment.content,
+                        metadata={
+                            "doc_id": chunk_index,
+                            "doc_hash": segment.index_node_hash,
+                            "document_id": segment.document_id,
+                            "dataset_id": segment.dataset_id,
+                        },
+                    )
+                )
+
+        return documents
+
+    def import_keyword_table(self, keyword_table: dict[str, Iterable[str]]) -> None:
+        """
+        Load a legacy keyword -> node ids table, as stored by `Jieba`, into the inverted index.
+
+        :param keyword_table: mapping of keyword to the ids of the index nodes containing it
+        """
+        node_keywords: dict[str, list[str]] = {}
+        for keyword, node_ids in keyword_table.items():
+            for node_id in node_ids:
+                node_keywords.setdefault(node_id, []).append(keyword)
+        self._add_postings(node_keywords)
+
+    def _add_postings(self, node_keywords: dict[str, list[str]]) -> None:
+        rows = [
+            {"dataset_id": self.dataset.id, "keyword": keyword, "node_id": node_id}
+            for node_id, keywords in node_keywords.items()
+            for keyword in dict.fromkeys(keywords)
+            if keyword and len(keyword) <= _MAX_KEYWORD_LENGTH
+        ]
+        for i in range(0, len(rows), _BATCH_SIZE):
+            stmt = insert(DatasetKeywordIndex).values(rows[i : i + _BATCH_SIZE]).on_conflict_do_nothing()
+            db.session.execute(stmt)
+        db.session.commit()
+
+    def _update_segments_keywords(self, node_keywords: dict[str, list[str]]) -> None:
+        node_ids = list(node_keywords)
+        for i in range(0, len(node_ids), _BATCH_SIZE):
+            segments = db.session.scalars(
+                select(DocumentSegment).where(
+                    DocumentSegment.dataset_id == self.dataset.id,
+                    DocumentSegment.index_node_id.in_(node_ids[i : i + _BATCH_SIZE]),
+                )
+            )
+            for segment in segments:
+                segment.keywords = node_keywords[segment.index_node_id]
+        db.session.commit()
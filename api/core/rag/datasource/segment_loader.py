@@ -0,0 +1,154 @@
+import threading
+from collections.abc import Collection, Sequence
+from typing import Any, Optional, TypeVar
+
+from cachetools import TTLCache
+from sqlalchemy import inspect, or_, select
+from sqlalchemy.orm import Mapper, make_transient_to_detached
+
+from configs import dify_config
+from extensions.ext_database import db
+from models.dataset import ChildChunk, DocumentSegment
+
+_ModelT = TypeVar("_ModelT", DocumentSegment, ChildChunk)
+
+
+class SegmentLoader:
+    """
+    Batched loader of the `DocumentSegment` and `ChildChunk` rows behind retrieval results.
+
+    Every call resolves all requested rows with a single query. When `RETRIEVAL_SEGMENT_CACHE_TTL` is set,
+    rows are also kept in a short-lived process-local cache and merged back into the current session on hit,
+    so hot segments skip the database entirely. Status filters are applied in Python so cached rows serve
+    every caller regardless of the filter it needs.
+    """
+
+    _cache: Optional[TTLCache] = None
+    _cache_lock = threading.Lock()
+
+    @classmethod
+    def _get_cache(cls) -> Optional[TTLCache]:
+        if dify_config.RETRIEVAL_SEGMENT_CACHE_TTL <= 0:
+            return None
+        if cls._cache is None:
+            with cls._cache_lock:
+                if cls._cache is None:
+                    cls._cache = TTLCache(
+                        maxsize=dify_config.RETRIEVAL_SEGMENT_CACHE_MAX_SIZE,
+                        ttl=dify_config.RETRIEVAL_SEGMENT_CACHE_TTL,
+                    )
+        return cls._cache
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._cache_lock:
+            cls._cache = None
+
+    @classmethod
+    def load_segments(
+        cls,
+        dataset_ids: Collection[str],
+        index_node_ids: Sequence[str] = (),
+        segment_ids: Sequence[str] = (),
+        document_ids_filter: Optional[Collection[str]] = None,
+        completed_only: bool = False,
+    ) -> tuple[dict[str, DocumentSegment], dict[str, DocumentSegment]]:
+        """
+        Load the segments of the given datasets matching any of the index node ids or segment ids.
+
+        :param dataset_ids: datasets the segments must belong to
+        :param index_node_ids: index node ids of the segments to load
+        :param segment_ids: ids of the segments to load
+        :param document_ids_filter: if set, only keep segments of these documents
+        :param completed_only: only keep enabled segments whose indexing is completed
+        :return: segments keyed by index node id, segments keyed by segment id
+        """
+        dataset_ids = set(dataset_ids)
+        wanted_node_ids = {(dataset_id, node_id) for dataset_id in dataset_ids for node_id in index_node_ids}
+        wanted_segment_ids = set(segment_ids)
+
+        segments: dict[str, DocumentSegment] = {}
+        cache = cls._get_cache()
+        if cache is not None:
+            with cls._cache_lock:
+                for key in wanted_node_ids:
+                    segment_id = cache.get(("segment_node", *key))
+                    if segment_id is not None:
+                        wanted_segment_ids.add(segment_id)
+                cached_rows = {segment_id: cache.get(("segment", segment_id)) for segment_id in wanted_segment_ids}
+            for segment_id, row in cached_rows.items():
+                if row is not None:
+                    segments[segment_id] = cls._restore(DocumentSegment, row)
+            wanted_segment_ids.difference_update(segments)
+            wanted_node_ids.difference_update((s.dataset_id, s.index_node_id) for s in segments.values())
+
+        missing_node_ids = {node_id for _, node_id in wanted_node_ids}
+        if missing_node_ids or wanted_segment_ids:
+            conditions = []
+            if missing_node_ids:
+                conditions.append(DocumentSegment.index_node_id.in_(missing_node_ids))
+            if wanted_segment_ids:
+                conditions.append(DocumentSegment.id.in_(wanted_segment_ids))
+            stmt = select(DocumentSegment).where(DocumentSegment.dataset_id.in_(dataset_ids), or_(*conditions))
+            loaded = db.session.scalars(stmt).all()
+            for segment in loaded:
+                segments[segment.id] = segment
+            if cache is not None:
+                with cls._cache_lock:
+                    for segment in loaded:
+                        cache[("segment", segment.id)] = cls._snapshot(segment)
+                        if segment.index_node_id:
+                            cache[("segment_node", segment.dataset_id, segment.index_node_id)] = segment.id
+
+        by_node_id: dict[str, DocumentSegment] = {}
+        by_id: dict[str, DocumentSegment] = {}
+        for segment in segments.values():
+            if document_ids_filter is not None and segment.document_id not in document_ids_filter:
+                continue
+            if completed_only and not (segment.enabled and segment.status == "completed"):
+                continue
+            by_id[segment.id] = segment
+            if segment.index_node_id:
+                by_node_id[segment.index_node_id] = segment
+        return by_node_id, by_id
+
+    @classmethod
+    def load_child_chunks(cls, index_node_ids: Sequence[str]) -> dict[str, ChildChunk]:
+        """
+        Load the child chunks with the given index node ids.
+
+        :param index_node_ids: index node ids of the child chunks to load
+        :return: child chunks keyed by index node id
+        """
+        child_chunks: dict[str, ChildChunk] = {}
+        wanted = set(index_node_ids)
+        cache = cls._get_cache()
+        if cache is not None:
+            with cls._cache_lock:
+                cached_rows = {node_id: cache.get(("child_chunk", node_id)) for node_id in wanted}
+            for node_id, row in cached_rows.items():
+                if row is not None:
+                    child_chunks[node_id] = cls._restore(ChildChunk, row)
+            wanted.difference_update(child_chunks)
+
+        if wanted:
+            loaded = db.session.scalars(select(ChildChunk).where(ChildChunk.index_node_id.in_(wanted))).all()
+            for child_chunk in loaded:
+                child_chunks[child_chunk.index_node_id] = child_chunk
+            if cache is not None:
+                with cls._cache_lock:
+                    for child_chunk in loaded:
+                        cache[("child_chunk", child_chunk.index_node_id)] = cls._snapshot(child_chunk)
+        return child_chunks
+
+    @staticmethod
+    def _snapshot(instance: DocumentSegment | ChildChunk) -> dict[str, Any]:
+        mapper: Mapper[Any] = inspect(type(instance))
+        return {attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs}
+
+    @staticmethod
+    def _restore(model: type[_ModelT], row: dict[str, Any]) -> _ModelT:
+        instance = model(**row)
+        make_transient_to_detached(instance)
+        # attach to the current session without emitting any SQL
+        return db.session.merge(instance, load=False)
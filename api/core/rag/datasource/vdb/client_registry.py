@@ -0,0 +1,228 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, Optional, TypeVar, cast
+
+from opentelemetry.metrics import CallbackOptions, Observation, get_meter
+from pydantic import BaseModel
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _RegistryEntry:
+    __slots__ = ("backend", "client", "close", "health_check", "pool_usage", "last_used_at", "last_checked_at")
+
+    def __init__(
+        self,
+        backend: str,
+        client: Any,
+        close: Optional[Callable[[Any], None]],
+        health_check: Optional[Callable[[Any], bool]],
+        pool_usage: Optional[Callable[[Any], tuple[int, int]]],
+    ):
+        self.backend = backend
+        self.client = client
+        self.close = close
+        self.health_check = health_check
+        self.pool_usage = pool_usage
+        self.last_used_at = time.monotonic()
+        self.last_checked_at = self.last_used_at
+
+    def in_use(self) -> int:
+        if self.pool_usage is None:
+            return 0
+        try:
+            return self.pool_usage(self.client)[0]
+        except Exception:
+            return 0
+
+
+class VectorClientRegistry:
+    """
+    Process-wide registry of long-lived vector database clients and connection pools.
+
+    Clients are keyed by backend and connection config, so every `Vector` of the same backend and config
+    shares one client instead of opening new connections on every retrieval. Registered clients must be
+    thread-safe. A client is health checked at most every `VECTOR_CLIENT_HEALTH_CHECK_INTERVAL` seconds
+    when it is fetched and rebuilt if the check fails, and is closed once it has not been fetched for
+    `VECTOR_CLIENT_IDLE_TIMEOUT` seconds and none of its pooled connections is in use. Clients failing their
+    health check are retired: they are no longer handed out, but other threads may still be using them, so
+    they are closed by the same idle rule.
+    """
+
+    _entries: dict[str, _RegistryEntry] = {}
+    _retired: list[_RegistryEntry] = []
+    _key_locks: dict[str, threading.Lock] = {}
+    _lock = threading.Lock()
+    _last_evicted_at = time.monotonic()
+
+    @classmethod
+    def get(
+        cls,
+        backend: str,
+        config: BaseModel,
+        factory: Callable[[], T],
+        close: Optional[Callable[[T], None]] = None,
+        health_check: Optional[Callable[[T], bool]] = None,
+        pool_usage: Optional[Callable[[T], tuple[int, int]]] = None,
+    ) -> T:
+        """
+        Get the shared client of a backend config, creating it if needed.
+
+        :param backend: vector type of the backend
+        :param config: connection config of the backend, clients of equal configs are shared
+        :param factory: creates a new client
+        :param close: closes a client that is evicted or failed its health check
+        :param health_check: returns False, or raises, if a client must be rebuilt
+        :param pool_usage: returns the number of connections in use and the size of the pool of a client
+        :return: shared client
+        """
+        if not dify_config.VECTOR_CLIENT_REGISTRY_ENABLED:
+            return factory()
+
+        cls._evict_idle()
+        key = cls._key(backend, config)
+        entry = cls._entries.get(key)
+        if entry is not None and cls._is_healthy(entry):
+            entry.last_used_at = time.monotonic()
+            return cast(T, entry.client)
+
+        with cls._lock:
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            current = cls._entries.get(key)
+            if current is not None and current is not entry:
+                # rebuilt by another thread in the meantime
+                current.last_used_at = time.monotonic()
+                return cast(T, current.client)
+            if current is not None:
+                logger.info("Retiring %s client that failed its health check", current.backend)
+                with cls._lock:
+                    cls._entries.pop(key, None)
+                    cls._retired.append(current)
+
+            client = factory()
+            with cls._lock:
+                cls._entries[key] = _RegistryEntry(
+                    backend=backend, client=client, close=close, health_check=health_check, pool_usage=pool_usage
+                )
+        return client
+
+    @classmethod
+    def clear(cls, close: bool = True) -> None:
+        """
+        Remove all clients from the registry.
+
+        :param close: whether to close the removed clients
+        """
+        with cls._lock:
+            entries = list(cls._entries.values()) + cls._retired
+            cls._entries = {}
+            cls._retired = []
+            cls._key_locks = {}
+        if close:
+            for entry in entries:
+                cls._close(entry)
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        # connections of the parent must not be used, nor closed, by a forked child
+        cls._lock = threading.Lock()
+        cls.clear(close=False)
+
+    @staticmethod
+    def _key(backend: str, config: BaseModel) -> str:
+        # only a digest of the config is kept, so credentials are not held in the keys
+        digest = hashlib.sha256(config.model_dump_json().encode("utf-8")).hexdigest()
+        return f"{backend}:{digest}"
+
+    @staticmethod
+    def _is_healthy(entry: _RegistryEntry) -> bool:
+        if entry.health_check is None:
+            return True
+        now = time.monotonic()
+        if now - entry.last_checked_at < dify_config.VECTOR_CLIENT_HEALTH_CHECK_INTERVAL:
+            return True
+        # other threads keep using the client while it is being checked
+        entry.last_checked_at = now
+        try:
+            return entry.health_check(entry.client)
+        except Exception:
+            logger.warning("Health check of %s client failed", entry.backend, exc_info=True)
+            return False
+
+    @classmethod
+    def _evict_idle(cls) -> None:
+        now = time.monotonic()
+        idle_timeout = dify_config.VECTOR_CLIENT_IDLE_TIMEOUT
+        if now - cls._last_evicted_at < min(idle_timeout, 60):
+            return
+        with cls._lock:
+            cls._last_evicted_at = now
+            evicted = [(key, entry) for key, entry in cls._entries.items() if cls._is_idle(entry, now, idle_timeout)]
+            for key, _ in evicted:
+                del cls._entries[key]
+                cls._key_locks.pop(key, None)
+            retired = [entry for entry in cls._retired if cls._is_idle(entry, now, idle_timeout)]
+            cls._retired = [entry for entry in cls._retired if entry not in retired]
+        for entry in [entry for _, entry in evicted] + retired:
+            logger.info("Closing %s client idle for more than %s seconds", entry.backend, idle_timeout)
+            cls._close(entry)
+
+    @staticmethod
+    def _is_idle(entry: _RegistryEntry, now: float, idle_timeout: float) -> bool:
+        return now - entry.last_used_at > idle_timeout and entry.in_use() == 0
+
+    @staticmethod
+    def _close(entry: _RegistryEntry) -> None:
+        if entry.close is None:
+            return
+        try:
+            entry.close(entry.client)
+        except Exception:
+            logger.warning("Failed to close %s client", entry.backend, exc_info=True)
+
+    @classmethod
+    def _observe_clients(cls, options: CallbackOptions) -> Iterable[Observation]:
+        counts: dict[str, int] = {}
+        for entry in list(cls._entries.values()):
+            counts[entry.backend] = counts.get(entry.backend, 0) + 1
+        for backend, count in counts.items():
+            yield Observation(count, {"backend": backend})
+
+    @classmethod
+    def _observe_pool_utilization(cls, options: CallbackOptions) -> Iterable[Observation]:
+        for key, entry in list(cls._entries.items()):
+            if entry.pool_usage is None:
+                continue
+            try:
+                in_use, size = entry.pool_usage(entry.client)
+            except Exception:
+                continue
+            if size > 0:
+                yield Observation(in_use / size, {"backend": entry.backend, "pool": key.rsplit(":", 1)[-1][:12]})
+
+
+_registry_meter = get_meter("vdb_client_registry_metrics")
+_registry_meter.create_observable_gauge(
+    "vdb.client_registry.clients",
+    callbacks=[VectorClientRegistry._observe_clients],
+    unit="{client}",
+    description="Number of shared vector database clients",
+)
+_registry_meter.create_observable_gauge(
+    "vdb.client_registry.pool_utilization",
+    callbacks=[VectorClientRegistry._observe_pool_utilization],
+    unit="1",
+    description="Ratio of connections in use to the size of the shared vector database connection pools",
+)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=VectorClientRegistry._reset_after_fork)
@@ -9,6 +9,7 @@ from elasticsearch import Elasticsearch
 from flask import current_app
 from pydantic import BaseModel, model_validator
 
+from core.rag.datasource.vdb.client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
@@ -72,12 +73,27 @@ class ElasticSearchConfig(BaseModel):
 class ElasticSearchVector(BaseVector):
     def __init__(self, index_name: str, config: ElasticSearchConfig, attributes: list):
         super().__init__(index_name.lower())
-        self._client = self._init_client(config)
+        self._client_config = config
         self._version = self._get_version()
         self._check_version()
         self._attributes = attributes
 
-    def _init_client(self, config: ElasticSearchConfig) -> Elasticsearch:
+    @property
+    def _client(self) -> Elasticsearch:
+        """
+        Return the shared Elasticsearch client of the config, fetched on every use so a client closed by the
+        registry is never used.
+        """
+        return VectorClientRegistry.get(
+            VectorType.ELASTICSEARCH,
+            self._client_config,
+            factory=lambda: self._create_client(self._client_config),
+            close=lambda client: client.close(),
+            health_check=lambda client: client.ping(),
+        )
+
+    @staticmethod
+    def _create_client(config: ElasticSearchConfig) -> Elasticsearch:
         """
         Initialize Elasticsearch client for both regular Elasticsearch and Elastic Cloud.
         """
@@ -173,6 +189,15 @@ class ElasticSearchVector(BaseVector):
     def text_exists(self, id: str) -> bool:
         return bool(self._client.exists(index=self._collection_name, id=id))
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        if not self._client.indices.exists(index=self._collection_name):
+            return set()
+        existing_ids: set[str] = set()
+        for i in range(0, len(ids), 1000):
+            response = self._client.mget(index=self._collection_name, ids=ids[i : i + 1000], source=False)
+            existing_ids.update(doc["_id"] for doc in response["docs"] if doc.get("found"))
+        return existing_ids
+
     def delete_by_ids(self, ids: list[str]) -> None:
         if not ids:
             return
@@ -8,6 +8,7 @@ from pymilvus import MilvusClient, MilvusException  # type: ignore
 from pymilvus.milvus_client import IndexParams  # type: ignore
 
 from configs import dify_config
+from core.rag.datasource.vdb.client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
@@ -72,7 +73,6 @@ class MilvusVector(BaseVector):
     def __init__(self, collection_name: str, config: MilvusConfig):
         super().__init__(collection_name)
         self._client_config = config
-        self._client = self._init_client(config)
         self._consistency_level = "Session"  # Consistency level for Milvus operations
         self._fields: list[str] = []  # List of fields in the collection
         if self._client.has_collection(collection_name):
@@ -203,6 +203,23 @@ class MilvusVector(BaseVector):
 
         return len(result) > 0
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        """
+        Get the IDs of the given texts that exist in the collection.
+        """
+        if not self._client.has_collection(self._collection_name):
+            return set()
+
+        existing_ids: set[str] = set()
+        for i in range(0, len(ids), 1000):
+            result = self._client.query(
+                collection_name=self._collection_name,
+                filter=f'metadata["doc_id"] in {json.dumps(ids[i : i + 1000])}',
+                output_fields=[Field.METADATA_KEY.value],
+            )
+            existing_ids.update(item[Field.METADATA_KEY.value]["doc_id"] for item in result)
+        return existing_ids
+
     def field_exists(self, field: str) -> bool:
         """
         Check if a field exists in the collection.
@@ -361,10 +378,22 @@ class MilvusVector(BaseVector):
                 )
             redis_client.set(collection_exist_cache_key, 1, ex=3600)
 
-    def _init_client(self, config: MilvusConfig) -> MilvusClient:
+    @property
+    def _client(self) -> MilvusClient:
         """
-        Initialize and return a Milvus client.
+        Return the shared Milvus client of the config, fetched on every use so a client closed by the
+        registry is never used.
         """
+        return VectorClientRegistry.get(
+            VectorType.MILVUS,
+            self._client_config,
+            factory=lambda: self._create_client(self._client_config),
+            close=lambda client: client.close(),
+            health_check=lambda client: bool(client.get_server_version()),
+        )
+
+    @staticmethod
+    def _create_client(config: MilvusConfig) -> MilvusClient:
         if config.token:
             client = MilvusClient(uri=config.uri, token=config.token, db_name=config.database)
         else:
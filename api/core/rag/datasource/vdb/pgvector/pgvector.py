@@ -1,6 +1,7 @@
 import hashlib
 import json
 import logging
+import threading
 import uuid
 from contextlib import contextmanager
 from typing import Any
@@ -11,6 +12,7 @@ import psycopg2.pool  # type: ignore
 from pydantic import BaseModel, model_validator
 
 from configs import dify_config
+from core.rag.datasource.vdb.client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
@@ -72,10 +74,54 @@ USING gin (text gin_bigm_ops);
 """
 
 
+# seconds to wait for a free connection of a shared pool
+_POOL_TIMEOUT = 30
+
+
+class _BlockingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    Connection pool shared by the `PGVector` instances of a config, `getconn` waits for a connection
+    to be returned instead of raising when all connections are in use.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._semaphore = threading.BoundedSemaphore(maxconn)
+        self._usage_lock = threading.Lock()
+        self._in_use = 0
+
+    def getconn(self, key=None):
+        if not self._semaphore.acquire(timeout=_POOL_TIMEOUT):
+            raise psycopg2.pool.PoolError("timed out waiting for a connection of the pgvector pool")
+        try:
+            conn = super().getconn(key)
+            if conn.closed:
+                # dropped by the server while idle in the pool
+                super().putconn(conn, key, close=True)
+                conn = super().getconn(key)
+        except Exception:
+            self._semaphore.release()
+            raise
+        with self._usage_lock:
+            self._in_use += 1
+        return conn
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            with self._usage_lock:
+                self._in_use -= 1
+            self._semaphore.release()
+
+    def usage(self) -> tuple[int, int]:
+        return self._in_use, self.maxconn
+
+
 class PGVector(BaseVector):
     def __init__(self, collection_name: str, config: PGVectorConfig):
         super().__init__(collection_name)
-        self.pool = self._create_connection_pool(config)
+        self._config = config
         self.table_name = f"embedding_{collection_name}"
         self.index_hash = hashlib.md5(self.table_name.encode()).hexdigest()[:8]
         self.pg_bigm = config.pg_bigm
@@ -83,8 +129,19 @@ class PGVector(BaseVector):
     def get_type(self) -> str:
         return VectorType.PGVECTOR
 
-    def _create_connection_pool(self, config: PGVectorConfig):
-        return psycopg2.pool.SimpleConnectionPool(
+    @property
+    def pool(self) -> _BlockingConnectionPool:
+        return VectorClientRegistry.get(
+            VectorType.PGVECTOR,
+            self._config,
+            factory=lambda: self._create_connection_pool(self._config),
+            close=lambda pool: pool.closeall(),
+            health_check=lambda pool: not pool.closed,
+            pool_usage=lambda pool: pool.usage(),
+        )
+
+    def _create_connection_pool(self, config: PGVectorConfig) -> _BlockingConnectionPool:
+        return _BlockingConnectionPool(
             config.min_connection,
             config.max_connection,
             host=config.host,
@@ -96,14 +153,17 @@ class PGVector(BaseVector):
 
     @contextmanager
     def _get_cursor(self):
-        conn = self.pool.getconn()
-        cur = conn.cursor()
+        pool = self.pool
+        conn = pool.getconn()
         try:
-            yield cur
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+                conn.commit()
         finally:
-            cur.close()
-            conn.commit()
-            self.pool.putconn(conn)
+            pool.putconn(conn, close=bool(conn.closed))
 
     def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
         dimension = len(embeddings[0])
@@ -136,6 +196,14 @@ class PGVector(BaseVector):
             cur.execute(f"SELECT id FROM {self.table_name} WHERE id = %s", (id,))
             return cur.fetchone() is not None
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        existing_ids: set[str] = set()
+        with self._get_cursor() as cur:
+            for i in range(0, len(ids), 1000):
+                cur.execute(f"SELECT id FROM {self.table_name} WHERE id IN %s", (tuple(ids[i : i + 1000]),))
+                existing_ids.update(str(record[0]) for record in cur)
+        return existing_ids
+
     def get_by_ids(self, ids: list[str]) -> list[Document]:
         with self._get_cursor() as cur:
             cur.execute(f"SELECT meta, text FROM {self.table_name} WHERE id IN %s", (tuple(ids),))
@@ -20,6 +20,7 @@ from qdrant_client.http.models import (
 from qdrant_client.local.qdrant_local import QdrantLocal
 
 from configs import dify_config
+from core.rag.datasource.vdb.client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
@@ -73,13 +74,30 @@ class QdrantVector(BaseVector):
     def __init__(self, collection_name: str, group_id: str, config: QdrantConfig, distance_func: str = "Cosine"):
         super().__init__(collection_name)
         self._client_config = config
-        self._client = qdrant_client.QdrantClient(**self._client_config.to_qdrant_params())
+        params = config.to_qdrant_params()
+        # local storage is reloaded by `_reload_if_needed` and not shared
+        self._local_client = qdrant_client.QdrantClient(**params) if "path" in params else None
         self._distance_func = distance_func.upper()
         self._group_id = group_id
 
     def get_type(self) -> str:
         return VectorType.QDRANT
 
+    @property
+    def _client(self) -> qdrant_client.QdrantClient:
+        """
+        Return the shared Qdrant client of the config, fetched on every use so a client closed by the
+        registry is never used.
+        """
+        if self._local_client is not None:
+            return self._local_client
+        return VectorClientRegistry.get(
+            VectorType.QDRANT,
+            self._client_config,
+            factory=lambda: qdrant_client.QdrantClient(**self._client_config.to_qdrant_params()),
+            close=lambda client: client.close(),
+        )
+
     def to_index_struct(self) -> dict:
         return {"type": self.get_type(), "vector_store": {"class_prefix": self._collection_name}}
 
@@ -328,6 +346,21 @@ class QdrantVector(BaseVector):
 
         return len(response) > 0
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        collections_response = self._client.get_collections()
+        if self._collection_name not in {collection.name for collection in collections_response.collections}:
+            return set()
+        existing_ids: set[str] = set()
+        for i in range(0, len(ids), 1000):
+            points = self._client.retrieve(
+                collection_name=self._collection_name,
+                ids=ids[i : i + 1000],
+                with_payload=False,
+                with_vectors=False,
+            )
+            existing_ids.update(str(point.id) for point in points)
+        return existing_ids
+
     def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
         from qdrant_client.http import models
 
@@ -420,9 +453,10 @@ class QdrantVector(BaseVector):
         return documents
 
     def _reload_if_needed(self):
-        if isinstance(self._client, QdrantLocal):
-            self._client = cast(QdrantLocal, self._client)
-            self._client._load()
+        client = self._client
+        if isinstance(client, QdrantLocal):
+            client = cast(QdrantLocal, client)
+            client._load()
 
     @classmethod
     def _document_from_scored_point(
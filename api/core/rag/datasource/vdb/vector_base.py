@@ -26,6 +26,16 @@ class BaseVector(ABC):
     def text_exists(self, id: str) -> bool:
         raise NotImplementedError
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        """
+        Get the ids of the given texts that exist in the collection.
+        Backends able to check many ids in one request should override it, it calls `text_exists` for each id.
+
+        :param ids: doc ids of the texts
+        :return: doc ids of the existing texts
+        """
+        return {id for id in ids if self.text_exists(id)}
+
     @abstractmethod
     def delete_by_ids(self, ids: list[str]) -> None:
         raise NotImplementedError
@@ -50,12 +60,13 @@ class BaseVector(ABC):
         raise NotImplementedError
 
     def _filter_duplicate_texts(self, texts: list[Document]) -> list[Document]:
-        for text in texts.copy():
-            if text.metadata and "doc_id" in text.metadata:
-                doc_id = text.metadata["doc_id"]
-                exists_duplicate_node = self.text_exists(doc_id)
-                if exists_duplicate_node:
-                    texts.remove(text)
+        doc_ids = [text.metadata["doc_id"] for text in texts if text.metadata and "doc_id" in text.metadata]
+        existing_ids = self.existing_ids(doc_ids) if doc_ids else set()
+        texts[:] = [
+            text
+            for text in texts
+            if not (text.metadata and "doc_id" in text.metadata and text.metadata["doc_id"] in existing_ids)
+        ]
 
         return texts
 
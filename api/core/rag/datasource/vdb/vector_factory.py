@@ -1,8 +1,14 @@
+import contextvars
 import logging
 import time
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Optional
 
+from flask import current_app, has_app_context
+from opentelemetry.metrics import get_meter
+
 from configs import dify_config
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
@@ -13,10 +19,23 @@ from core.rag.embedding.embedding_base import Embeddings
 from core.rag.models.document import Document
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
+from libs.flask_utils import preserve_flask_contexts
 from models.dataset import Dataset, Whitelist
 
 logger = logging.getLogger(__name__)
 
+_vector_create_meter = get_meter("vector_create_metrics")
+_processed_documents_counter = _vector_create_meter.create_counter(
+    "vector_create.processed_documents",
+    unit="{document}",
+    description="Number of documents embedded or inserted into the vector store at indexing, by stage",
+)
+_stage_duration_histogram = _vector_create_meter.create_histogram(
+    "vector_create.stage_duration",
+    unit="s",
+    description="Time spent embedding or inserting a batch of documents at indexing, by stage",
+)
+
 
 class AbstractVectorFactory(ABC):
     @abstractmethod
@@ -180,18 +199,60 @@ class Vector:
             start = time.time()
             logger.info("start embedding %s texts %s", len(texts), start)
             batch_size = 1000
-            total_batches = len(texts) + batch_size - 1
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i : i + batch_size]
-                batch_start = time.time()
-                logger.info("Processing batch %s/%s (%s texts)", i // batch_size + 1, total_batches, len(batch))
-                batch_embeddings = self._embeddings.embed_documents([document.page_content for document in batch])
-                logger.info(
-                    "Embedding batch %s/%s took %s s", i // batch_size + 1, total_batches, time.time() - batch_start
-                )
-                self._vector_processor.create(texts=batch, embeddings=batch_embeddings, **kwargs)
+            batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+            if dify_config.VECTOR_CREATE_PIPELINE_ENABLED and len(batches) > 1:
+                self._create_pipelined(batches, **kwargs)
+            else:
+                for batch_index, batch in enumerate(batches):
+                    batch_embeddings = self._embed_batch(batch, batch_index, len(batches))
+                    self._insert_batch(batch, batch_embeddings, **kwargs)
             logger.info("Embedding %s texts took %s s", len(texts), time.time() - start)
 
+    def _create_pipelined(self, batches: list[list[Document]], **kwargs):
+        """
+        Embed the batches in the calling thread while the previous ones are inserted by a single worker thread,
+        so inserts keep their order. At most VECTOR_CREATE_PIPELINE_MAX_PENDING_BATCHES embedded batches wait for
+        or are being inserted, and the first failed insert stops the embedding of the next batches.
+        """
+        max_pending_batches = dify_config.VECTOR_CREATE_PIPELINE_MAX_PENDING_BATCHES
+        flask_app = current_app._get_current_object() if has_app_context() else None  # type: ignore
+        pending_inserts: deque[Future] = deque()
+
+        def insert(batch: list[Document], batch_embeddings: list[list[float]], context: contextvars.Context):
+            if flask_app is None:
+                return self._insert_batch(batch, batch_embeddings, **kwargs)
+            with preserve_flask_contexts(flask_app, context_vars=context):
+                return self._insert_batch(batch, batch_embeddings, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector_create") as executor:
+            try:
+                for batch_index, batch in enumerate(batches):
+                    batch_embeddings = self._embed_batch(batch, batch_index, len(batches))
+                    while len(pending_inserts) >= max_pending_batches:
+                        pending_inserts.popleft().result()
+                    pending_inserts.append(executor.submit(insert, batch, batch_embeddings, contextvars.copy_context()))
+                while pending_inserts:
+                    pending_inserts.popleft().result()
+            finally:
+                for pending_insert in pending_inserts:
+                    pending_insert.cancel()
+
+    def _embed_batch(self, batch: list[Document], batch_index: int, total_batches: int) -> list[list[float]]:
+        batch_start = time.perf_counter()
+        logger.info("Processing batch %s/%s (%s texts)", batch_index + 1, total_batches, len(batch))
+        batch_embeddings = self._embeddings.embed_documents([document.page_content for document in batch])
+        duration = time.perf_counter() - batch_start
+        logger.info("Embedding batch %s/%s took %s s", batch_index + 1, total_batches, duration)
+        _processed_documents_counter.add(len(batch), {"stage": "embed"})
+        _stage_duration_histogram.record(duration, {"stage": "embed"})
+        return batch_embeddings
+
+    def _insert_batch(self, batch: list[Document], batch_embeddings: list[list[float]], **kwargs):
+        insert_start = time.perf_counter()
+        self._vector_processor.create(texts=batch, embeddings=batch_embeddings, **kwargs)
+        _processed_documents_counter.add(len(batch), {"stage": "insert"})
+        _stage_duration_histogram.record(time.perf_counter() - insert_start, {"stage": "insert"})
+
     def add_texts(self, documents: list[Document], **kwargs):
         if kwargs.get("duplicate_check", False):
             documents = self._filter_duplicate_texts(documents)
@@ -202,6 +263,9 @@ class Vector:
     def text_exists(self, id: str) -> bool:
         return self._vector_processor.text_exists(id)
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        return self._vector_processor.existing_ids(ids)
+
     def delete_by_ids(self, ids: list[str]) -> None:
         self._vector_processor.delete_by_ids(ids)
 
@@ -234,14 +298,13 @@ class Vector:
         return CacheEmbedding(embedding_model)
 
     def _filter_duplicate_texts(self, texts: list[Document]) -> list[Document]:
-        for text in texts.copy():
-            if text.metadata is None:
-                continue
-            doc_id = text.metadata["doc_id"]
-            if doc_id:
-                exists_duplicate_node = self.text_exists(doc_id)
-                if exists_duplicate_node:
-                    texts.remove(text)
+        doc_ids = [text.metadata["doc_id"] for text in texts if text.metadata is not None and text.metadata["doc_id"]]
+        existing_ids = self.existing_ids(doc_ids) if doc_ids else set()
+        texts[:] = [
+            text
+            for text in texts
+            if text.metadata is None or not text.metadata["doc_id"] or text.metadata["doc_id"] not in existing_ids
+        ]
 
         return texts
 
@@ -171,6 +171,31 @@ class WeaviateVector(BaseVector):
 
         return True
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        collection_name = self._collection_name
+        schema = self._default_schema(self._collection_name)
+
+        # check whether the index already exists
+        if not self._client.schema.contains(schema):
+            return set()
+
+        existing_ids: set[str] = set()
+        for i in range(0, len(ids), 100):
+            batch = ids[i : i + 100]
+            operands = [{"path": ["doc_id"], "operator": "Equal", "valueText": id} for id in batch]
+            result = (
+                self._client.query.get(collection_name, ["doc_id"])
+                .with_where({"operator": "Or", "operands": operands})
+                .with_limit(len(batch))
+                .do()
+            )
+
+            if "errors" in result:
+                raise ValueError(f"Error during query: {result['errors']}")
+
+            existing_ids.update(entry["doc_id"] for entry in result["data"]["Get"][collection_name])
+        return existing_ids
+
     def delete_by_ids(self, ids: list[str]) -> None:
         # check whether the index already exists
         schema = self._default_schema(self._collection_name)
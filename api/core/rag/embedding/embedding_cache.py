@@ -0,0 +1,225 @@
+import logging
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Optional, cast
+
+import numpy as np
+from cachetools import LRUCache
+from redis import RedisError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from configs import dify_config
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import Embedding
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Hit/miss counters of each tier of the document embedding cache."""
+
+    local_hits: int = 0
+    local_misses: int = 0
+    redis_hits: int = 0
+    redis_misses: int = 0
+    db_hits: int = 0
+    db_misses: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def incr(self, **counters: int) -> None:
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def to_dict(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "local_hits": self.local_hits,
+                "local_misses": self.local_misses,
+                "redis_hits": self.redis_hits,
+                "redis_misses": self.redis_misses,
+                "db_hits": self.db_hits,
+                "db_misses": self.db_misses,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.local_hits = self.local_misses = 0
+            self.redis_hits = self.redis_misses = 0
+            self.db_hits = self.db_misses = 0
+
+
+class EmbeddingCache:
+    """
+    Multi-tier cache of document embeddings keyed by (provider, model, text hash).
+
+    Lookups go through a process-local LRU bounded by bytes, then Redis, then the `embeddings`
+    table, which is queried with batched `IN (...)` statements. Values found in a lower tier are
+    promoted to the tiers above it.
+    """
+
+    _local_cache: Optional[LRUCache] = None
+    _local_lock = threading.Lock()
+    stats = EmbeddingCacheStats()
+
+    def __init__(self, provider_name: str, model_name: str) -> None:
+        self._provider_name = provider_name
+        self._model_name = model_name
+
+    @classmethod
+    def _get_local_cache(cls) -> Optional[LRUCache]:
+        if dify_config.EMBEDDING_CACHE_LOCAL_MAX_BYTES <= 0:
+            return None
+        if cls._local_cache is None:
+            with cls._local_lock:
+                if cls._local_cache is None:
+                    cls._local_cache = LRUCache(maxsize=dify_config.EMBEDDING_CACHE_LOCAL_MAX_BYTES, getsizeof=len)
+        return cls._local_cache
+
+    @classmethod
+    def clear_local(cls) -> None:
+        with cls._local_lock:
+            cls._local_cache = None
+
+    def _local_key(self, text_hash: str) -> tuple[str, str, str]:
+        return self._provider_name, self._model_name, text_hash
+
+    def _redis_key(self, text_hash: str) -> str:
+        return f"doc_embedding:{self._provider_name}:{self._model_name}:{text_hash}"
+
+    @staticmethod
+    def _encode(embedding: list[float]) -> bytes:
+        return np.asarray(embedding, dtype=np.float64).tobytes()
+
+    @staticmethod
+    def _decode(data: bytes) -> list[float]:
+        return cast(list[float], np.frombuffer(data, dtype=np.float64).tolist())
+
+    def get_many(self, hashes: Sequence[str]) -> dict[str, list[float]]:
+        """
+        Resolve as many hashes as possible from the cache tiers.
+
+        :param hashes: text hashes to resolve
+        :return: mapping of resolved hash to embedding, unresolved hashes are absent
+        """
+        pending = list(dict.fromkeys(hashes))
+        result: dict[str, list[float]] = {}
+        if not pending:
+            return result
+
+        pending = self._get_many_local(pending, result)
+        if pending:
+            pending = self._get_many_redis(pending, result)
+        if pending:
+            self._get_many_db(pending, result)
+        return result
+
+    def _get_many_local(self, hashes: list[str], result: dict[str, list[float]]) -> list[str]:
+        local_cache = self._get_local_cache()
+        if local_cache is None:
+            return hashes
+        missed = []
+        with self._local_lock:
+            for text_hash in hashes:
+                data = local_cache.get(self._local_key(text_hash))
+                if data is None:
+                    missed.append(text_hash)
+                else:
+                    result[text_hash] = self._decode(data)
+        self.stats.incr(local_hits=len(hashes) - len(missed), local_misses=len(missed))
+        return missed
+
+    def _get_many_redis(self, hashes: list[str], result: dict[str, list[float]]) -> list[str]:
+        if dify_config.EMBEDDING_CACHE_REDIS_TTL <= 0:
+            return hashes
+        try:
+            # pipelined GETs rather than MGET so keys may live in different cluster slots
+            pipe = redis_client.pipeline(transaction=False)
+            for text_hash in hashes:
+                pipe.get(self._redis_key(text_hash))
+            values = pipe.execute()
+        except RedisError:
+            logger.warning("Failed to read document embeddings from redis", exc_info=True)
+            return hashes
+
+        missed = []
+        found: dict[str, bytes] = {}
+        for text_hash, data in zip(hashes, values):
+            if isinstance(data, bytes) and data:
+                found[text_hash] = data
+                result[text_hash] = self._decode(data)
+            else:
+                missed.append(text_hash)
+        self.stats.incr(redis_hits=len(found), redis_misses=len(missed))
+        self._set_many_local(found)
+        return missed
+
+    def _get_many_db(self, hashes: list[str], result: dict[str, list[float]]) -> None:
+        batch_size = dify_config.EMBEDDING_CACHE_DB_BATCH_SIZE
+        found: dict[str, list[float]] = {}
+        for i in range(0, len(hashes), batch_size):
+            batch = hashes[i : i + batch_size]
+            stmt = select(Embedding).where(
+                Embedding.provider_name == self._provider_name,
+                Embedding.model_name == self._model_name,
+                Embedding.hash.in_(batch),
+            )
+            for embedding in db.session.scalars(stmt):
+                found[embedding.hash] = embedding.get_embedding()
+        result.update(found)
+        self.stats.incr(db_hits=len(found), db_misses=len(hashes) - len(found))
+        self._promote({text_hash: self._encode(embedding) for text_hash, embedding in found.items()})
+
+    def _set_many_local(self, encoded: dict[str, bytes]) -> None:
+        local_cache = self._get_local_cache()
+        if local_cache is None or not encoded:
+            return
+        with self._local_lock:
+            for text_hash, data in encoded.items():
+                try:
+                    local_cache[self._local_key(text_hash)] = data
+                except ValueError:
+                    # value larger than the whole cache
+                    pass
+
+    def _set_many_redis(self, encoded: dict[str, bytes]) -> None:
+        ttl = dify_config.EMBEDDING_CACHE_REDIS_TTL
+        if ttl <= 0 or not encoded:
+            return
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for text_hash, data in encoded.items():
+                pipe.setex(self._redis_key(text_hash), ttl, data)
+            pipe.execute()
+        except RedisError:
+            logger.warning("Failed to write document embeddings to redis", exc_info=True)
+
+    def _promote(self, encoded: dict[str, bytes]) -> None:
+        self._set_many_local(encoded)
+        self._set_many_redis(encoded)
+
+    def set_many(self, embeddings: dict[str, list[float]]) -> None:
+        """
+        Persist newly computed embeddings to every cache tier.
+
+        :param embeddings: mapping of text hash to normalized embedding
+        """
+        if not embeddings:
+            return
+        try:
+            for text_hash, embedding in embeddings.items():
+                embedding_cache = Embedding(
+                    model_name=self._model_name,
+                    hash=text_hash,
+                    provider_name=self._provider_name,
+                )
+                embedding_cache.set_embedding(embedding)
+                db.session.add(embedding_cache)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        self._promote({text_hash: self._encode(embedding) for text_hash, embedding in embeddings.items()})
@@ -0,0 +1,141 @@
+from collections import Counter
+from collections.abc import Collection, Sequence
+from typing import Optional, cast
+
+import numpy as np
+
+from configs import dify_config
+from core.rag.datasource.keyword.jieba.jieba import KeywordTableConfig
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.segment_loader import SegmentLoader
+from core.rag.models.document import Document
+
+
+class KeywordScorer:
+    """
+    TF-IDF cosine similarity of query keywords against a set of candidate documents.
+
+    The term matrix of the candidates is built once, as flat (document, term, weight) arrays,
+    so IDF, document norms and similarities are computed with a few `np.bincount` calls instead
+    of a loop over every keyword and document.
+    """
+
+    def __init__(self, documents_keywords: Sequence[Collection[str]]):
+        """
+        :param documents_keywords: keywords of each candidate document, repeated keywords count as term frequency
+        """
+        self.document_count = len(documents_keywords)
+        self._vocabulary: dict[str, int] = {}
+        rows: list[int] = []
+        columns: list[int] = []
+        frequencies: list[int] = []
+        for row, keywords in enumerate(documents_keywords):
+            for keyword, frequency in Counter(keywords).items():
+                rows.append(row)
+                columns.append(self._vocabulary.setdefault(keyword, len(self._vocabulary)))
+                frequencies.append(frequency)
+
+        self._rows = np.asarray(rows, dtype=np.int64)
+        self._columns = np.asarray(columns, dtype=np.int64)
+        document_frequencies = np.bincount(self._columns, minlength=len(self._vocabulary))
+        self._idf = np.log((1 + self.document_count) / (1 + document_frequencies)) + 1
+        self._weights = np.asarray(frequencies, dtype=np.float64) * self._idf[self._columns]
+        self._document_norms = np.sqrt(np.bincount(self._rows, weights=self._weights**2, minlength=self.document_count))
+
+    def score(self, query_keywords: Collection[str]) -> list[float]:
+        """
+        Score the candidate documents against query keywords.
+
+        :param query_keywords: keywords of the query, repeated keywords count as term frequency
+        :return: cosine similarity of each candidate document, in candidate order
+        """
+        query_weights = np.zeros(len(self._vocabulary))
+        for keyword, frequency in Counter(query_keywords).items():
+            column = self._vocabulary.get(keyword)
+            if column is not None:
+                query_weights[column] = frequency * self._idf[column]
+
+        query_norm = np.linalg.norm(query_weights)
+        if not query_norm:
+            return [0.0] * self.document_count
+
+        dot_products = np.bincount(
+            self._rows, weights=self._weights * query_weights[self._columns], minlength=self.document_count
+        )
+        denominators = self._document_norms * query_norm
+        similarities = np.divide(dot_products, denominators, out=np.zeros(self.document_count), where=denominators > 0)
+        return cast(list[float], similarities.tolist())
+
+
+def calculate_keyword_scores(query: str, documents: list[Document]) -> list[float]:
+    """
+    Score documents against the keywords of a query.
+
+    The keywords of each document are stored in its `keywords` metadata, documents already holding
+    them are not tokenized again.
+
+    :param query: search query
+    :param documents: candidate documents
+    :return: cosine similarity of each document, in document order
+    """
+    keyword_table_handler = JiebaKeywordTableHandler()
+    query_keywords = keyword_table_handler.extract_keywords(query, None)
+    documents_keywords = get_documents_keywords(documents, keyword_table_handler)
+    return KeywordScorer(documents_keywords).score(query_keywords)
+
+
+def get_documents_keywords(
+    documents: list[Document], keyword_table_handler: Optional[JiebaKeywordTableHandler] = None
+) -> list[set[str]]:
+    """
+    Get the keywords of documents, reusing the keywords stored on their segments when enabled and
+    only running jieba for the documents without any.
+
+    Stored segment keywords are the top `max_keywords_per_chunk` keywords of the segment, or the keywords
+    edited by users, while keywords extracted on every retrieval are all the tags of the content. Reusing
+    them changes the keyword scores and so the weighted rerank rankings, so when enabled, keywords of the
+    documents without stored ones are extracted with the same limit to keep the candidates comparable.
+
+    :param documents: documents
+    :param keyword_table_handler: jieba handler used for documents without known keywords
+    :return: keywords of each document, empty for documents without metadata
+    """
+    stored_keywords: dict[tuple[str, str], list[str]] = {}
+    max_keywords: Optional[int] = None
+    if dify_config.KEYWORD_SCORE_USE_SEGMENT_KEYWORDS:
+        max_keywords = KeywordTableConfig().max_keywords_per_chunk
+        wanted = [
+            (document.metadata["dataset_id"], document.metadata["doc_id"])
+            for document in documents
+            if document.metadata
+            and "keywords" not in document.metadata
+            and document.metadata.get("dataset_id")
+            and document.metadata.get("doc_id")
+        ]
+        if wanted:
+            segments, _ = SegmentLoader.load_segments(
+                dataset_ids={dataset_id for dataset_id, _ in wanted},
+                index_node_ids=list({node_id for _, node_id in wanted}),
+            )
+            stored_keywords = {
+                (segment.dataset_id, node_id): segment.keywords
+                for node_id, segment in segments.items()
+                if segment.keywords
+            }
+
+    documents_keywords = []
+    for document in documents:
+        if document.metadata is None:
+            documents_keywords.append(set())
+            continue
+        keywords = document.metadata.get("keywords")
+        dataset_id = document.metadata.get("dataset_id")
+        doc_id = document.metadata.get("doc_id")
+        if keywords is None and dataset_id and doc_id:
+            keywords = stored_keywords.get((dataset_id, doc_id))
+        if keywords is None:
+            keyword_table_handler = keyword_table_handler or JiebaKeywordTableHandler()
+            keywords = keyword_table_handler.extract_keywords(document.page_content, max_keywords)
+        document.metadata["keywords"] = set(keywords)
+        documents_keywords.append(document.metadata["keywords"])
+    return documents_keywords
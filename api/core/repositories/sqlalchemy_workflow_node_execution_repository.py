@@ -4,13 +4,16 @@ SQLAlchemy implementation of the WorkflowNodeExecutionRepository.
 
 import json
 import logging
+import threading
 from collections.abc import Sequence
 from typing import Optional, Union
 
-from sqlalchemy import UnaryExpression, asc, desc, select
+from sqlalchemy import UnaryExpression, asc, desc, inspect, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
+from configs import dify_config
 from core.model_runtime.utils.encoders import jsonable_encoder
 from core.workflow.entities.workflow_node_execution import (
     WorkflowNodeExecution,
@@ -42,6 +45,10 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
 
     This implementation also includes an in-memory cache for node executions to improve
     performance by reducing database queries.
+
+    When WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED is set, `save` only buffers the latest
+    state of each execution and `flush` persists the buffer with bulk upserts. Reads through
+    this repository flush first, so callers always see their own writes.
     """
 
     def __init__(
@@ -90,6 +97,15 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
         # Key: node_execution_id, Value: WorkflowNodeExecution (DB model)
         self._node_execution_cache: dict[str, WorkflowNodeExecutionModel] = {}
 
+        # Write-behind buffer of node executions waiting to be persisted
+        # Key: id, Value: latest WorkflowNodeExecution (DB model) for that row
+        self._write_behind = dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED
+        self._pending_executions: dict[str, WorkflowNodeExecutionModel] = {}
+        self._pending_lock = threading.Lock()
+        # Serializes flushes so an older version of a row can never overwrite a newer one
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+
     def _to_domain_model(self, db_model: WorkflowNodeExecutionModel) -> WorkflowNodeExecution:
         """
         Convert a database model to a domain model.
@@ -205,6 +221,10 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
         # Convert domain model to database model using tenant context and other attributes
         db_model = self.to_db_model(execution)
 
+        if self._write_behind:
+            self._enqueue(db_model)
+            return
+
         # Create a new database session
         with self._session_factory() as session:
             # SQLAlchemy merge intelligently handles both insert and update operations
@@ -218,6 +238,79 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
                 logger.debug("Updating cache for node_execution_id: %s", db_model.node_execution_id)
                 self._node_execution_cache[db_model.node_execution_id] = db_model
 
+    def _enqueue(self, db_model: WorkflowNodeExecutionModel) -> None:
+        """
+        Buffer a node execution for write-behind persistence.
+
+        Updates of the same execution are coalesced so only the latest state is written.
+        The buffer is flushed when it reaches the configured batch size, or after the
+        configured interval otherwise.
+        """
+        with self._pending_lock:
+            self._pending_executions[db_model.id] = db_model
+            if db_model.node_execution_id:
+                self._node_execution_cache[db_model.node_execution_id] = db_model
+            pending_count = len(self._pending_executions)
+            if pending_count < dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE and not self._flush_timer:
+                self._flush_timer = threading.Timer(
+                    dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_INTERVAL, self._flush_on_timer
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+        if pending_count >= dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE:
+            self.flush()
+
+    def _flush_on_timer(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush buffered workflow node executions")
+
+    def flush(self) -> None:
+        """
+        Persist all buffered node executions with bulk upserts.
+
+        This is a no-op when write-behind is disabled. Executions that fail to be
+        written stay buffered, unless a newer state was buffered in the meantime.
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                if self._flush_timer:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                pending = list(self._pending_executions.values())
+                self._pending_executions.clear()
+
+            if not pending:
+                return
+
+            try:
+                self._bulk_upsert(pending)
+            except Exception:
+                with self._pending_lock:
+                    for db_model in pending:
+                        self._pending_executions.setdefault(db_model.id, db_model)
+                raise
+
+    def _bulk_upsert(self, db_models: Sequence[WorkflowNodeExecutionModel]) -> None:
+        column_keys = [attr.key for attr in inspect(WorkflowNodeExecutionModel).column_attrs]
+        rows = []
+        for db_model in db_models:
+            state = inspect(db_model).dict
+            rows.append({key: state[key] for key in column_keys if key in state})
+
+        batch_size = dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE
+        with self._session_factory() as session:
+            for i in range(0, len(rows), batch_size):
+                stmt = insert(WorkflowNodeExecutionModel).values(rows[i : i + batch_size])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[WorkflowNodeExecutionModel.id],
+                    set_={key: stmt.excluded[key] for key in rows[0] if key != "id"},
+                )
+                session.execute(stmt)
+            session.commit()
+
     def get_db_models_by_workflow_run(
         self,
         workflow_run_id: str,
@@ -239,6 +332,9 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
         Returns:
             A list of WorkflowNodeExecution database models
         """
+        # Make buffered writes visible to the query
+        self.flush()
+
         with self._session_factory() as session:
             stmt = select(WorkflowNodeExecutionModel).where(
                 WorkflowNodeExecutionModel.workflow_run_id == workflow_run_id,
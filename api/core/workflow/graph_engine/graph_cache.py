@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Callable, Mapping
+from typing import Any, Optional, cast
+
+from cachetools import LRUCache
+from opentelemetry.metrics import get_meter
+
+from configs import dify_config
+from core.workflow.graph_engine.entities.graph import Graph
+
+_graph_cache_meter = get_meter("workflow_graph_cache_metrics")
+_lookups_counter = _graph_cache_meter.create_counter(
+    "workflow_graph_cache.lookups",
+    unit="{lookup}",
+    description="Number of compiled workflow graph lookups, by result",
+)
+_compile_duration_histogram = _graph_cache_meter.create_histogram(
+    "workflow_graph.compile_duration",
+    unit="s",
+    description="Time spent parsing and compiling workflow graphs",
+)
+
+
+class CompiledGraphCache:
+    """
+    Process-local cache of compiled workflow graphs.
+
+    Entries hold the parsed graph config and the `Graph` compiled from it, keyed by workflow id, version and
+    a hash of the serialized graph, so a draft edited in place never hits an outdated entry. Both are shared
+    between the runs of the workflow and must not be mutated; callers that need to modify a graph config
+    must parse their own copy with `Workflow.graph_dict`.
+    """
+
+    _entries: Optional[LRUCache] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.WORKFLOW_GRAPH_CACHE_ENABLED
+
+    @classmethod
+    def get_or_compile(
+        cls,
+        *,
+        workflow_id: str,
+        version: str,
+        serialized_graph: str,
+        compile_graph: Callable[[Mapping[str, Any]], Graph],
+    ) -> tuple[Mapping[str, Any], Graph]:
+        """
+        Get the compiled graph of a workflow, compiling it on miss.
+
+        :param workflow_id: workflow id
+        :param version: workflow version
+        :param serialized_graph: graph JSON of the workflow
+        :param compile_graph: function compiling a graph config, its errors are not cached
+        :return: parsed graph config and compiled graph
+        """
+        if not cls.is_enabled():
+            return cls._compile(serialized_graph, compile_graph)
+
+        graph_hash = hashlib.sha256(serialized_graph.encode("utf-8")).hexdigest()
+        key = (workflow_id, version, graph_hash)
+        with cls._lock:
+            if cls._entries is None:
+                cls._entries = LRUCache(maxsize=dify_config.WORKFLOW_GRAPH_CACHE_SIZE)
+            entry = cls._entries.get(key)
+        if entry is not None:
+            _lookups_counter.add(1, {"result": "hit"})
+            return cast(tuple[Mapping[str, Any], Graph], entry)
+
+        _lookups_counter.add(1, {"result": "miss"})
+        entry = cls._compile(serialized_graph, compile_graph)
+        with cls._lock:
+            cls._entries[key] = entry
+        return entry
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._entries = None
+
+    @staticmethod
+    def _compile(
+        serialized_graph: str, compile_graph: Callable[[Mapping[str, Any]], Graph]
+    ) -> tuple[Mapping[str, Any], Graph]:
+        start_at = time.perf_counter()
+        graph_config = json.loads(serialized_graph) if serialized_graph else {}
+        graph = compile_graph(graph_config)
+        _compile_duration_histogram.record(time.perf_counter() - start_at)
+        return graph_config, graph
@@ -4,7 +4,7 @@ import queue
 import time
 import uuid
 from collections.abc import Generator, Mapping
-from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import Future, wait
 from copy import copy, deepcopy
 from datetime import UTC, datetime
 from typing import Any, Optional, cast
@@ -42,6 +42,7 @@ from core.workflow.graph_engine.entities.graph import Graph, GraphEdge
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
 from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
+from core.workflow.graph_engine.parallel_scheduler import TaskGroup, WorkflowParallelScheduler
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.agent.agent_node import AgentNode
 from core.workflow.nodes.agent.entities import AgentNodeData
@@ -59,24 +60,41 @@ from models.workflow import WorkflowType
 logger = logging.getLogger(__name__)
 
 
-class GraphEngineThreadPool(ThreadPoolExecutor):
+class GraphEngineThreadPool:
+    """
+    Task group of a workflow run or parallel iteration on the process-wide `WorkflowParallelScheduler`.
+
+    `max_workers` bounds the tasks of the group running at the same time, the threads themselves are
+    shared by all groups of the process.
+    """
+
     def __init__(
         self,
         max_workers=None,
-        thread_name_prefix="",
-        initializer=None,
-        initargs=(),
         max_submit_count=dify_config.MAX_SUBMIT_COUNT,
+        scheduler: Optional[WorkflowParallelScheduler] = None,
     ) -> None:
-        super().__init__(max_workers, thread_name_prefix, initializer, initargs)
+        self.scheduler = scheduler or WorkflowParallelScheduler.get_instance()
+        self.max_workers = min(
+            max_workers or dify_config.WORKFLOW_PARALLEL_MAX_WORKERS_PER_RUN,
+            dify_config.WORKFLOW_PARALLEL_MAX_WORKERS_PER_RUN,
+        )
+        self.task_group = TaskGroup(max_workers=self.max_workers)
         self.max_submit_count = max_submit_count
         self.submit_count = 0
 
-    def submit(self, fn, /, *args, **kwargs):
+    def submit(self, fn, /, *args, **kwargs) -> Future:
         self.submit_count += 1
         self.check_is_full()
 
-        return super().submit(fn, *args, **kwargs)
+        return self.scheduler.submit(self.task_group, fn, *args, **kwargs)
+
+    def run_pending(self, futures: list[Future]) -> bool:
+        """
+        Run one of the given tasks in the calling thread if it did not get a worker yet,
+        must be called periodically by a thread waiting for its tasks.
+        """
+        return self.scheduler.run_pending(futures)
 
     def task_done_callback(self, future):
         self.submit_count -= 1
@@ -107,7 +125,7 @@ class GraphEngine:
         thread_pool_id: Optional[str] = None,
     ) -> None:
         thread_pool_max_submit_count = dify_config.MAX_SUBMIT_COUNT
-        thread_pool_max_workers = 10
+        thread_pool_max_workers = dify_config.WORKFLOW_PARALLEL_MAX_WORKERS_PER_RUN
 
         # init thread pool
         if thread_pool_id:
@@ -518,6 +536,8 @@ class GraphEngine:
                     elif isinstance(event, ParallelBranchRunFailedEvent):
                         raise GraphRunFailedError(event.error)
             except queue.Empty:
+                # branches still waiting for a worker are run here instead of blocking this thread
+                self.thread_pool.run_pending(futures)
                 continue
 
         # wait all threads
@@ -0,0 +1,227 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any, Optional
+
+from opentelemetry.metrics import get_meter
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+# seconds an idle worker thread waits for a task before exiting
+_WORKER_IDLE_TIMEOUT = 60
+
+_scheduler_meter = get_meter("workflow_parallel_scheduler_metrics")
+_queued_tasks_counter = _scheduler_meter.create_up_down_counter(
+    "workflow_parallel_scheduler.queued_tasks",
+    unit="{task}",
+    description="Number of parallel branch and iteration tasks waiting for a worker",
+)
+_running_tasks_counter = _scheduler_meter.create_up_down_counter(
+    "workflow_parallel_scheduler.running_tasks",
+    unit="{task}",
+    description="Number of parallel branch and iteration tasks running on a worker",
+)
+_queue_wait_histogram = _scheduler_meter.create_histogram(
+    "workflow_parallel_scheduler.queue_wait",
+    unit="s",
+    description="Time parallel branch and iteration tasks spend waiting for a worker",
+)
+
+
+class _ScheduledTask:
+    __slots__ = ("group", "future", "fn", "args", "kwargs", "submitted_at")
+
+    def __init__(self, group: "TaskGroup", future: Future, fn: Callable, args: tuple, kwargs: dict[str, Any]):
+        self.group = group
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.submitted_at = time.perf_counter()
+
+    def run(self) -> None:
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class TaskGroup:
+    """
+    Tasks of a workflow run or parallel iteration, at most `max_workers` of them run on workers at the same time.
+    """
+
+    __slots__ = ("max_workers", "pending", "running")
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.pending: deque[_ScheduledTask] = deque()
+        self.running = 0
+
+
+class WorkflowParallelScheduler:
+    """
+    Process-wide scheduler of parallel branches and parallel iterations.
+
+    Every workflow run and parallel iteration submits its tasks as a `TaskGroup` with its own concurrency
+    limit, all groups share a single set of at most `WORKFLOW_PARALLEL_MAX_WORKERS` worker threads, and free
+    workers pick tasks from the groups in round-robin order, so a run with many branches can not starve
+    the other runs of the process.
+
+    A task waiting for its own sub-tasks must call `run_pending` while it waits: sub-tasks that did not get
+    a worker yet are then run by the waiting thread, so nested parallels can not deadlock the bounded pool.
+    """
+
+    _instance: Optional["WorkflowParallelScheduler"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        # groups with pending tasks, in the order they are served
+        self._groups: OrderedDict[int, TaskGroup] = OrderedDict()
+        self._tasks: dict[Future, _ScheduledTask] = {}
+        self._condition = threading.Condition()
+        self._workers = 0
+        self._idle_workers = 0
+        self._queued = 0
+        self._running = 0
+        self._worker_ids = itertools.count(1)
+
+    @classmethod
+    def get_instance(cls) -> "WorkflowParallelScheduler":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(max_workers=dify_config.WORKFLOW_PARALLEL_MAX_WORKERS)
+        return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        # worker threads do not survive a fork, the child must start from a fresh scheduler
+        cls._instance = None
+        cls._instance_lock = threading.Lock()
+
+    def submit(self, group: TaskGroup, fn: Callable, /, *args, **kwargs) -> Future:
+        """
+        Submit a task of a group.
+
+        :param group: task group
+        :param fn: callable to run
+        :return: future of the result of the callable
+        """
+        future: Future = Future()
+        task = _ScheduledTask(group=group, future=future, fn=fn, args=args, kwargs=kwargs)
+        with self._condition:
+            group.pending.append(task)
+            self._groups.setdefault(id(group), group)
+            self._tasks[future] = task
+            self._queued += 1
+            self._condition.notify()
+            if self._queued > self._idle_workers and self._workers < self.max_workers:
+                self._start_worker()
+        _queued_tasks_counter.add(1)
+        return future
+
+    def run_pending(self, futures: list[Future]) -> bool:
+        """
+        Run, in the calling thread, the first of the given tasks that did not get a worker yet.
+
+        :param futures: futures returned by `submit`
+        :return: True if a task was run
+        """
+        with self._condition:
+            task = None
+            for future in futures:
+                task = self._tasks.pop(future, None)
+                if task is not None:
+                    task.group.pending.remove(task)
+                    if not task.group.pending:
+                        del self._groups[id(task.group)]
+                    self._queued -= 1
+                    break
+        if task is None:
+            return False
+
+        _queued_tasks_counter.add(-1)
+        _queue_wait_histogram.record(time.perf_counter() - task.submitted_at)
+        if task.future.set_running_or_notify_cancel():
+            task.run()
+        return True
+
+    def stats(self) -> dict[str, int]:
+        with self._condition:
+            return {
+                "workers": self._workers,
+                "idle_workers": self._idle_workers,
+                "queued_tasks": self._queued,
+                "running_tasks": self._running,
+                "queued_groups": len(self._groups),
+            }
+
+    def _start_worker(self) -> None:
+        self._workers += 1
+        thread = threading.Thread(
+            target=self._work, name=f"WorkflowParallelWorker-{next(self._worker_ids)}", daemon=True
+        )
+        thread.start()
+
+    def _next_task(self) -> Optional[_ScheduledTask]:
+        for group_id, group in self._groups.items():
+            if group.running < group.max_workers:
+                task = group.pending.popleft()
+                del self._tasks[task.future]
+                if group.pending:
+                    # the group goes to the back of the line, the next free worker serves another group first
+                    self._groups.move_to_end(group_id)
+                else:
+                    del self._groups[group_id]
+                group.running += 1
+                self._queued -= 1
+                self._running += 1
+                return task
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                task = self._next_task()
+                idle_since = time.monotonic()
+                while task is None:
+                    remaining = _WORKER_IDLE_TIMEOUT - (time.monotonic() - idle_since)
+                    if remaining <= 0:
+                        self._workers -= 1
+                        return
+                    self._idle_workers += 1
+                    self._condition.wait(remaining)
+                    self._idle_workers -= 1
+                    task = self._next_task()
+
+            _queued_tasks_counter.add(-1)
+            _queue_wait_histogram.record(time.perf_counter() - task.submitted_at)
+            _running_tasks_counter.add(1)
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    task.run()
+            except Exception:
+                logger.exception("Unexpected error in workflow parallel scheduler worker")
+            finally:
+                _running_tasks_counter.add(-1)
+                with self._condition:
+                    task.group.running -= 1
+                    self._running -= 1
+                    if task.group.pending:
+                        # a task of the group may have been held back by the concurrency limit of the group
+                        self._condition.notify()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=WorkflowParallelScheduler.reset_instance)
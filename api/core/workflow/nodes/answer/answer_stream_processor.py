@@ -20,7 +20,8 @@ logger = logging.getLogger(__name__)
 class AnswerStreamProcessor(StreamProcessor):
     def __init__(self, graph: Graph, variable_pool: VariablePool) -> None:
         super().__init__(graph, variable_pool)
-        self.generate_routes = graph.answer_stream_generate_routes
+        # the dependencies are consumed while streaming, and compiled graphs are shared between runs
+        self.generate_routes = graph.answer_stream_generate_routes.model_copy(deep=True)
         self.route_position = {}
         for answer_node_id in self.generate_routes.answer_generate_route:
             self.route_position[answer_node_id] = 0
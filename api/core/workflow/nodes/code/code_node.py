@@ -2,6 +2,7 @@ from collections.abc import Mapping, Sequence
 from decimal import Decimal
 from typing import Any, Optional
 
+import contexts
 from configs import dify_config
 from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage
 from core.helper.code_executor.code_node_provider import CodeNodeProvider
@@ -9,6 +10,7 @@ from core.helper.code_executor.javascript.javascript_code_provider import Javasc
 from core.helper.code_executor.python3.python3_code_provider import Python3CodeProvider
 from core.variables.segments import ArrayFileSegment
 from core.workflow.entities.node_entities import NodeRunResult
+from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.base.entities import BaseNodeData, RetryConfig
@@ -74,21 +76,19 @@ class CodeNode(BaseNode):
         code = self._node_data.code
 
         # Get variables
-        variables = {}
-        for variable_selector in self._node_data.variables:
-            variable_name = variable_selector.variable
-            variable = self.graph_runtime_state.variable_pool.get(variable_selector.value_selector)
-            if isinstance(variable, ArrayFileSegment):
-                variables[variable_name] = [v.to_dict() for v in variable.value] if variable.value else None
-            else:
-                variables[variable_name] = variable.to_object() if variable else None
+        variables = self.fetch_inputs(self._node_data, self.graph_runtime_state.variable_pool)
         # Run code
         try:
-            result = CodeExecutor.execute_workflow_code_template(
-                language=code_language,
-                code=code,
-                inputs=variables,
-            )
+            prefetched_results = contexts.code_execution_prefetched_results.get(None)
+            result = prefetched_results.pop(self.node_id, variables) if prefetched_results else None
+            if isinstance(result, CodeExecutionError):
+                raise result
+            if result is None:
+                result = CodeExecutor.execute_workflow_code_template(
+                    language=code_language,
+                    code=code,
+                    inputs=variables,
+                )
 
             # Transform result
             result = self._transform_result(result=result, output_schema=self._node_data.outputs)
@@ -99,6 +99,24 @@ class CodeNode(BaseNode):
 
         return NodeRunResult(status=WorkflowNodeExecutionStatus.SUCCEEDED, inputs=variables, outputs=result)
 
+    @staticmethod
+    def fetch_inputs(node_data: CodeNodeData, variable_pool: VariablePool) -> dict[str, Any]:
+        """
+        Fetch the inputs of the code from the variable pool
+        :param node_data: node data
+        :param variable_pool: variable pool
+        :return: inputs
+        """
+        variables: dict[str, Any] = {}
+        for variable_selector in node_data.variables:
+            variable_name = variable_selector.variable
+            variable = variable_pool.get(variable_selector.value_selector)
+            if isinstance(variable, ArrayFileSegment):
+                variables[variable_name] = [v.to_dict() for v in variable.value] if variable.value else None
+            else:
+                variables[variable_name] = variable.to_object() if variable else None
+        return variables
+
     def _check_string(self, value: str | None, variable: str) -> str | None:
         """
         Check string
@@ -0,0 +1,60 @@
+import json
+import threading
+from collections import defaultdict, deque
+from collections.abc import Mapping
+from typing import Any, Optional
+
+from core.helper.code_executor.code_executor import CodeExecutionError
+from core.variables.utils import SegmentJSONEncoder
+
+
+class PrefetchedCodeResults:
+    """
+    Results of a Code node executed ahead of the iterations running it, in batches of items.
+
+    The iteration node fills it and publishes it with `contexts.code_execution_prefetched_results`, and each
+    run of the Code node takes the result of its inputs instead of calling the code execution service.
+    Results are taken once, so retries and inputs missing from the batches are executed as usual.
+    """
+
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+        self._results: defaultdict[str, deque[Mapping[str, Any] | CodeExecutionError]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def add(self, inputs: Mapping[str, Any], result: Mapping[str, Any] | CodeExecutionError) -> None:
+        key = self._key(inputs)
+        with self._lock:
+            self._results[key].append(result)
+
+    def pop(self, node_id: str, inputs: Mapping[str, Any]) -> Optional[Mapping[str, Any] | CodeExecutionError]:
+        """
+        Take the prefetched result of an execution of the node.
+
+        :param node_id: node id
+        :param inputs: inputs of the execution
+        :return: result or error of the execution, None if it was not prefetched
+        """
+        if node_id != self.node_id:
+            return None
+        key = self._key(inputs)
+        with self._lock:
+            results = self._results.get(key)
+            if not results:
+                return None
+            result = results.popleft()
+            if not results:
+                del self._results[key]
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(results) for results in self._results.values())
+
+    @staticmethod
+    def _key(inputs: Mapping[str, Any]) -> str:
+        return json.dumps(inputs, ensure_ascii=False, sort_keys=True, cls=SegmentJSONEncoder)
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import time
+import zlib
+from typing import Optional
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+from extensions.ext_storage import storage
+
+logger = logging.getLogger(__name__)
+
+# bump whenever the text extracted from a file type changes, so texts cached by older versions are not reused
+EXTRACTOR_VERSION = "1"
+
+
+class ExtractedTextCache:
+    """
+    Content-addressed cache of the texts extracted by the document extractor node.
+
+    Entries are keyed by the sha3-256 hash of the file content, the file type the extractor is chosen by and
+    `EXTRACTOR_VERSION`. Compressed texts up to DOCUMENT_EXTRACTOR_CACHE_REDIS_MAX_SIZE are stored in Redis,
+    larger ones in the storage with a Redis entry pointing to them. Both expire after
+    DOCUMENT_EXTRACTOR_CACHE_TTL, expired storage objects are deleted by later writes.
+    """
+
+    _INLINE = b"i"
+    _STORED = b"s"
+    _EXPIRATIONS_KEY = "document_extractor_text:storage_expirations"
+    _STORAGE_PREFIX = "document_extractor_cache"
+    _SWEEP_BATCH_SIZE = 20
+
+    def __init__(self, content_hash: str, file_type: str):
+        entry_id = hashlib.sha256(f"{EXTRACTOR_VERSION}:{file_type}:{content_hash}".encode()).hexdigest()
+        self.entry_id = entry_id
+        self.cache_key = f"document_extractor_text:{entry_id}"
+        self.storage_path = f"{self._STORAGE_PREFIX}/{entry_id}"
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.DOCUMENT_EXTRACTOR_CACHE_ENABLED
+
+    def get(self) -> Optional[str]:
+        """
+        Get the cached text.
+
+        :return: extracted text, None on miss
+        """
+        try:
+            entry = redis_client.get(self.cache_key)
+            if not entry:
+                return None
+            if entry[:1] == self._STORED:
+                compressed = storage.load_once(self.storage_path)
+            else:
+                compressed = entry[1:]
+            return zlib.decompress(compressed).decode("utf-8")
+        except FileNotFoundError:
+            redis_client.delete(self.cache_key)
+        except Exception:
+            logger.warning("Failed to read cached extracted text %s", self.entry_id, exc_info=True)
+        return None
+
+    def set(self, text: str) -> None:
+        """
+        Cache an extracted text, unless it is larger than DOCUMENT_EXTRACTOR_CACHE_MAX_TEXT_SIZE.
+
+        :param text: extracted text
+        """
+        encoded = text.encode("utf-8")
+        if len(encoded) > dify_config.DOCUMENT_EXTRACTOR_CACHE_MAX_TEXT_SIZE:
+            return
+
+        ttl = dify_config.DOCUMENT_EXTRACTOR_CACHE_TTL
+        compressed = zlib.compress(encoded)
+        try:
+            if len(compressed) <= dify_config.DOCUMENT_EXTRACTOR_CACHE_REDIS_MAX_SIZE:
+                redis_client.setex(self.cache_key, ttl, self._INLINE + compressed)
+                return
+
+            storage.save(self.storage_path, compressed)
+            redis_client.setex(self.cache_key, ttl, self._STORED)
+            redis_client.zadd(self._EXPIRATIONS_KEY, {self.entry_id: time.time() + ttl})
+            self._sweep_expired_storage_entries()
+        except Exception:
+            logger.warning("Failed to cache extracted text %s", self.entry_id, exc_info=True)
+
+    @classmethod
+    def _sweep_expired_storage_entries(cls) -> None:
+        expired_entry_ids = redis_client.zrangebyscore(
+            cls._EXPIRATIONS_KEY, 0, time.time(), start=0, num=cls._SWEEP_BATCH_SIZE
+        )
+        for entry_id in expired_entry_ids:
+            if isinstance(entry_id, bytes):
+                entry_id = entry_id.decode("utf-8")
+            try:
+                storage.delete(f"{cls._STORAGE_PREFIX}/{entry_id}")
+            except Exception:
+                logger.warning("Failed to delete expired extracted text %s", entry_id, exc_info=True)
+            redis_client.zrem(cls._EXPIRATIONS_KEY, entry_id)
@@ -1,10 +1,12 @@
 import csv
+import hashlib
 import io
 import json
 import logging
 import os
 import tempfile
-from collections.abc import Mapping, Sequence
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager
 from typing import Any, Optional, cast
 
 import chardet
@@ -19,6 +21,8 @@ from docx.oxml.table import CT_Tbl
 from docx.oxml.text.paragraph import CT_P
 from docx.table import Table
 from docx.text.paragraph import Paragraph
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 from configs import dify_config
 from core.file import File, FileTransferMethod, file_manager
@@ -30,7 +34,10 @@ from core.workflow.entities.workflow_node_execution import WorkflowNodeExecution
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.base.entities import BaseNodeData, RetryConfig
 from core.workflow.nodes.enums import ErrorStrategy, NodeType
+from extensions.ext_database import db
+from models.model import UploadFile
 
+from .cache import ExtractedTextCache
 from .entities import DocumentExtractorNodeData
 from .exc import DocumentExtractorError, FileDownloadError, TextExtractionError, UnsupportedFileTypeError
 
@@ -264,17 +271,18 @@ def _extract_text_from_yaml(file_content: bytes) -> str:
             raise TextExtractionError(f"Failed to decode or parse YAML file: {e}") from e
 
 
-def _extract_text_from_pdf(file_content: bytes) -> str:
+def _extract_text_from_pdf(file_content: bytes | str) -> str:
+    """Extract text from the content of a PDF file, or from the PDF file at a path, page by page."""
     try:
-        pdf_file = io.BytesIO(file_content)
+        pdf_file = io.BytesIO(file_content) if isinstance(file_content, bytes) else file_content
         pdf_document = pypdfium2.PdfDocument(pdf_file, autoclose=True)
-        text = ""
+        texts = []
         for page in pdf_document:
             text_page = page.get_textpage()
-            text += text_page.get_text_range()
+            texts.append(text_page.get_text_range())
             text_page.close()
             page.close()
-        return text
+        return "".join(texts)
     except Exception as e:
         raise TextExtractionError(f"Failed to extract text from PDF: {str(e)}") from e
 
@@ -388,16 +396,100 @@ def _download_file_content(file: File) -> bytes:
 
 
 def _extract_text_from_file(file: File):
-    file_content = _download_file_content(file)
-    if file.extension:
-        extracted_text = _extract_text_by_file_extension(file_content=file_content, file_extension=file.extension)
-    elif file.mime_type:
-        extracted_text = _extract_text_by_mime_type(file_content=file_content, mime_type=file.mime_type)
-    else:
+    file_type = file.extension or file.mime_type
+    if not file_type:
         raise UnsupportedFileTypeError("Unable to determine file type: MIME type or file extension is missing")
+
+    if not ExtractedTextCache.is_enabled():
+        return _download_and_extract_text(file)
+
+    # files uploaded to dify have a stored content hash, their cached text is found without downloading them
+    content_hash = _get_upload_file_hash(file)
+    if content_hash is None:
+        return _download_and_extract_text(file, use_cache=True)
+
+    cache = ExtractedTextCache(content_hash=content_hash, file_type=file_type)
+    extracted_text = cache.get()
+    if extracted_text is None:
+        extracted_text = _download_and_extract_text(file)
+        cache.set(extracted_text)
+    return extracted_text
+
+
+def _download_and_extract_text(file: File, use_cache: bool = False) -> str:
+    file_type = cast(str, file.extension or file.mime_type)
+    cache = None
+    if _is_streamed(file):
+        with _download_file_to_temporary_path(file) as (file_path, content_hash):
+            if use_cache:
+                cache = ExtractedTextCache(content_hash=content_hash, file_type=file_type)
+                if (extracted_text := cache.get()) is not None:
+                    return extracted_text
+            extracted_text = _extract_text_from_path(file_path=file_path, file_type=file_type)
+    else:
+        file_content = _download_file_content(file)
+        if use_cache:
+            cache = ExtractedTextCache(content_hash=hashlib.sha3_256(file_content).hexdigest(), file_type=file_type)
+            if (extracted_text := cache.get()) is not None:
+                return extracted_text
+        if file.extension:
+            extracted_text = _extract_text_by_file_extension(file_content=file_content, file_extension=file.extension)
+        else:
+            extracted_text = _extract_text_by_mime_type(file_content=file_content, mime_type=file_type)
+
+    if cache:
+        cache.set(extracted_text)
     return extracted_text
 
 
+def _get_upload_file_hash(file: File) -> Optional[str]:
+    """Get the stored content hash of an uploaded file, computed with sha3-256 on upload."""
+    if file.transfer_method != FileTransferMethod.LOCAL_FILE or not file.related_id:
+        return None
+    with Session(db.engine) as session:
+        stmt = select(UploadFile.hash).where(UploadFile.id == file.related_id, UploadFile.tenant_id == file.tenant_id)
+        return session.scalar(stmt)
+
+
+_STREAMED_FILE_TYPES = {
+    ".pdf": "pdf",
+    "application/pdf": "pdf",
+    ".xls": "excel",
+    ".xlsx": "excel",
+    "application/vnd.ms-excel": "excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "excel",
+}
+
+
+def _is_streamed(file: File) -> bool:
+    """Whether a file is large enough to be extracted from a temporary file rather than from memory."""
+    file_type = file.extension or file.mime_type
+    return file_type in _STREAMED_FILE_TYPES and file.size >= dify_config.DOCUMENT_EXTRACTOR_STREAMING_THRESHOLD
+
+
+@contextmanager
+def _download_file_to_temporary_path(file: File) -> Iterator[tuple[str, str]]:
+    """Download the content of a file chunk by chunk to a temporary file, yielding its path and content hash."""
+    content_hash = hashlib.sha3_256()
+    with tempfile.NamedTemporaryFile(suffix=file.extension or "") as temp_file:
+        try:
+            for chunk in file_manager.download_stream(file):
+                content_hash.update(chunk)
+                temp_file.write(chunk)
+            temp_file.flush()
+        except Exception as e:
+            raise FileDownloadError(f"Error downloading file: {str(e)}") from e
+        yield temp_file.name, content_hash.hexdigest()
+
+
+def _extract_text_from_path(*, file_path: str, file_type: str) -> str:
+    match _STREAMED_FILE_TYPES[file_type]:
+        case "pdf":
+            return _extract_text_from_pdf(file_path)
+        case _:
+            return _extract_text_from_excel(file_path)
+
+
 def _extract_text_from_csv(file_content: bytes) -> str:
     try:
         # Detect encoding using chardet
@@ -437,8 +529,8 @@ def _extract_text_from_csv(file_content: bytes) -> str:
         raise TextExtractionError(f"Failed to extract text from CSV: {str(e)}") from e
 
 
-def _extract_text_from_excel(file_content: bytes) -> str:
-    """Extract text from an Excel file using pandas."""
+def _extract_text_from_excel(file_content: bytes | str) -> str:
+    """Extract text from the content of an Excel file, or from the Excel file at a path, using pandas."""
 
     def _construct_markdown_table(df: pd.DataFrame) -> str:
         """Manually construct a Markdown table from a DataFrame."""
@@ -459,7 +551,7 @@ def _extract_text_from_excel(file_content: bytes) -> str:
         return markdown_table
 
     try:
-        excel_file = pd.ExcelFile(io.BytesIO(file_content))
+        excel_file = pd.ExcelFile(io.BytesIO(file_content) if isinstance(file_content, bytes) else file_content)
         markdown_table = ""
         for sheet_name in excel_file.sheet_names:
             try:
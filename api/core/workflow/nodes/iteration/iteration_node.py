@@ -10,7 +10,9 @@ from typing import TYPE_CHECKING, Any, Optional, cast
 
 from flask import Flask, current_app
 
+import contexts
 from configs import dify_config
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor
 from core.variables import ArrayVariable, IntegerVariable, NoneVariable
 from core.variables.segments import ArrayAnySegment, ArraySegment
 from core.workflow.entities.node_entities import (
@@ -37,6 +39,9 @@ from core.workflow.graph_engine.entities.event import (
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.base.entities import BaseNodeData, RetryConfig
+from core.workflow.nodes.code import CodeNode
+from core.workflow.nodes.code.entities import CodeNodeData
+from core.workflow.nodes.code.prefetch import PrefetchedCodeResults
 from core.workflow.nodes.enums import ErrorStrategy, NodeType
 from core.workflow.nodes.event import NodeEvent, RunCompletedEvent
 from core.workflow.nodes.iteration.entities import ErrorHandleMode, IterationNodeData
@@ -203,7 +208,17 @@ class IterationNode(BaseNode):
         )
         iter_run_map: dict[str, float] = {}
         outputs: list[Any] = [None] * len(iterator_list_value)
+        previous_prefetched_code_results = contexts.code_execution_prefetched_results.get(None)
+        prefetched_code_results = None
         try:
+            prefetched_code_results = self._prefetch_code_results(
+                iteration_graph=iteration_graph,
+                variable_pool=variable_pool,
+                iterator_list_value=iterator_list_value,
+            )
+            if prefetched_code_results:
+                contexts.code_execution_prefetched_results.set(prefetched_code_results)
+
             if self._node_data.is_parallel:
                 futures: list[Future] = []
                 q: Queue = Queue()
@@ -239,20 +254,20 @@ class IterationNode(BaseNode):
                             if succeeded_count == len(futures):
                                 q.put(None)
                         yield event
-                        if isinstance(event, RunCompletedEvent):
+                        if isinstance(event, RunCompletedEvent | IterationRunFailedEvent):
                             q.put(None)
                             for f in futures:
                                 if not f.done():
                                     f.cancel()
                             yield event
-                        if isinstance(event, IterationRunFailedEvent):
-                            q.put(None)
-                            yield event
                     except Empty:
+                        # iterations still waiting for a worker are run here instead of blocking this thread
+                        thread_pool.run_pending(futures)
                         continue
 
-                # wait all threads
-                wait(futures)
+                # wait all threads, releasing the iterations that never got a worker from the scheduler
+                while wait(futures, timeout=1).not_done:
+                    thread_pool.run_pending(futures)
             else:
                 for _ in range(len(iterator_list_value)):
                     yield from self._run_single_iter(
@@ -318,10 +333,62 @@ class IterationNode(BaseNode):
                 )
             )
         finally:
+            if prefetched_code_results is not None:
+                # worker threads of parallel iterations may keep a reference, results must not outlive the run
+                prefetched_code_results.clear()
+            contexts.code_execution_prefetched_results.set(previous_prefetched_code_results)
             # remove iteration variable (item, index) from variable pool after iteration run completed
             variable_pool.remove([self.node_id, "index"])
             variable_pool.remove([self.node_id, "item"])
 
+    def _prefetch_code_results(
+        self, *, iteration_graph: Graph, variable_pool: VariablePool, iterator_list_value: Sequence[Any]
+    ) -> Optional[PrefetchedCodeResults]:
+        """
+        Execute the Code node of an iteration whose body is that single node for all items ahead of the
+        iterations, in batches of CODE_EXECUTION_BATCH_SIZE items per code execution request.
+
+        :return: prefetched results, None if the iteration can not be batched
+        """
+        if not dify_config.CODE_EXECUTION_BATCH_ENABLED or len(iterator_list_value) < 2:
+            return None
+
+        body_node_ids = [node_id for node_id in iteration_graph.node_ids if node_id != iteration_graph.root_node_id]
+        if len(body_node_ids) != 1 or self._node_data.output_selector[:1] != body_node_ids:
+            return None
+        node_data = iteration_graph.node_id_config_mapping[body_node_ids[0]].get("data", {})
+        if node_data.get("type") != NodeType.CODE:
+            return None
+        code_node_data = CodeNodeData.model_validate(node_data)
+        if not CodeExecutor.supports_batch(code_node_data.code_language):
+            return None
+
+        # the inputs only depend on the item and index, the body does not change any other variable
+        inputs_list = []
+        for index, item in enumerate(iterator_list_value):
+            variable_pool.add([self.node_id, "index"], index)
+            variable_pool.add([self.node_id, "item"], item)
+            inputs_list.append(CodeNode.fetch_inputs(code_node_data, variable_pool))
+        variable_pool.add([self.node_id, "index"], 0)
+        variable_pool.add([self.node_id, "item"], iterator_list_value[0])
+
+        prefetched_results = PrefetchedCodeResults(node_id=body_node_ids[0])
+        batch_size = dify_config.CODE_EXECUTION_BATCH_SIZE
+        for start in range(0, len(inputs_list), batch_size):
+            batch = inputs_list[start : start + batch_size]
+            try:
+                results = CodeExecutor.execute_workflow_code_template_batch(
+                    language=code_node_data.code_language, code=code_node_data.code, inputs_list=batch
+                )
+            except CodeExecutionError:
+                # items of a failed batch are executed one by one by their iteration
+                logger.warning("Failed to execute a batch of iteration %s items", self.node_id, exc_info=True)
+                continue
+            for inputs, result in zip(batch, results):
+                prefetched_results.add(inputs, result)
+
+        return prefetched_results
+
     @classmethod
     def _extract_variable_selector_to_variable_mapping(
         cls,
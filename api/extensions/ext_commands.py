@@ -13,6 +13,7 @@ def init_app(app: DifyApp):
         fix_app_site_missing,
         install_plugins,
         migrate_data_for_plugin,
+        migrate_keyword_index,
         old_metadata_migration,
         remove_orphaned_files_on_storage,
         reset_email,
@@ -28,6 +29,7 @@ def init_app(app: DifyApp):
         reset_email,
         reset_encrypt_key_pair,
         vdb_migrate,
+        migrate_keyword_index,
         convert_to_agent_apps,
         add_qdrant_index,
         create_tenant,
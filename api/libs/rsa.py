@@ -1,11 +1,14 @@
 import hashlib
 import os
-from typing import Union
+import threading
+from typing import Optional, Union
 
+from cachetools import TTLCache
 from Crypto.Cipher import AES
 from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
 
+from configs import dify_config
 from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from libs import gmpy2_pkcs10aep_cipher
@@ -21,6 +24,8 @@ def generate_key_pair(tenant_id: str) -> str:
     filepath = os.path.join("privkeys", tenant_id, "private.pem")
 
     storage.save(filepath, pem_private)
+    redis_client.delete(_privkey_cache_key(filepath))
+    DecryptionCache.invalidate(tenant_id)
 
     return pem_public.decode()
 
@@ -47,10 +52,19 @@ def encrypt(text: str, public_key: Union[str, bytes]) -> bytes:
     return prefix_hybrid + encrypted_data
 
 
+def _privkey_cache_key(filepath: str) -> str:
+    return f"tenant_privkey:{hashlib.sha3_256(filepath.encode()).hexdigest()}"
+
+
 def get_decrypt_decoding(tenant_id: str) -> tuple[RSA.RsaKey, object]:
+    if DecryptionCache.is_enabled():
+        decoding = DecryptionCache.get_decoding(tenant_id)
+        if decoding is not None:
+            return decoding
+
     filepath = os.path.join("privkeys", tenant_id, "private.pem")
 
-    cache_key = f"tenant_privkey:{hashlib.sha3_256(filepath.encode()).hexdigest()}"
+    cache_key = _privkey_cache_key(filepath)
     private_key = redis_client.get(cache_key)
     if not private_key:
         try:
@@ -63,10 +77,26 @@ def get_decrypt_decoding(tenant_id: str) -> tuple[RSA.RsaKey, object]:
     rsa_key = RSA.import_key(private_key)
     cipher_rsa = gmpy2_pkcs10aep_cipher.new(rsa_key)
 
+    if DecryptionCache.is_enabled():
+        DecryptionCache.set_decoding(tenant_id, (rsa_key, cipher_rsa))
+
     return rsa_key, cipher_rsa
 
 
 def decrypt_token_with_decoding(encrypted_text: bytes, rsa_key: RSA.RsaKey, cipher_rsa) -> str:
+    if not DecryptionCache.is_enabled():
+        return _decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa)
+
+    # the modulus scopes the entry to the key, a text encrypted for a rotated key is never served for the new one
+    text_key = (rsa_key.n, hashlib.sha256(encrypted_text).digest())
+    decrypted_text = DecryptionCache.get_text(text_key)
+    if decrypted_text is None:
+        decrypted_text = _decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa)
+        DecryptionCache.set_text(text_key, decrypted_text)
+    return decrypted_text
+
+
+def _decrypt_token_with_decoding(encrypted_text: bytes, rsa_key: RSA.RsaKey, cipher_rsa) -> str:
     if encrypted_text.startswith(prefix_hybrid):
         encrypted_text = encrypted_text[len(prefix_hybrid) :]
 
@@ -93,3 +123,72 @@ def decrypt(encrypted_text: bytes, tenant_id: str) -> str:
 
 class PrivkeyNotFoundError(Exception):
     pass
+
+
+class DecryptionCache:
+    """
+    Process-local cache of the parsed private keys of tenants and of the texts decrypted with them.
+
+    Both expire after DECRYPTION_CACHE_TTL. Decrypted texts are keyed by the modulus of the private key and a
+    digest of the encrypted text. `invalidate` drops the key of a tenant in the current process when it is
+    rotated; other processes pick the new key up once their entry expires, as they did with the Redis copy.
+    """
+
+    _MAX_DECODINGS = 1000
+
+    _decodings: Optional[TTLCache] = None
+    _texts: Optional[TTLCache] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.DECRYPTION_CACHE_ENABLED
+
+    @classmethod
+    def get_decoding(cls, tenant_id: str) -> Optional[tuple[RSA.RsaKey, object]]:
+        with cls._lock:
+            return cls._get_decodings().get(tenant_id)
+
+    @classmethod
+    def set_decoding(cls, tenant_id: str, decoding: tuple[RSA.RsaKey, object]) -> None:
+        with cls._lock:
+            cls._get_decodings()[tenant_id] = decoding
+
+    @classmethod
+    def get_text(cls, text_key: tuple[int, bytes]) -> Optional[str]:
+        with cls._lock:
+            return cls._get_texts().get(text_key)
+
+    @classmethod
+    def set_text(cls, text_key: tuple[int, bytes], text: str) -> None:
+        with cls._lock:
+            cls._get_texts()[text_key] = text
+
+    @classmethod
+    def invalidate(cls, tenant_id: str) -> None:
+        """
+        Drop the cached private key of a tenant, the texts decrypted with it can no longer be looked up.
+
+        :param tenant_id: tenant id
+        """
+        with cls._lock:
+            if cls._decodings is not None:
+                cls._decodings.pop(tenant_id, None)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._decodings = None
+            cls._texts = None
+
+    @classmethod
+    def _get_decodings(cls) -> TTLCache:
+        if cls._decodings is None:
+            cls._decodings = TTLCache(maxsize=cls._MAX_DECODINGS, ttl=dify_config.DECRYPTION_CACHE_TTL)
+        return cls._decodings
+
+    @classmethod
+    def _get_texts(cls) -> TTLCache:
+        if cls._texts is None:
+            cls._texts = TTLCache(maxsize=dify_config.DECRYPTION_CACHE_MAX_SIZE, ttl=dify_config.DECRYPTION_CACHE_TTL)
+        return cls._texts
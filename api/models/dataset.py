@@ -915,6 +915,21 @@ class DatasetKeywordTable(Base):
                 return None
 
 
+class DatasetKeywordIndex(Base):
+    """Inverted keyword index of a dataset, one posting row per (keyword, index node)."""
+
+    __tablename__ = "dataset_keyword_indexes"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("dataset_id", "keyword", "node_id", name="dataset_keyword_index_pkey"),
+        db.Index("dataset_keyword_index_node_idx", "dataset_id", "node_id"),
+    )
+
+    dataset_id = mapped_column(StringUUID, nullable=False)
+    keyword = mapped_column(db.String(255), nullable=False)
+    node_id = mapped_column(db.String(255), nullable=False)
+    created_at = mapped_column(db.DateTime, nullable=False, server_default=func.current_timestamp())
+
+
 class Embedding(Base):
     __tablename__ = "embeddings"
     __table_args__ = (
@@ -14,6 +14,7 @@ from werkzeug.exceptions import Unauthorized
 
 from configs import dify_config
 from constants.languages import language_timezone_mapping, languages
+from core.helper.api_token_auth_cache import ApiTokenAuthCache
 from events.tenant_event import tenant_was_created
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client, redis_fallback
@@ -1113,6 +1114,10 @@ class TenantService:
         target_member_join.role = new_role
         db.session.commit()
 
+        if new_role == "owner":
+            # the service API authenticates requests as the tenant owner
+            ApiTokenAuthCache.invalidate(tenant.id)
+
     @staticmethod
     def get_custom_config(tenant_id: str) -> dict:
         tenant = db.get_or_404(Tenant, tenant_id)
@@ -14,8 +14,8 @@ from core.app.features.rate_limiting import RateLimit
 from libs.helper import RateLimiter
 from models.model import Account, App, AppMode, EndUser
 from models.workflow import Workflow
-from services.billing_service import BillingService
 from services.errors.llm import InvokeRateLimitError
+from services.feature_service import FeatureService
 from services.workflow_service import WorkflowService
 
 
@@ -43,8 +43,8 @@ class AppGenerateService:
         # system level rate limiter
         if dify_config.BILLING_ENABLED:
             # check if it's free plan
-            limit_info = BillingService.get_info(app_model.tenant_id)
-            if limit_info["subscription"]["plan"] == "sandbox":
+            features = FeatureService.get_features(app_model.tenant_id)
+            if features.billing.subscription.plan == "sandbox":
                 if cls.system_rate_limiter.is_rate_limited(app_model.tenant_id):
                     raise InvokeRateLimitError(
                         "Rate limit exceeded, please upgrade your plan "
@@ -64,6 +64,7 @@ class AppGenerateService:
                         CompletionAppGenerator().generate(
                             app_model=app_model, user=user, args=args, invoke_from=invoke_from, streaming=streaming
                         ),
+                        invoke_from=invoke_from,
                     ),
                     request_id=request_id,
                 )
@@ -73,6 +74,7 @@ class AppGenerateService:
                         AgentChatAppGenerator().generate(
                             app_model=app_model, user=user, args=args, invoke_from=invoke_from, streaming=streaming
                         ),
+                        invoke_from=invoke_from,
                     ),
                     request_id,
                 )
@@ -82,6 +84,7 @@ class AppGenerateService:
                         ChatAppGenerator().generate(
                             app_model=app_model, user=user, args=args, invoke_from=invoke_from, streaming=streaming
                         ),
+                        invoke_from=invoke_from,
                     ),
                     request_id=request_id,
                 )
@@ -97,6 +100,7 @@ class AppGenerateService:
                             invoke_from=invoke_from,
                             streaming=streaming,
                         ),
+                        invoke_from=invoke_from,
                     ),
                     request_id=request_id,
                 )
@@ -114,6 +118,7 @@ class AppGenerateService:
                             call_depth=0,
                             workflow_thread_pool_id=None,
                         ),
+                        invoke_from=invoke_from,
                     ),
                     request_id,
                 )
@@ -221,6 +221,7 @@ class ClearFreePlanTenantExpiredLogs:
 
         def process_tenant(flask_app: Flask, tenant_id: str) -> None:
             try:
+                # logs are deleted for good, so the plan is read from billing rather than from a cache
                 if (
                     not dify_config.BILLING_ENABLED
                     or BillingService.get_info(tenant_id)["subscription"]["plan"] == "sandbox"
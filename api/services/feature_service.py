@@ -1,11 +1,35 @@
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from enum import StrEnum
+from typing import Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from opentelemetry.metrics import get_meter
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from redis import RedisError
 
 from configs import dify_config
+from extensions.ext_redis import redis_client
 from services.billing_service import BillingService
 from services.enterprise.enterprise_service import EnterpriseService
 
+logger = logging.getLogger(__name__)
+
+_feature_snapshot_meter = get_meter("feature_snapshot_cache_metrics")
+_lookups_counter = _feature_snapshot_meter.create_counter(
+    "feature_snapshot_cache.lookups",
+    unit="{lookup}",
+    description="Number of tenant feature snapshot lookups, by result",
+)
+_refreshes_counter = _feature_snapshot_meter.create_counter(
+    "feature_snapshot_cache.refreshes",
+    unit="{refresh}",
+    description="Number of background refreshes of tenant feature snapshots, by outcome",
+)
+
 
 class SubscriptionModel(BaseModel):
     plan: str = "sandbox"
@@ -152,9 +176,164 @@ class SystemFeatureModel(BaseModel):
     enable_change_email: bool = True
 
 
+class FeatureSnapshotCache:
+    """
+    Stale-while-revalidate cache of the features of tenants, kept in Redis.
+
+    A snapshot younger than FEATURE_SNAPSHOT_CACHE_FRESH_TTL is served as is. An older one is still served,
+    up to FEATURE_SNAPSHOT_CACHE_STALE_TTL, while one process refreshes it from the billing and enterprise
+    APIs in the background, so callers only wait for these APIs when a tenant has no snapshot at all.
+    Snapshots are keyed by `SNAPSHOT_VERSION`, bump it whenever `FeatureModel` changes.
+    """
+
+    SNAPSHOT_VERSION = "1"
+    _REFRESH_LOCK_TTL = 30
+    _REFRESH_WORKERS = 4
+
+    _refresh_executor: Optional[ThreadPoolExecutor] = None
+    _refreshing: set[str] = set()
+    _lock = threading.Lock()
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self.cache_key = f"feature_snapshot:v{self.SNAPSHOT_VERSION}:{tenant_id}"
+        self.refresh_lock_key = f"feature_snapshot_refresh:{tenant_id}"
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.FEATURE_SNAPSHOT_CACHE_ENABLED
+
+    def get(self, load_features: Callable[[str], FeatureModel]) -> FeatureModel:
+        """
+        Get the features of the tenant.
+
+        :param load_features: function loading the features of a tenant from the billing and enterprise APIs
+        :return: features, a fresh copy on every call
+        """
+        snapshot = self._read()
+        if snapshot is None:
+            _lookups_counter.add(1, {"result": "miss"})
+            features = load_features(self.tenant_id)
+            self._write(features)
+            return features
+
+        features, fetched_at = snapshot
+        if time.time() - fetched_at <= dify_config.FEATURE_SNAPSHOT_CACHE_FRESH_TTL:
+            _lookups_counter.add(1, {"result": "fresh"})
+        else:
+            _lookups_counter.add(1, {"result": "stale"})
+            self._schedule_refresh(load_features)
+        return features
+
+    @classmethod
+    def invalidate(cls, tenant_id: str) -> None:
+        """
+        Drop the snapshot of a tenant, the next call loads the features again.
+
+        :param tenant_id: workspace id
+        """
+        if not cls.is_enabled():
+            return
+        try:
+            redis_client.delete(cls(tenant_id).cache_key)
+        except RedisError:
+            logger.exception("Failed to invalidate feature snapshot of tenant %s", tenant_id)
+
+    def _schedule_refresh(self, load_features: Callable[[str], FeatureModel]) -> None:
+        cls = type(self)
+        with cls._lock:
+            if self.tenant_id in cls._refreshing:
+                return
+            cls._refreshing.add(self.tenant_id)
+            if cls._refresh_executor is None:
+                cls._refresh_executor = ThreadPoolExecutor(
+                    max_workers=cls._REFRESH_WORKERS, thread_name_prefix="feature_snapshot_refresh"
+                )
+            executor = cls._refresh_executor
+
+        try:
+            # one process refreshes a snapshot at a time, a failed refresh is retried once the lock expires
+            acquired = redis_client.set(self.refresh_lock_key, 1, nx=True, ex=self._REFRESH_LOCK_TTL)
+        except RedisError:
+            acquired = False
+        if not acquired:
+            with cls._lock:
+                cls._refreshing.discard(self.tenant_id)
+            return
+        executor.submit(self._refresh, load_features)
+
+    def _refresh(self, load_features: Callable[[str], FeatureModel]) -> None:
+        try:
+            features = load_features(self.tenant_id)
+        except Exception:
+            _refreshes_counter.add(1, {"outcome": "failed"})
+            logger.warning("Failed to refresh feature snapshot of tenant %s", self.tenant_id, exc_info=True)
+            return
+        finally:
+            with self._lock:
+                self._refreshing.discard(self.tenant_id)
+
+        self._write(features)
+        _refreshes_counter.add(1, {"outcome": "succeeded"})
+        try:
+            redis_client.delete(self.refresh_lock_key)
+        except RedisError:
+            pass
+
+    def _read(self) -> Optional[tuple[FeatureModel, float]]:
+        try:
+            payload = redis_client.get(self.cache_key)
+        except RedisError:
+            logger.warning("Failed to read feature snapshot of tenant %s", self.tenant_id)
+            return None
+        if payload is None:
+            return None
+        try:
+            snapshot = json.loads(payload)
+            return FeatureModel.model_validate(snapshot["features"]), float(snapshot["fetched_at"])
+        except (ValueError, KeyError, TypeError, ValidationError):
+            logger.warning("Discarding invalid feature snapshot of tenant %s", self.tenant_id)
+            return None
+
+    def _write(self, features: FeatureModel) -> None:
+        payload = json.dumps({"features": features.model_dump(mode="json"), "fetched_at": time.time()})
+        try:
+            redis_client.setex(self.cache_key, dify_config.FEATURE_SNAPSHOT_CACHE_STALE_TTL, payload)
+        except RedisError:
+            logger.warning("Failed to cache feature snapshot of tenant %s", self.tenant_id)
+
+
 class FeatureService:
     @classmethod
     def get_features(cls, tenant_id: str) -> FeatureModel:
+        if (
+            tenant_id
+            and FeatureSnapshotCache.is_enabled()
+            and (dify_config.BILLING_ENABLED or dify_config.ENTERPRISE_ENABLED)
+        ):
+            return FeatureSnapshotCache(tenant_id).get(cls._load_features)
+        return cls._load_features(tenant_id)
+
+    @classmethod
+    def get_subscription_plan(cls, tenant_id: str) -> str:
+        """
+        Get the subscription plan of a tenant, for tasks walking many tenants.
+
+        The plan is cached in Redis for 10 minutes and loaded from billing, bypassing the feature snapshot
+        cache whose snapshots may be stale for much longer, as tasks delete data of the tenants by their plan.
+        :param tenant_id: workspace id
+        :return: subscription plan
+        """
+        plan_cache_key = f"features:{tenant_id}"
+        plan_cache = redis_client.get(plan_cache_key)
+        if plan_cache is not None:
+            return str(plan_cache.decode())
+        plan = cls._load_features(tenant_id).billing.subscription.plan
+        redis_client.setex(plan_cache_key, 600, plan)
+        return plan
+
+    @classmethod
+    def _load_features(cls, tenant_id: str) -> FeatureModel:
         features = FeatureModel()
 
         cls._fulfill_params_from_env(features)
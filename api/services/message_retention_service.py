@@ -0,0 +1,149 @@
+import datetime
+import json
+import logging
+import time
+from collections.abc import Sequence
+from typing import Optional
+
+import click
+from opentelemetry.metrics import get_meter
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.model import (
+    App,
+    Message,
+    MessageAgentThought,
+    MessageAnnotation,
+    MessageChain,
+    MessageFeedback,
+    MessageFile,
+)
+from models.web import SavedMessage
+from services.feature_service import FeatureService
+
+logger = logging.getLogger(__name__)
+
+_retention_meter = get_meter("message_retention_metrics")
+_deleted_rows_counter = _retention_meter.create_counter(
+    "message_retention.deleted_rows",
+    description="Number of rows deleted by the message retention, by table",
+    unit="{row}",
+)
+_scanned_apps_counter = _retention_meter.create_counter(
+    "message_retention.scanned_apps",
+    description="Number of apps scanned by the message retention, by plan of their tenant",
+    unit="{app}",
+)
+
+
+class MessageRetentionService:
+    """
+    Set-based purge of the expired messages of sandbox tenants.
+
+    Apps are walked in id order, the plan of each tenant is resolved once per run, and the expired messages
+    of the sandbox apps are deleted with their related records by batches of message ids, one transaction
+    per batch. The last walked app is checkpointed in Redis, so an interrupted run resumes after it.
+    """
+
+    RELATED_MODELS = (MessageFeedback, MessageAnnotation, MessageChain, MessageAgentThought, MessageFile, SavedMessage)
+    APP_BATCH_SIZE = 500
+    CHECKPOINT_KEY = "message_retention:sandbox:checkpoint"
+    CHECKPOINT_TTL = 7 * 24 * 60 * 60
+
+    @classmethod
+    def clean_sandbox_messages(cls, before: datetime.datetime, batch_size: int, batch_interval: float = 0) -> int:
+        """
+        Delete the messages of sandbox tenants created before a date, with their related records.
+
+        :param before: messages created before this date are deleted
+        :param batch_size: number of messages deleted in one transaction
+        :param batch_interval: pause in seconds between two transactions
+        :return: number of deleted messages
+        """
+        last_app_id, checkpoint_before = cls._load_checkpoint()
+        if last_app_id and checkpoint_before:
+            # resume the interrupted run with its own date, the apps walked before it are done
+            before = checkpoint_before
+            click.echo(click.style(f"Resume cleaning messages after app {last_app_id}.", fg="green"))
+
+        tenant_plans: dict[str, str] = {}
+        deleted_messages = 0
+        while True:
+            with Session(db.engine) as session:
+                stmt = select(App.id, App.tenant_id).order_by(App.id).limit(cls.APP_BATCH_SIZE)
+                if last_app_id:
+                    stmt = stmt.where(App.id > last_app_id)
+                apps = session.execute(stmt).all()
+            if not apps:
+                break
+
+            sandbox_app_ids = []
+            for app_id, tenant_id in apps:
+                if tenant_id not in tenant_plans:
+                    tenant_plans[tenant_id] = FeatureService.get_subscription_plan(tenant_id)
+                plan = tenant_plans[tenant_id]
+                _scanned_apps_counter.add(1, {"plan": plan})
+                if plan == "sandbox":
+                    sandbox_app_ids.append(app_id)
+
+            if sandbox_app_ids:
+                deleted_messages += cls._delete_app_messages(sandbox_app_ids, before, batch_size, batch_interval)
+
+            last_app_id = apps[-1].id
+            cls._save_checkpoint(last_app_id, before)
+            click.echo(
+                click.style(
+                    f"[{datetime.datetime.now()}] Scanned apps up to {last_app_id},"
+                    f" deleted {deleted_messages} messages so far",
+                    fg="green",
+                )
+            )
+
+        redis_client.delete(cls.CHECKPOINT_KEY)
+        return deleted_messages
+
+    @classmethod
+    def _delete_app_messages(
+        cls, app_ids: Sequence[str], before: datetime.datetime, batch_size: int, batch_interval: float
+    ) -> int:
+        deleted_messages = 0
+        while True:
+            with Session(db.engine) as session:
+                message_ids = session.scalars(
+                    select(Message.id).where(Message.app_id.in_(app_ids), Message.created_at < before).limit(batch_size)
+                ).all()
+                if not message_ids:
+                    return deleted_messages
+
+                for model in cls.RELATED_MODELS:
+                    result = session.execute(delete(model).where(model.message_id.in_(message_ids)))
+                    _deleted_rows_counter.add(result.rowcount, {"table": model.__tablename__})
+                result = session.execute(delete(Message).where(Message.id.in_(message_ids)))
+                _deleted_rows_counter.add(result.rowcount, {"table": Message.__tablename__})
+                session.commit()
+
+            deleted_messages += len(message_ids)
+            if len(message_ids) < batch_size:
+                return deleted_messages
+            if batch_interval:
+                time.sleep(batch_interval)
+
+    @classmethod
+    def _load_checkpoint(cls) -> tuple[Optional[str], Optional[datetime.datetime]]:
+        checkpoint = redis_client.get(cls.CHECKPOINT_KEY)
+        if not checkpoint:
+            return None, None
+        try:
+            data = json.loads(checkpoint)
+            return data["last_app_id"], datetime.datetime.fromisoformat(data["before"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring invalid message retention checkpoint %s", checkpoint)
+            return None, None
+
+    @classmethod
+    def _save_checkpoint(cls, last_app_id: str, before: datetime.datetime) -> None:
+        checkpoint = json.dumps({"last_app_id": last_app_id, "before": before.isoformat()})
+        redis_client.setex(cls.CHECKPOINT_KEY, cls.CHECKPOINT_TTL, checkpoint)
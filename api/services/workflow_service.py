@@ -418,6 +418,10 @@ class WorkflowService:
             triggered_from=WorkflowNodeExecutionTriggeredFrom.SINGLE_STEP,
         )
         repository.save(node_execution)
+        # the execution is read back right away, persist it when the repository buffers its writes
+        flush = getattr(repository, "flush", None)
+        if callable(flush):
+            flush()
 
         workflow_node_execution = self._node_execution_service_repo.get_execution_by_id(node_execution.id)
         if workflow_node_execution is None:
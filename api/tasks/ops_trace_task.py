@@ -1,10 +1,11 @@
 import json
 import logging
+from typing import Any
 
 from celery import shared_task  # type: ignore
 from flask import current_app
 
-from core.ops.entities.config_entity import OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
+from core.ops.entities.config_entity import OPS_BATCH_FILE_PATH, OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
 from core.ops.entities.trace_entity import trace_info_info_map
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
@@ -19,35 +20,66 @@ def process_trace_tasks(file_info):
     Async process trace tasks
     Usage: process_trace_tasks.delay(tasks_data)
     """
-    from core.ops.ops_trace_manager import OpsTraceManager
-
     app_id = file_info.get("app_id")
     file_id = file_info.get("file_id")
     file_path = f"{OPS_FILE_PATH}{app_id}/{file_id}.json"
     file_data = json.loads(storage.load(file_path))
-    trace_info = file_data.get("trace_info")
-    trace_info_type = file_data.get("trace_info_type")
-    trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
+    try:
+        _process_task_data(file_data)
+    finally:
+        storage.delete(file_path)
+
+
+@shared_task(queue="ops_trace")
+def process_trace_task_batch(batch_info):
+    """
+    Async process a batch of trace tasks stored as a single file
+    Usage: process_trace_task_batch.delay({"batch_id": batch_id})
+    """
+    file_path = f"{OPS_BATCH_FILE_PATH}{batch_info.get('batch_id')}.json"
+    batch_data = json.loads(storage.load(file_path))
+    trace_instances: dict = {}
+    try:
+        for task_data in batch_data:
+            _process_task_data(task_data, trace_instances)
+    finally:
+        storage.delete(file_path)
+
 
-    if trace_info.get("message_data"):
-        trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
-    if trace_info.get("workflow_data"):
-        trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
-    if trace_info.get("documents"):
-        trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
+def _process_task_data(task_data: dict, trace_instances: dict | None = None):
+    """
+    Send one trace task to the trace provider of its app.
+
+    :param task_data: dumped TaskData
+    :param trace_instances: trace instances already resolved by app id, shared by the tasks of a batch
+    """
+    from core.ops.ops_trace_manager import OpsTraceManager
+
+    app_id: str = task_data["app_id"]
+    trace_info: dict[str, Any] = task_data["trace_info"]
+    trace_info_type: str = task_data["trace_info_type"]
+    if trace_instances is None:
+        trace_instances = {}
+    if app_id not in trace_instances:
+        trace_instances[app_id] = OpsTraceManager.get_ops_trace_instance(app_id)
+    trace_instance = trace_instances[app_id]
 
     try:
+        if trace_info.get("message_data"):
+            trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
+        if trace_info.get("workflow_data"):
+            trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
+        if trace_info.get("documents"):
+            trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
+
         if trace_instance:
             with current_app.app_context():
                 trace_type = trace_info_info_map.get(trace_info_type)
-                if trace_type:
-                    trace_info = trace_type(**trace_info)
-                trace_instance.trace(trace_info)
+                trace_entity = trace_type(**trace_info) if trace_type else trace_info
+                trace_instance.trace(trace_entity)
         logging.info("Processing trace tasks success, app_id: %s", app_id)
     except Exception as e:
         logging.info("error:\n\n\n%s\n\n\n\n", e)
         failed_key = f"{OPS_TRACE_FAILED_KEY}_{app_id}"
         redis_client.incr(failed_key)
         logging.info("Processing trace tasks failed, app_id: %s", app_id)
-    finally:
-        storage.delete(file_path)
@@ -30,7 +30,7 @@ class MockedHttp:
         cls, method: Literal["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD"], url: str, **kwargs
     ) -> requests.Response:
         """
-        Mocked requests.request
+        Mocked requests.Session.request
         """
         request = requests.PreparedRequest()
         request.method = method
@@ -55,7 +55,11 @@ MOCK_SWITCH = os.getenv("MOCK_SWITCH", "false").lower() == "true"
 @pytest.fixture
 def setup_http_mock(request, monkeypatch: MonkeyPatch):
     if MOCK_SWITCH:
-        monkeypatch.setattr(requests, "request", MockedHttp.requests_request)
+
+        def session_request(_session, method, url, **kwargs):
+            return MockedHttp.requests_request(method, url, **kwargs)
+
+        monkeypatch.setattr(requests.Session, "request", session_request)
 
         def unpatch():
             monkeypatch.undo()
@@ -1,4 +1,6 @@
 import os
+import threading
+from collections.abc import Callable, Iterator
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -33,6 +35,7 @@ sys.path.insert(0, PROJECT_DIR)
 
 # apply the mock to the Redis client in the Flask app
 from extensions import ext_redis
+from tests.unit_tests.stub_http_server import Responder, StubHTTPServer
 
 redis_patcher = patch.object(ext_redis, "redis_client", redis_mock)
 redis_patcher.start()
@@ -63,3 +66,20 @@ def reset_redis_mock():
     redis_mock.hgetall.return_value = {}
     redis_mock.hdel.return_value = None
     redis_mock.incr.return_value = 1
+
+
+@pytest.fixture
+def stub_http_server() -> Iterator[Callable[[Responder], StubHTTPServer]]:
+    """Start local HTTP servers answering requests with a responder, they are stopped after the test."""
+    servers: list[StubHTTPServer] = []
+
+    def start(responder: Responder) -> StubHTTPServer:
+        server = StubHTTPServer(responder)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import Any, Literal, Optional
+from unittest.mock import patch
+
+import pytest
+from pydantic import BaseModel
+
+from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom, _get_arbitrary_object_fields
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import (
+    QueueErrorEvent,
+    QueueNodeSucceededEvent,
+    QueueTextChunkEvent,
+    QueueWorkflowSucceededEvent,
+)
+from core.workflow.nodes.base.entities import BaseNodeData
+from core.workflow.nodes.enums import NodeType
+from models.model import App
+
+
+class ListQueueManager(AppQueueManager):
+    def __init__(self):
+        with patch("core.app.apps.base_app_queue_manager.redis_client"):
+            super().__init__(task_id="task", user_id="user", invoke_from=InvokeFrom.SERVICE_API)
+        self.events = []
+
+    def _publish(self, event, pub_from):
+        self.events.append(event)
+
+
+class Leaf(BaseModel):
+    name: str
+    tags: list[str] = []
+    kind: Literal["a", "b"] = "a"
+
+
+class Tree(BaseModel):
+    leaf: Leaf
+    children: list["Tree"] = []
+
+
+class Loose(BaseModel):
+    leaf: Leaf
+    value: Any = None
+    mapping: dict[str, Any] = {}
+    bare: Optional[dict] = None
+    nested: Optional[Tree] = None
+
+
+def test_fields_holding_only_plain_values_and_models_are_not_checked():
+    assert _get_arbitrary_object_fields(Leaf) == ()
+    assert _get_arbitrary_object_fields(Tree) == ()
+    assert _get_arbitrary_object_fields(Loose) == ("value", "mapping", "bare")
+    assert _get_arbitrary_object_fields(QueueTextChunkEvent) == ()
+    assert _get_arbitrary_object_fields(QueueErrorEvent) == ("error",)
+
+
+def test_text_chunks_are_published_without_being_dumped():
+    manager = ListQueueManager()
+    event = QueueTextChunkEvent(text="token")
+
+    with patch.object(QueueTextChunkEvent, "model_dump", side_effect=AssertionError("dumped")):
+        manager.publish(event, PublishFrom.APPLICATION_MANAGER)
+
+    assert manager.events == [event]
+
+
+@pytest.mark.parametrize(
+    "outputs",
+    [
+        {"app": App()},
+        {"apps": [App()]},
+        {"nested": {"apps": (App(),)}},
+        {"wrapper": Loose(leaf=Leaf(name="leaf"), value=[App()])},
+    ],
+    ids=["value", "list", "tuple", "model"],
+)
+def test_sqlalchemy_models_in_events_are_rejected(outputs):
+    manager = ListQueueManager()
+
+    with pytest.raises(TypeError):
+        manager.publish(QueueWorkflowSucceededEvent(outputs=outputs), PublishFrom.APPLICATION_MANAGER)
+    with pytest.raises(TypeError):
+        manager.publish(QueueErrorEvent(error=outputs), PublishFrom.APPLICATION_MANAGER)
+
+    assert manager.events == []
+
+
+def test_node_events_with_plain_values_are_published():
+    manager = ListQueueManager()
+    event = QueueNodeSucceededEvent(
+        node_execution_id="execution",
+        node_id="node",
+        node_type=NodeType.LLM,
+        node_data=BaseNodeData(title="LLM"),
+        start_at=datetime.now(),
+        inputs={"query": "hello", "files": [{"id": "file"}]},
+        outputs={"text": "world"},
+    )
+
+    manager.publish(event, PublishFrom.APPLICATION_MANAGER)
+
+    assert manager.events == [event]
@@ -0,0 +1,55 @@
+"""
+Benchmark of publishing the text chunks of a streamed answer through `AppQueueManager.publish`, against the former
+publish path dumping every event with `model_dump` and walking the dump.
+
+Compare the groups by running this file with `pytest -m benchmark --benchmark-only`, divide the tokens per round
+recorded in the extra info by the mean to get the tokens per second of a stream.
+"""
+
+from typing import Any
+
+import pytest
+
+from core.app.apps.base_app_queue_manager import PublishFrom
+from core.app.entities.queue_entities import QueueTextChunkEvent
+from tests.unit_tests.core.app.apps.test_base_app_queue_manager import ListQueueManager
+
+pytestmark = pytest.mark.benchmark
+
+TOKEN_COUNT = 10000
+
+
+class DumpingQueueManager(ListQueueManager):
+    def publish(self, event, pub_from):
+        self._check_dump(event.model_dump())
+        self._publish(event, pub_from)
+
+    def _check_dump(self, data: Any):
+        if isinstance(data, dict):
+            for value in data.values():
+                self._check_dump(value)
+        elif isinstance(data, list):
+            for item in data:
+                self._check_dump(item)
+        elif hasattr(data, "_sa_instance_state"):
+            raise TypeError("SQLAlchemy model")
+
+
+@pytest.mark.parametrize("manager_class", [DumpingQueueManager, ListQueueManager], ids=["model_dump", "publish"])
+def test_publish_text_chunks(benchmark, manager_class):
+    benchmark.group = f"publish_{TOKEN_COUNT}_text_chunks"
+    events = [
+        QueueTextChunkEvent(text=f"token{i} ", from_variable_selector=["llm", "text"], in_iteration_id="iteration")
+        for i in range(TOKEN_COUNT)
+    ]
+
+    def publish_stream():
+        manager = manager_class()
+        for event in events:
+            manager.publish(event, PublishFrom.APPLICATION_MANAGER)
+        return manager
+
+    manager = benchmark.pedantic(publish_stream, rounds=10, iterations=1, warmup_rounds=1)
+
+    assert len(manager.events) == TOKEN_COUNT
+    benchmark.extra_info["tokens_per_round"] = TOKEN_COUNT
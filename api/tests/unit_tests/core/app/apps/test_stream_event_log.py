@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from redis import RedisError
+
+from core.app.apps.base_app_generator import BaseAppGenerator
+from core.app.apps.stream_event_log import StreamEventLog
+from core.app.entities.app_invoke_entities import InvokeFrom
+
+
+class FakeRedis:
+    def __init__(self):
+        self.streams: dict[str, list[tuple[bytes, dict[bytes, bytes]]]] = {}
+        self.ttls: dict[str, int] = {}
+        self.added = threading.Condition()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        with self.added:
+            entries = self.streams.setdefault(key, [])
+            entry_id = f"{len(entries) + 1}-0".encode()
+            entries.append((entry_id, {k.encode(): v.encode() for k, v in fields.items()}))
+            if maxlen is not None:
+                del entries[:-maxlen]
+            self.added.notify_all()
+        return entry_id
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    def exists(self, key):
+        return int(key in self.streams)
+
+    def xread(self, streams, count=None, block=None):
+        ((key, last_id),) = streams.items()
+        last = tuple(int(part) for part in last_id.split("-")) if "-" in last_id else (int(last_id), 0)
+        with self.added:
+            for _ in range(2):
+                entries = [
+                    (entry_id, fields)
+                    for entry_id, fields in self.streams.get(key, [])
+                    if tuple(int(part) for part in entry_id.decode().split("-")) > last
+                ][:count]
+                if entries:
+                    return [[key.encode(), entries]]
+                self.added.wait(block / 1000)
+        return []
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def xadd(self, *args, **kwargs):
+        self.calls.append(("xadd", args, kwargs))
+
+    def expire(self, *args, **kwargs):
+        self.calls.append(("expire", args, kwargs))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with (
+        patch("core.app.apps.stream_event_log.redis_client", redis),
+        patch("core.app.apps.stream_event_log.dify_config") as mock_config,
+    ):
+        mock_config.APP_STREAM_EVENT_LOG_ENABLED = True
+        mock_config.APP_STREAM_EVENT_LOG_MAX_LENGTH = 100
+        mock_config.APP_STREAM_EVENT_LOG_TTL = 600
+        mock_config.APP_STREAM_EVENT_LOG_BUFFER_SIZE = 100
+        mock_config.APP_MAX_EXECUTION_TIME = 5
+        yield redis
+
+
+def messages(count: int):
+    yield "ping"
+    for i in range(count):
+        yield {"event": "message", "task_id": "task", "answer": f"token{i}"}
+
+
+def test_events_are_logged_and_replayed_after_the_last_event_id(fake_redis):
+    stream = list(BaseAppGenerator.convert_to_event_stream(messages(3), InvokeFrom.SERVICE_API))
+
+    assert stream[0] == "event: ping\n\n"
+    assert stream[1] == f"id: 1-0\ndata: {json.dumps({'event': 'message', 'task_id': 'task', 'answer': 'token0'})}\n\n"
+    assert fake_redis.ttls["stream_event_log:task"] == 600
+
+    replayed = list(BaseAppGenerator.convert_event_log_to_event_stream(StreamEventLog("task"), "1-0"))
+    assert replayed == stream[2:]
+
+    replayed = list(BaseAppGenerator.convert_event_log_to_event_stream(StreamEventLog("task")))
+    assert replayed == stream[1:]
+
+
+def test_events_are_logged_after_the_client_disconnects(fake_redis):
+    release = threading.Event()
+
+    def slow_messages():
+        yield {"event": "message", "task_id": "task", "answer": "first"}
+        release.wait(5)
+        yield {"event": "message", "task_id": "task", "answer": "second"}
+
+    stream = BaseAppGenerator.convert_to_event_stream(slow_messages(), InvokeFrom.SERVICE_API)
+    assert next(stream).startswith("id: 1-0\n")
+    stream.close()
+    release.set()
+
+    replayed = list(BaseAppGenerator.convert_event_log_to_event_stream(StreamEventLog("task"), "1-0"))
+    assert replayed == [f"id: 2-0\ndata: {json.dumps({'event': 'message', 'task_id': 'task', 'answer': 'second'})}\n\n"]
+
+
+def test_generator_errors_are_raised_to_the_client(fake_redis):
+    def failing_messages():
+        yield {"event": "message", "task_id": "task", "answer": "token"}
+        raise ValueError("failed")
+
+    stream = BaseAppGenerator.convert_to_event_stream(failing_messages(), InvokeFrom.SERVICE_API)
+    next(stream)
+    with pytest.raises(ValueError):
+        next(stream)
+
+    # the log is still ended, readers do not wait for more events
+    assert list(StreamEventLog("task").read("1-0")) == []
+
+
+def test_events_are_streamed_without_ids_when_the_log_fails(fake_redis):
+    with patch.object(FakePipeline, "execute", side_effect=RedisError("down")):
+        stream = list(BaseAppGenerator.convert_to_event_stream(messages(1), InvokeFrom.SERVICE_API))
+
+    assert stream[1].startswith("data: ")
+
+
+def test_events_are_not_logged_when_disabled(fake_redis):
+    with patch("core.app.apps.stream_event_log.dify_config.APP_STREAM_EVENT_LOG_ENABLED", False):
+        stream = list(BaseAppGenerator.convert_to_event_stream(messages(1), InvokeFrom.SERVICE_API))
+
+    assert stream[1].startswith("data: ")
+    assert fake_redis.streams == {}
+
+
+@pytest.mark.parametrize("invoke_from", [InvokeFrom.WEB_APP, InvokeFrom.EXPLORE, InvokeFrom.DEBUGGER, None])
+def test_events_are_only_logged_for_the_service_api(fake_redis, invoke_from):
+    stream = list(BaseAppGenerator.convert_to_event_stream(messages(1), invoke_from))
+
+    assert stream[1].startswith("data: ")
+    assert fake_redis.streams == {}
+
+
+def test_slow_clients_do_not_buffer_every_event(fake_redis):
+    produced = []
+
+    def counted_messages():
+        for i in range(5):
+            produced.append(i)
+            yield {"event": "message", "task_id": "task", "answer": f"token{i}"}
+
+    with patch("core.app.apps.stream_event_log.dify_config.APP_STREAM_EVENT_LOG_BUFFER_SIZE", 1):
+        stream = BaseAppGenerator.convert_to_event_stream(counted_messages(), InvokeFrom.SERVICE_API)
+        assert next(stream).startswith("id: 1-0\n")
+        with fake_redis.added:
+            fake_redis.added.wait_for(lambda: len(produced) == 3, timeout=5)
+        time.sleep(0.2)
+        # one event waits in the buffer and the task waits to forward the next one
+        assert len(produced) == 3
+
+        stream.close()
+
+    # the task goes on once the client disconnected
+    replayed = list(BaseAppGenerator.convert_event_log_to_event_stream(StreamEventLog("task"), "1-0"))
+    assert len(replayed) == 4
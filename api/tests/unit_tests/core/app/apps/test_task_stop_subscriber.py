@@ -0,0 +1,106 @@
+import gc
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.app.apps.base_app_queue_manager import AppQueueManager
+from core.app.apps.task_stop_subscriber import TASK_STOP_CHANNEL, TaskStopSubscriber
+from core.app.entities.app_invoke_entities import InvokeFrom
+
+
+@pytest.fixture
+def subscriber():
+    subscriber = TaskStopSubscriber()
+    with (
+        patch.object(TaskStopSubscriber, "_ensure_started"),
+        patch.object(TaskStopSubscriber, "get_instance", return_value=subscriber),
+    ):
+        yield subscriber
+
+
+def test_notify_sets_event_of_registered_task(subscriber):
+    stop_event = subscriber.register("task-1")
+
+    subscriber.notify("task-2")
+    assert not stop_event.is_set()
+
+    subscriber.notify("task-1")
+    assert stop_event.is_set()
+
+
+def test_released_events_are_forgotten(subscriber):
+    subscriber.register("task-1")
+    gc.collect()
+
+    subscriber.notify("task-1")
+    assert "task-1" not in subscriber._stop_events
+
+
+@patch("core.app.apps.task_stop_subscriber.redis_client")
+def test_resync_notifies_tasks_stopped_before_subscription(mock_redis, subscriber):
+    stop_event_1 = subscriber.register("task-1")
+    stop_event_2 = subscriber.register("task-2")
+    pipe = MagicMock()
+    pipe.execute.return_value = [1, 0]
+    mock_redis.pipeline.return_value = pipe
+
+    subscriber._resync()
+
+    assert stop_event_1.is_set()
+    assert not stop_event_2.is_set()
+
+
+@patch("core.app.apps.base_app_queue_manager.redis_client")
+def test_is_stopped_skips_redis_while_subscription_is_active(mock_redis, subscriber):
+    subscriber._active.set()
+    queue_manager = AppQueueManager(task_id="task-1", user_id="user-1", invoke_from=InvokeFrom.SERVICE_API)
+
+    assert not queue_manager._is_stopped()
+    mock_redis.get.assert_not_called()
+
+    subscriber.notify("task-1")
+    assert queue_manager._is_stopped()
+
+
+@patch("core.app.apps.base_app_queue_manager.redis_client")
+def test_is_stopped_polls_redis_without_subscription(mock_redis, subscriber):
+    queue_manager = AppQueueManager(task_id="task-1", user_id="user-1", invoke_from=InvokeFrom.SERVICE_API)
+    mock_redis.get.return_value = None
+
+    assert not queue_manager._is_stopped()
+
+    mock_redis.get.return_value = b"1"
+    assert queue_manager._is_stopped()
+    mock_redis.get.assert_called_with("generate_task_stopped:task-1")
+
+
+@patch("core.app.apps.base_app_queue_manager.redis_client")
+def test_set_stop_flag_publishes_stop_signal(mock_redis):
+    mock_redis.get.return_value = b"end-user-user-1"
+
+    AppQueueManager.set_stop_flag("task-1", InvokeFrom.SERVICE_API, "user-1")
+
+    mock_redis.setex.assert_called_once_with("generate_task_stopped:task-1", 600, 1)
+    mock_redis.publish.assert_called_once_with(TASK_STOP_CHANNEL, "task-1")
+
+
+@patch("core.app.apps.task_stop_subscriber.time.sleep", side_effect=KeyboardInterrupt)
+@patch("core.app.apps.task_stop_subscriber.redis_client")
+def test_run_routes_published_stops_and_deactivates_on_failure(mock_redis, mock_sleep, subscriber):
+    stop_event = subscriber.register("task-1")
+    pubsub = MagicMock()
+    pubsub.get_message.side_effect = [
+        {"type": "subscribe", "data": 1},
+        {"type": "message", "data": b"task-1"},
+        ConnectionError("connection lost"),
+    ]
+    mock_redis.pubsub.return_value = pubsub
+    mock_redis.pipeline.return_value.execute.return_value = [0]
+
+    with pytest.raises(KeyboardInterrupt):
+        subscriber._run()
+
+    pubsub.subscribe.assert_called_once_with(TASK_STOP_CHANNEL)
+    assert stop_event.is_set()
+    assert not subscriber.is_active
+    pubsub.close.assert_called_once()
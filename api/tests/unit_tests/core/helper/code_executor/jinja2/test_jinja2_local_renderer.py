@@ -0,0 +1,116 @@
+from unittest.mock import MagicMock, patch
+
+import jinja2
+import pytest
+
+from core.helper.code_executor.code_executor import CodeExecutor, CodeLanguage
+from core.helper.code_executor.jinja2.jinja2_local_renderer import Jinja2LocalRenderer
+
+TEMPLATE = """Hello {{ name | upper }}!
+{% for item in items -%}
+- {{ loop.index }}. {{ item.title }} ({{ item.tags | join(", ") }})
+{% endfor %}{{ items | length }} items, {{ "%.2f" | format(score) }}"""
+
+INPUTS = {
+    "name": "dify",
+    "items": [{"title": "first", "tags": ["a", "b"]}, {"title": "second", "tags": []}],
+    "score": 0.5,
+}
+
+
+@pytest.fixture(autouse=True)
+def renderer_config():
+    Jinja2LocalRenderer.clear_cache()
+    with patch("core.helper.code_executor.jinja2.jinja2_local_renderer.dify_config") as mock_config:
+        mock_config.JINJA2_LOCAL_RENDER_MAX_TEMPLATE_LENGTH = 10000
+        mock_config.JINJA2_LOCAL_RENDER_MAX_OUTPUT_LENGTH = 400000
+        mock_config.JINJA2_LOCAL_RENDER_TIMEOUT = 1.0
+        mock_config.JINJA2_LOCAL_RENDER_CACHE_SIZE = 16
+        yield mock_config
+    Jinja2LocalRenderer.clear_cache()
+
+
+def test_render_matches_plain_jinja2():
+    assert Jinja2LocalRenderer.render(TEMPLATE, INPUTS) == jinja2.Template(TEMPLATE).render(**INPUTS)
+
+
+def test_compiled_templates_are_cached():
+    with patch.object(
+        Jinja2LocalRenderer._environment, "from_string", wraps=Jinja2LocalRenderer._environment.from_string
+    ) as from_string:
+        assert Jinja2LocalRenderer.render("{{ a }}", {"a": 1}) == "1"
+        assert Jinja2LocalRenderer.render("{{ a }}", {"a": 2}) == "2"
+        assert Jinja2LocalRenderer.render("{{ b }}", {"b": 3}) == "3"
+
+    assert from_string.call_count == 2
+
+
+def test_inputs_are_json_round_tripped():
+    assert Jinja2LocalRenderer.render("{{ value }}", {"value": (1, 2)}) == "[1, 2]"
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        pytest.param("line\\nbreak {{ a }}", id="python_escape"),
+        pytest.param("{{ a }}'''", id="triple_quote"),
+        pytest.param("{{ a.__class__ }}", id="unsafe_attribute"),
+        pytest.param("{% set items = [] %}{{ items.append(1) }}", id="mutation"),
+        pytest.param("{{ a }", id="syntax_error"),
+        pytest.param("{% for i in range(1000000) %}{% endfor %}", id="range_too_large"),
+    ],
+)
+def test_templates_left_to_the_sandbox(template):
+    assert Jinja2LocalRenderer.render(template, {"a": "x"}) is None
+
+
+def test_long_template_is_left_to_the_sandbox(renderer_config):
+    renderer_config.JINJA2_LOCAL_RENDER_MAX_TEMPLATE_LENGTH = 14
+
+    assert Jinja2LocalRenderer.render("{{ a }}" * 2, {"a": 1}) == "11"
+    assert Jinja2LocalRenderer.render("{{ a }}" * 3, {"a": 1}) is None
+
+
+def test_output_limit(renderer_config):
+    renderer_config.JINJA2_LOCAL_RENDER_MAX_OUTPUT_LENGTH = 100
+
+    assert Jinja2LocalRenderer.render("{% for i in range(10) %}0123456789{% endfor %}", {}) is not None
+    assert Jinja2LocalRenderer.render("{% for i in range(11) %}0123456789{% endfor %}", {}) is None
+
+
+def test_timeout_stops_loops_without_output(renderer_config):
+    renderer_config.JINJA2_LOCAL_RENDER_TIMEOUT = 0.05
+
+    template = "{% for i in range(100000) %}{% for j in range(100000) %}{% endfor %}{% endfor %}"
+
+    assert Jinja2LocalRenderer.render(template, {}) is None
+    # the deadline does not leak into later renders of the thread
+    assert Jinja2LocalRenderer.render("{{ a }}", {"a": 1}) == "1"
+
+
+@patch("core.helper.code_executor.code_executor.post")
+@patch("core.helper.code_executor.code_executor.dify_config")
+def test_code_executor_renders_jinja2_locally(mock_config, mock_post):
+    mock_config.JINJA2_LOCAL_RENDER_ENABLED = True
+
+    result = CodeExecutor.execute_workflow_code_template(language=CodeLanguage.JINJA2, code="{{ a }}", inputs={"a": 1})
+
+    assert result == {"result": "1"}
+    mock_post.assert_not_called()
+
+
+@patch("core.helper.code_executor.code_executor.post")
+@patch("core.helper.code_executor.code_executor.dify_config")
+def test_code_executor_falls_back_to_sandbox(mock_config, mock_post):
+    mock_config.JINJA2_LOCAL_RENDER_ENABLED = True
+    mock_post.return_value = MagicMock(
+        status_code=200,
+        json=MagicMock(return_value={"code": 0, "message": "", "data": {"stdout": "<<RESULT>>str<<RESULT>>\n"}}),
+    )
+
+    result = CodeExecutor.execute_workflow_code_template(
+        language=CodeLanguage.JINJA2, code="{{ a.__class__.__name__ }}", inputs={"a": "x"}
+    )
+
+    assert result == {"result": "str"}
+    mock_post.assert_called_once()
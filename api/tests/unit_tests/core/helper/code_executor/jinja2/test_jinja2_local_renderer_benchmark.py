@@ -0,0 +1,61 @@
+"""
+Latency benchmarks of Jinja2 rendering through the code execution sandbox and in-process.
+
+Compare the two modes by running this file with `pytest -m benchmark --benchmark-only`.
+The sandbox mode talks to a local stub that answers immediately, so it only measures the request overhead
+and is a lower bound of the latency of a real sandbox, which also starts a Python process per render.
+"""
+
+import json
+from unittest.mock import patch
+
+import jinja2
+import pytest
+from yarl import URL
+
+from core.helper.code_executor import code_executor
+from core.helper.code_executor.code_executor import CodeExecutor, CodeLanguage
+from core.helper.code_executor.jinja2.jinja2_local_renderer import Jinja2LocalRenderer
+from tests.unit_tests.stub_http_server import StubResponse
+
+pytestmark = pytest.mark.benchmark
+
+TEMPLATE = "{% for item in items %}{{ loop.index }}. {{ item | title }}\n{% endfor %}"
+INPUTS = {"items": [f"item {i}" for i in range(20)]}
+EXPECTED = jinja2.Template(TEMPLATE).render(**INPUTS)
+RENDERS_PER_ROUND = 20
+
+
+@pytest.fixture
+def stub_sandbox_url(stub_http_server) -> URL:
+    body = json.dumps(
+        {"code": 0, "message": "success", "data": {"stdout": f"<<RESULT>>{EXPECTED}<<RESULT>>\n", "error": ""}}
+    ).encode()
+    return URL(stub_http_server(lambda request: StubResponse(body=body)).url)
+
+
+def _render_round():
+    for _ in range(RENDERS_PER_ROUND):
+        result = CodeExecutor.execute_workflow_code_template(language=CodeLanguage.JINJA2, code=TEMPLATE, inputs=INPUTS)
+        assert result["result"] == EXPECTED
+
+
+def test_sandbox_rendering(benchmark, stub_sandbox_url, monkeypatch):
+    monkeypatch.setattr(code_executor, "code_execution_endpoint_url", stub_sandbox_url)
+    monkeypatch.setattr(code_executor.dify_config, "JINJA2_LOCAL_RENDER_ENABLED", False)
+    # proxies from the environment of the machine running the benchmark must not route the stub requests
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+
+    benchmark.group = "jinja2_render"
+    benchmark.extra_info["renders_per_round"] = RENDERS_PER_ROUND
+    benchmark.pedantic(_render_round, rounds=3, iterations=1)
+
+
+def test_local_rendering(benchmark, monkeypatch):
+    monkeypatch.setattr(code_executor.dify_config, "JINJA2_LOCAL_RENDER_ENABLED", True)
+    Jinja2LocalRenderer.clear_cache()
+
+    benchmark.group = "jinja2_render"
+    benchmark.extra_info["renders_per_round"] = RENDERS_PER_ROUND
+    with patch.object(code_executor, "post", side_effect=AssertionError("the sandbox must not be called")):
+        benchmark.pedantic(_render_round, rounds=3, iterations=1)
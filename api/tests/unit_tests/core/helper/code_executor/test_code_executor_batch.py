@@ -0,0 +1,97 @@
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage
+from core.helper.code_executor.jinja2.jinja2_transformer import Jinja2TemplateTransformer
+from core.helper.code_executor.python3.python3_transformer import Python3TemplateTransformer
+from core.helper.code_executor.template_transformer import TemplateTransformer
+
+CODE = """
+def main(arg1: int) -> dict:
+    if arg1 < 0:
+        raise ValueError("negative")
+    if arg1 == 0:
+        return "not a dict"
+    return {"result": arg1 * 2, "small": 1e-10}
+"""
+
+
+def run_python(language, preload, code) -> str:
+    """Run the runner like the sandbox does, in a Python process."""
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+
+@patch.object(CodeExecutor, "execute_code", side_effect=run_python)
+def test_batch_returns_result_or_error_of_each_inputs(mock_execute_code):
+    results = CodeExecutor.execute_workflow_code_template_batch(
+        language=CodeLanguage.PYTHON3, code=CODE, inputs_list=[{"arg1": 1}, {"arg1": -1}, {"arg1": 0}, {"arg1": 3}]
+    )
+
+    mock_execute_code.assert_called_once()
+    assert results[0] == {"result": 2, "small": 1e-10}
+    assert isinstance(results[1], CodeExecutionError)
+    assert str(results[1]) == "ValueError: negative"
+    assert isinstance(results[2], CodeExecutionError)
+    assert str(results[2]) == "Result must be a dict, got str"
+    assert results[3] == {"result": 6, "small": 1e-10}
+
+
+@patch.object(CodeExecutor, "execute_code", side_effect=run_python)
+def test_batch_results_match_single_execution(mock_execute_code):
+    inputs_list = [{"arg1": 1}, {"arg1": 5}]
+
+    results = CodeExecutor.execute_workflow_code_template_batch(
+        language=CodeLanguage.PYTHON3, code=CODE, inputs_list=inputs_list
+    )
+
+    assert results == [
+        CodeExecutor.execute_workflow_code_template(language=CodeLanguage.PYTHON3, code=CODE, inputs=inputs)
+        for inputs in inputs_list
+    ]
+
+
+@patch.object(CodeExecutor, "execute_code", return_value="<<RESULT>>[]<<RESULT>>")
+def test_batch_with_missing_outcomes_fails(mock_execute_code):
+    with pytest.raises(CodeExecutionError, match="list of 1 outcomes"):
+        CodeExecutor.execute_workflow_code_template_batch(
+            language=CodeLanguage.PYTHON3, code=CODE, inputs_list=[{"arg1": 1}]
+        )
+
+
+def test_batch_of_unsupported_language_fails():
+    with pytest.raises(CodeExecutionError):
+        CodeExecutor.execute_workflow_code_template_batch(language=CodeLanguage.JINJA2, code="{{ a }}", inputs_list=[])
+
+
+def test_batch_runner_script_declares_code_and_inputs():
+    runner, preload = Python3TemplateTransformer.transform_batch_caller(CODE, [{"arg1": 1}])
+
+    assert CODE in runner
+    assert Python3TemplateTransformer._inputs_placeholder not in runner
+    assert preload == Python3TemplateTransformer.get_preload_script()
+
+
+def test_batch_support_follows_the_transformer():
+    assert CodeExecutor.supports_batch(CodeLanguage.PYTHON3)
+    assert CodeExecutor.supports_batch(CodeLanguage.JAVASCRIPT)
+    assert not CodeExecutor.supports_batch(CodeLanguage.JINJA2)
+
+    with pytest.raises(ValueError, match="does not support batch execution"):
+        Jinja2TemplateTransformer.transform_batch_caller("{{ a }}", [{"a": 1}])
+
+
+def test_batch_transformers_must_implement_the_batch_runner():
+    with pytest.raises(TypeError, match="does not implement get_batch_runner_script"):
+
+        class _BatchTransformer(TemplateTransformer):
+            supports_batch = True
+
+            @classmethod
+            def get_runner_script(cls) -> str:
+                return ""
+
+    with pytest.raises(NotImplementedError):
+        Jinja2TemplateTransformer.get_batch_runner_script()
@@ -0,0 +1,147 @@
+import datetime
+import inspect as pyinspect
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+from redis import RedisError
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+from werkzeug.exceptions import Unauthorized
+
+from controllers.console.datasets.datasets import DatasetApiDeleteApi
+from controllers.service_api.wraps import _get_api_token_tenant_id
+from core.helper.api_token_auth_cache import ApiTokenAuthCache, ApiTokenAuthContext
+from models.account import Account, Tenant
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode("utf-8") if isinstance(value, str) else value
+
+    def incr(self, key):
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode("utf-8")
+        return value
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with (
+        patch("core.helper.api_token_auth_cache.redis_client", redis),
+        patch("core.helper.api_token_auth_cache.dify_config") as mock_config,
+        Session(create_engine("sqlite://")) as session,
+        patch("core.helper.api_token_auth_cache.db") as mock_db,
+    ):
+        mock_config.API_TOKEN_AUTH_CACHE_ENABLED = True
+        mock_config.API_TOKEN_AUTH_CACHE_TTL = 60
+        mock_config.API_TOKEN_AUTH_CACHE_MAX_SIZE = 16
+        mock_db.session = session
+        ApiTokenAuthCache.clear_local()
+        yield redis
+    ApiTokenAuthCache.clear_local()
+
+
+def _context() -> ApiTokenAuthContext:
+    created_at = datetime.datetime(2025, 1, 1, 12, 0, 0)
+    tenant = Tenant(id="tenant", name="Workspace", plan="basic", status="normal", created_at=created_at)
+    owner = Account(
+        id="account",
+        name="Owner",
+        email="owner@example.com",
+        password="hashed",
+        password_salt="salt",
+        status="active",
+        created_at=created_at,
+    )
+    return ApiTokenAuthContext(tenant_id="tenant", app_id="app", tenant=tenant, owner=owner, owner_role="owner")
+
+
+def test_cached_contexts_are_restored_from_redis(fake_redis):
+    cache = ApiTokenAuthCache("app-token", "app")
+    assert cache.get() is None
+
+    cache.set(ApiTokenAuthCache.get_version("tenant"), _context())
+    ApiTokenAuthCache.clear_local()
+
+    context = ApiTokenAuthCache("app-token", "app").get()
+    assert context is not None
+    assert (context.tenant_id, context.app_id, context.owner_role) == ("tenant", "app", "owner")
+    assert context.tenant.name == "Workspace"
+    assert context.owner.created_at == datetime.datetime(2025, 1, 1, 12, 0, 0)
+    assert inspect(context.owner).persistent
+    # credentials are never cached, they are loaded if a request needs them
+    assert {"password", "password_salt"} <= inspect(context.owner).unloaded
+    assert b"hashed" not in fake_redis.data[cache.cache_key]
+
+
+def test_contexts_depend_on_token_and_scope(fake_redis):
+    ApiTokenAuthCache("token", "app").set("0", _context())
+
+    assert ApiTokenAuthCache("token", "dataset").get() is None
+    assert ApiTokenAuthCache("other-token", "app").get() is None
+
+
+def test_invalidation_applies_to_every_process(fake_redis):
+    cache = ApiTokenAuthCache("app-token", "app")
+    cache.set(ApiTokenAuthCache.get_version("tenant"), _context())
+    assert cache.get() is not None
+
+    ApiTokenAuthCache.invalidate("tenant")
+
+    # the process-local entry is outdated as well
+    assert cache.get() is None
+    ApiTokenAuthCache.clear_local()
+    assert cache.get() is None
+
+
+def test_contexts_resolved_during_an_invalidation_are_not_used(fake_redis):
+    version = ApiTokenAuthCache.get_version("tenant")
+    ApiTokenAuthCache.invalidate("tenant")
+
+    cache = ApiTokenAuthCache("app-token", "app")
+    cache.set(version, _context())
+
+    assert cache.get() is None
+    assert json.loads(fake_redis.data[cache.cache_key])["version"] == "0"
+
+
+def test_contexts_are_not_used_when_the_version_cannot_be_read(fake_redis):
+    cache = ApiTokenAuthCache("app-token", "app")
+    cache.set("0", _context())
+
+    with patch.object(FakeRedis, "get", side_effect=RedisError("down")):
+        assert ApiTokenAuthCache.get_version("tenant") is None
+        assert cache.get() is None
+
+
+def test_revoked_dataset_keys_are_rejected(fake_redis):
+    ApiTokenAuthCache("dataset-token", "dataset").set(ApiTokenAuthCache.get_version("tenant"), _context())
+    current_user = MagicMock(current_tenant_id="tenant", is_admin_or_owner=True)
+    with (
+        Flask(__name__).test_request_context(headers={"Authorization": "Bearer dataset-token"}),
+        patch("controllers.console.datasets.datasets.db") as mock_db,
+        patch("controllers.console.datasets.datasets.current_user", current_user),
+        patch("controllers.service_api.wraps._touch_api_token"),
+        # the token row is deleted by the revocation
+        patch(
+            "controllers.service_api.wraps.validate_and_get_api_token",
+            side_effect=Unauthorized("Access token is invalid"),
+        ),
+    ):
+        assert _get_api_token_tenant_id("dataset") == "tenant"
+
+        # the view without its login decorators
+        pyinspect.unwrap(DatasetApiDeleteApi.delete)(DatasetApiDeleteApi(), "key")
+        mock_db.session.commit.assert_called_once()
+
+        with pytest.raises(Unauthorized):
+            _get_api_token_tenant_id("dataset")
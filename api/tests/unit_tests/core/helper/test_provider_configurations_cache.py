@@ -0,0 +1,142 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.entities.provider_configuration import ProviderConfiguration, ProviderConfigurations
+from core.entities.provider_entities import CustomConfiguration, CustomProviderConfiguration, SystemConfiguration
+from core.helper.provider_configurations_cache import ProviderConfigurationsCache
+from core.model_runtime.entities.common_entities import I18nObject
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.entities.provider_entities import ConfigurateMethod, ProviderEntity
+from core.provider_manager import ProviderManager
+from models.provider import ProviderType
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode("utf-8") if isinstance(value, str) else value
+
+    def incr(self, key):
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode("utf-8")
+        return value
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with (
+        patch("core.helper.provider_configurations_cache.redis_client", redis),
+        patch("core.helper.provider_configurations_cache.dify_config") as mock_config,
+    ):
+        mock_config.PROVIDER_CONFIGURATIONS_CACHE_ENABLED = True
+        mock_config.PROVIDER_CONFIGURATIONS_CACHE_TTL = 300
+        mock_config.PROVIDER_CONFIGURATIONS_CACHE_LOCAL_MAX_SIZE = 16
+        ProviderConfigurationsCache.clear_local()
+        yield redis
+    ProviderConfigurationsCache.clear_local()
+
+
+def _make_configurations(tenant_id: str) -> ProviderConfigurations:
+    configurations = ProviderConfigurations(tenant_id=tenant_id)
+    configurations["langgenius/openai/openai"] = ProviderConfiguration(
+        tenant_id=tenant_id,
+        provider=ProviderEntity(
+            provider="langgenius/openai/openai",
+            label=I18nObject(en_US="OpenAI"),
+            supported_model_types=[ModelType.LLM],
+            configurate_methods=[ConfigurateMethod.PREDEFINED_MODEL],
+        ),
+        preferred_provider_type=ProviderType.CUSTOM,
+        using_provider_type=ProviderType.CUSTOM,
+        system_configuration=SystemConfiguration(enabled=False),
+        custom_configuration=CustomConfiguration(
+            provider=CustomProviderConfiguration(credentials={"openai_api_key": "sk-test"})
+        ),
+        model_settings=[],
+    )
+    return configurations
+
+
+def test_cache_round_trip(fake_redis):
+    cache = ProviderConfigurationsCache("tenant-1")
+    configurations = _make_configurations("tenant-1")
+
+    version = cache.get_version()
+    assert version == "0"
+    assert cache.get(version) is None
+
+    cache.set(version, configurations)
+    cached = cache.get(version)
+
+    assert cached is not None
+    assert cached is not configurations
+    assert cached.model_dump() == configurations.model_dump()
+    assert cached["langgenius/openai/openai"].custom_configuration.provider.credentials == {"openai_api_key": "sk-test"}
+
+
+def test_cache_redis_tier_is_shared_between_processes(fake_redis):
+    cache = ProviderConfigurationsCache("tenant-1")
+    cache.set("0", _make_configurations("tenant-1"))
+
+    # another process starts with an empty local tier
+    ProviderConfigurationsCache.clear_local()
+
+    cached = cache.get("0")
+    assert cached is not None
+    assert list(cached.configurations) == ["langgenius/openai/openai"]
+
+
+def test_invalidate_bumps_version(fake_redis):
+    cache = ProviderConfigurationsCache("tenant-1")
+    cache.set(cache.get_version(), _make_configurations("tenant-1"))
+
+    ProviderConfigurationsCache.invalidate("tenant-1")
+
+    version = cache.get_version()
+    assert version == "1"
+    assert cache.get(version) is None
+    # other tenants are not affected
+    assert ProviderConfigurationsCache("tenant-2").get_version() == "0"
+
+
+def test_invalidate_is_noop_when_disabled(fake_redis):
+    with patch("core.helper.provider_configurations_cache.dify_config") as mock_config:
+        mock_config.PROVIDER_CONFIGURATIONS_CACHE_ENABLED = False
+        ProviderConfigurationsCache.invalidate("tenant-1")
+
+    assert fake_redis.data == {}
+
+
+def test_provider_manager_uses_cache(fake_redis):
+    configurations = _make_configurations("tenant-1")
+    with patch.object(ProviderManager, "_get_configurations", return_value=configurations) as mock_build:
+        manager = ProviderManager()
+        first = manager.get_configurations("tenant-1")
+        second = manager.get_configurations("tenant-1")
+
+        assert first is configurations
+        assert second.model_dump() == configurations.model_dump()
+        mock_build.assert_called_once_with("tenant-1")
+
+        ProviderConfigurationsCache.invalidate("tenant-1")
+        manager.get_configurations("tenant-1")
+        assert mock_build.call_count == 2
+
+
+def test_provider_manager_bypasses_cache_when_disabled():
+    configurations = MagicMock()
+    with (
+        patch.object(ProviderConfigurationsCache, "is_enabled", return_value=False),
+        patch.object(ProviderConfigurationsCache, "get_version") as mock_get_version,
+        patch.object(ProviderManager, "_get_configurations", return_value=configurations),
+    ):
+        assert ProviderManager().get_configurations("tenant-1") is configurations
+
+    mock_get_version.assert_not_called()
@@ -1,9 +1,25 @@
+import asyncio
 import secrets
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 
-from core.helper.ssrf_proxy import SSRF_DEFAULT_MAX_RETRIES, STATUS_FORCELIST, make_request
+from core.helper import ssrf_proxy
+from core.helper.ssrf_proxy import (
+    SSRF_DEFAULT_MAX_RETRIES,
+    STATUS_FORCELIST,
+    get_client,
+    make_request,
+    make_request_async,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    ssrf_proxy._reset_clients()
+    yield
+    ssrf_proxy._reset_clients()
 
 
 @patch("httpx.Client.request")
@@ -50,3 +66,53 @@ def test_retry_logic_success(mock_request):
     assert response.status_code == 200
     assert mock_request.call_count == SSRF_DEFAULT_MAX_RETRIES + 1
     assert mock_request.call_args_list[0][1].get("method") == "GET"
+
+
+@patch("httpx.Client.request")
+def test_requests_reuse_pooled_client(mock_request):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_request.return_value = mock_response
+
+    make_request("GET", "http://example.com")
+    make_request("GET", "http://example.com/other")
+
+    assert len(ssrf_proxy._clients) == 1
+    assert get_client() is get_client()
+    assert get_client(ssl_verify=False) is not get_client(ssl_verify=True)
+
+
+def test_pooled_client_uses_proxy_settings():
+    with (
+        patch.object(ssrf_proxy.dify_config, "SSRF_PROXY_ALL_URL", None),
+        patch.object(ssrf_proxy.dify_config, "SSRF_PROXY_HTTP_URL", "http://proxy:3128"),
+        patch.object(ssrf_proxy.dify_config, "SSRF_PROXY_HTTPS_URL", "http://proxy:3129"),
+    ):
+        proxied_client = get_client()
+    direct_client = get_client()
+
+    assert proxied_client is not direct_client
+    assert len(proxied_client._mounts) == 2
+    assert not direct_client._mounts
+
+
+def test_pooled_client_does_not_keep_cookies():
+    client = get_client()
+    request = httpx.Request("GET", "http://example.com")
+    response = httpx.Response(200, headers={"Set-Cookie": "session=secret; Path=/"}, request=request)
+
+    client.cookies.extract_cookies(response)
+
+    assert not client.cookies
+
+
+def test_make_request_async_retries():
+    responses = [MagicMock(status_code=502), MagicMock(status_code=200)]
+    with (
+        patch("httpx.AsyncClient.request", new_callable=AsyncMock, side_effect=responses) as mock_request,
+        patch.object(ssrf_proxy, "BACKOFF_FACTOR", 0),
+    ):
+        response = asyncio.run(make_request_async("GET", "http://example.com", max_retries=1))
+
+    assert response.status_code == 200
+    assert mock_request.call_count == 2
@@ -0,0 +1,60 @@
+"""
+Benchmarks of the pooled SSRF proxy client against a local stub server.
+
+Compare the two groups by running this file with `pytest -m benchmark --benchmark-only`,
+`test_fresh_client_per_request` reproduces the previous behaviour of opening a new client for every request.
+"""
+
+import httpx
+import pytest
+
+from core.helper import ssrf_proxy
+from tests.unit_tests.stub_http_server import StubResponse
+
+pytestmark = pytest.mark.benchmark
+
+REQUESTS_PER_ROUND = 20
+
+
+@pytest.fixture
+def stub_url(stub_http_server) -> str:
+    server = stub_http_server(lambda request: StubResponse(body=b"ok", content_type="text/plain"))
+    return f"{server.url}/"
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    ssrf_proxy._reset_clients()
+    yield
+    ssrf_proxy._reset_clients()
+
+
+def test_fresh_client_per_request(benchmark, stub_url):
+    def run():
+        for _ in range(REQUESTS_PER_ROUND):
+            with httpx.Client(trust_env=False) as client:
+                assert client.get(stub_url).status_code == 200
+
+    benchmark.group = "ssrf_proxy"
+    benchmark.extra_info["requests_per_round"] = REQUESTS_PER_ROUND
+    benchmark.pedantic(run, rounds=3, iterations=1)
+
+
+def test_pooled_client(benchmark, stub_url, monkeypatch):
+    monkeypatch.setattr(ssrf_proxy, "_client_options", _without_env_proxies(ssrf_proxy._client_options))
+
+    def run():
+        for _ in range(REQUESTS_PER_ROUND):
+            assert ssrf_proxy.get(stub_url).status_code == 200
+
+    benchmark.group = "ssrf_proxy"
+    benchmark.extra_info["requests_per_round"] = REQUESTS_PER_ROUND
+    benchmark.pedantic(run, rounds=3, iterations=1)
+
+
+def _without_env_proxies(client_options):
+    # proxies from the environment of the machine running the benchmark must not route the stub requests
+    def wrapper(ssl_verify):
+        return {**client_options(ssl_verify), "trust_env": False}
+
+    return wrapper
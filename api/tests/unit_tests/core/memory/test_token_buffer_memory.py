@@ -0,0 +1,143 @@
+import datetime
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from constants import UUID_NIL
+from core.memory.token_buffer_memory import TokenBufferMemory
+from core.model_runtime.entities import AssistantPromptMessage, UserPromptMessage
+from core.prompt.utils.extract_thread_messages import extract_thread_messages
+from models.types import StringUUID
+
+
+@pytest.fixture
+def sqlite_session(monkeypatch):
+    # StringUUID binds uuid.UUID values outside of PostgreSQL, the ids here are strings
+    monkeypatch.setattr(StringUUID, "process_bind_param", lambda self, value, dialect: value)
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "CREATE TABLE messages (id CHAR(36) PRIMARY KEY, conversation_id CHAR(36),"
+                " parent_message_id CHAR(36), created_at DATETIME)"
+            )
+        )
+    with Session(engine) as session:
+        yield session
+
+
+def add_messages(session: Session, conversation_id: str, parents: list[tuple[str, str | None]]) -> dict[str, str]:
+    """Add messages from oldest to newest, each as (name, name of parent or None or "nil")."""
+    ids: dict[str, str] = {}
+    created_at = datetime.datetime(2025, 1, 1)
+    for index, (name, parent) in enumerate(parents):
+        ids[name] = str(uuid.uuid4())
+        session.execute(
+            sa.text("INSERT INTO messages VALUES (:id, :conversation_id, :parent_message_id, :created_at)"),
+            {
+                "id": ids[name],
+                "conversation_id": conversation_id,
+                "parent_message_id": UUID_NIL if parent == "nil" else ids.get(parent) if parent else None,
+                "created_at": created_at + datetime.timedelta(minutes=index),
+            },
+        )
+    return ids
+
+
+@pytest.mark.parametrize(
+    "parents",
+    [
+        [("m1", None), ("m2", "m1"), ("m3", "m2")],
+        # messages created before threads were supported
+        [("m1", None), ("m2", "nil"), ("m3", "nil")],
+        # regenerated answer
+        [("m1", None), ("m2", "m1"), ("m3", "m1"), ("m4", "m2")],
+        # threaded messages after legacy ones
+        [("m1", None), ("m2", None), ("m3", "nil"), ("m4", "m3")],
+    ],
+)
+def test_thread_is_resolved_like_extract_thread_messages(sqlite_session, parents):
+    conversation_id = str(uuid.uuid4())
+    other_conversation_id = str(uuid.uuid4())
+    ids = add_messages(sqlite_session, conversation_id, parents)
+    add_messages(sqlite_session, other_conversation_id, [("other", None)])
+    memory = TokenBufferMemory(conversation=MagicMock(id=conversation_id), model_instance=MagicMock())
+
+    with patch("core.memory.token_buffer_memory.db", SimpleNamespace(session=sqlite_session)):
+        thread_message_ids = memory._get_thread_message_ids(limit=500)
+
+    messages = [
+        SimpleNamespace(id=ids[name], parent_message_id=ids.get(parent, UUID_NIL if parent else None))
+        for name, parent in reversed(parents)
+    ]
+    assert thread_message_ids == [message.id for message in extract_thread_messages(messages)]
+
+    with patch("core.memory.token_buffer_memory.db", SimpleNamespace(session=sqlite_session)):
+        assert len(memory._get_thread_message_ids(limit=2)) == 2
+
+
+def build_memory(message_count: int, tokens_per_message: int = 10):
+    """Memory over a thread of messages 0 (oldest) to message_count - 1 (newest)."""
+    model_instance = MagicMock()
+    model_instance.get_llm_num_tokens.side_effect = lambda prompt_messages: tokens_per_message * len(prompt_messages)
+    memory = TokenBufferMemory(conversation=MagicMock(), model_instance=model_instance)
+    messages = {
+        str(i): SimpleNamespace(
+            id=str(i), query=f"query {i}", answer=f"answer {i}", answer_tokens=1, workflow_run_id=None
+        )
+        for i in range(message_count)
+    }
+    memory._get_thread_message_ids = MagicMock(return_value=[str(i) for i in reversed(range(message_count))])
+    memory._get_messages = MagicMock(side_effect=lambda message_ids: [messages[id] for id in message_ids])
+    return memory, messages
+
+
+@pytest.fixture
+def no_message_files():
+    with patch("core.memory.token_buffer_memory.db") as mock_db:
+        mock_db.session.scalars.return_value = []
+        yield
+
+
+def test_history_fits_in_one_page(no_message_files):
+    memory, messages = build_memory(3)
+    messages["2"].answer = ""
+    messages["2"].answer_tokens = 0
+
+    prompt_messages = memory.get_history_prompt_messages(max_token_limit=2000)
+
+    # the newly created message is left out
+    assert prompt_messages == [
+        UserPromptMessage(content="query 0"),
+        AssistantPromptMessage(content="answer 0"),
+        UserPromptMessage(content="query 1"),
+        AssistantPromptMessage(content="answer 1"),
+    ]
+    memory.model_instance.get_llm_num_tokens.assert_called_once()
+
+
+def test_older_pages_are_not_fetched_once_the_token_limit_is_reached(no_message_files):
+    memory, _ = build_memory(100)
+
+    prompt_messages = memory.get_history_prompt_messages(max_token_limit=35)
+
+    memory._get_messages.assert_called_once_with([str(i) for i in reversed(range(80, 100))])
+    assert prompt_messages == [
+        AssistantPromptMessage(content="answer 98"),
+        UserPromptMessage(content="query 99"),
+        AssistantPromptMessage(content="answer 99"),
+    ]
+
+
+def test_pages_grow_until_the_thread_is_fetched(no_message_files):
+    memory, _ = build_memory(100)
+
+    prompt_messages = memory.get_history_prompt_messages(max_token_limit=10000)
+
+    assert [len(call.args[0]) for call in memory._get_messages.call_args_list] == [20, 40, 40]
+    assert len(prompt_messages) == 200
+    assert prompt_messages[0] == UserPromptMessage(content="query 0")
@@ -0,0 +1,124 @@
+import json
+import queue
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+
+from core.ops import ops_trace_manager
+from core.ops.entities.config_entity import OPS_BATCH_FILE_PATH
+from core.ops.entities.trace_entity import GenerateNameTraceInfo
+from core.ops.ops_trace_manager import TraceQueueManager
+from tasks.ops_trace_task import process_trace_task_batch
+
+
+@pytest.fixture
+def trace_queue(monkeypatch):
+    trace_queue: queue.Queue = queue.Queue(maxsize=3)
+    monkeypatch.setattr(ops_trace_manager, "trace_manager_queue", trace_queue)
+    monkeypatch.setattr(ops_trace_manager, "trace_manager_batch_size", 2)
+    return trace_queue
+
+
+@pytest.fixture
+def manager():
+    manager = TraceQueueManager.__new__(TraceQueueManager)
+    manager.app_id = "app-1"
+    manager.user_id = None
+    manager.trace_instance = MagicMock()
+    manager.flask_app = Flask(__name__)
+    return manager
+
+
+def _make_trace_task(app_id="app-1"):
+    task = MagicMock()
+    task.app_id = app_id
+    task.execute.return_value = GenerateNameTraceInfo(
+        conversation_id="conversation-1",
+        inputs={},
+        outputs="name",
+        metadata={},
+        tenant_id="tenant-1",
+    )
+    return task
+
+
+def test_collect_tasks_respects_batch_size(trace_queue, manager):
+    for _ in range(3):
+        trace_queue.put(_make_trace_task())
+
+    assert len(manager.collect_tasks()) == 2
+    assert len(manager.collect_tasks()) == 1
+    assert manager.collect_tasks() == []
+
+
+def test_collect_tasks_waits_for_batch_within_timeout(trace_queue, manager):
+    trace_queue.put(_make_trace_task())
+
+    assert len(manager.collect_tasks(timeout=0.05)) == 1
+
+
+@patch.object(ops_trace_manager, "_trace_tasks_counter")
+def test_add_trace_task_drops_when_queue_is_full(mock_counter, trace_queue, manager):
+    for _ in range(4):
+        manager.add_trace_task(_make_trace_task())
+
+    assert trace_queue.qsize() == 3
+    statuses = [call.args[1]["status"] for call in mock_counter.add.call_args_list]
+    assert statuses == ["queued", "queued", "queued", "dropped"]
+
+
+@patch.object(ops_trace_manager, "process_trace_task_batch")
+@patch.object(ops_trace_manager, "storage")
+def test_send_to_celery_dispatches_one_batch(mock_storage, mock_batch_task, manager):
+    failing_task = _make_trace_task()
+    failing_task.execute.side_effect = RuntimeError("boom")
+
+    manager.send_to_celery([_make_trace_task(), failing_task, _make_trace_task("app-2")])
+
+    mock_storage.save.assert_called_once()
+    file_path, content = mock_storage.save.call_args.args
+    batch_id = mock_batch_task.delay.call_args.args[0]["batch_id"]
+    assert file_path == f"{OPS_BATCH_FILE_PATH}{batch_id}.json"
+    batch = json.loads(content)
+    assert [task_data["app_id"] for task_data in batch] == ["app-1", "app-2"]
+    assert batch[0]["trace_info_type"] == "GenerateNameTraceInfo"
+    mock_batch_task.delay.assert_called_once()
+
+
+@patch("tasks.ops_trace_task.storage")
+@patch("core.ops.ops_trace_manager.OpsTraceManager.get_ops_trace_instance")
+def test_process_trace_task_batch(mock_get_instance, mock_storage):
+    trace_instance = MagicMock()
+    trace_instance.trace.side_effect = [RuntimeError("provider unavailable"), None]
+    mock_get_instance.return_value = trace_instance
+    trace_info = GenerateNameTraceInfo(conversation_id="c", inputs={}, metadata={}, tenant_id="t").model_dump(
+        mode="json"
+    )
+    mock_storage.load.return_value = json.dumps(
+        [
+            {"app_id": "app-1", "trace_info_type": "GenerateNameTraceInfo", "trace_info": trace_info},
+            {"app_id": "app-1", "trace_info_type": "GenerateNameTraceInfo", "trace_info": dict(trace_info)},
+        ]
+    )
+
+    with Flask(__name__).app_context():
+        process_trace_task_batch({"batch_id": "batch-1"})
+
+    # a failing task does not prevent the rest of the batch from being exported
+    assert trace_instance.trace.call_count == 2
+    mock_get_instance.assert_called_once_with("app-1")
+    mock_storage.delete.assert_called_once_with(f"{OPS_BATCH_FILE_PATH}batch-1.json")
+
+
+@patch("core.ops.ops_trace_manager.atexit")
+def test_flush_is_registered_once_across_worker_restarts(mock_atexit, manager, monkeypatch):
+    monkeypatch.setattr(ops_trace_manager, "trace_manager_flush_registered", False)
+    monkeypatch.setattr(TraceQueueManager, "_run_worker", lambda self: None)
+
+    for _ in range(3):
+        monkeypatch.setattr(ops_trace_manager, "trace_manager_worker", None)
+        manager.start_worker()
+        ops_trace_manager.trace_manager_worker.join()
+
+    mock_atexit.register.assert_called_once_with(manager.flush)
@@ -0,0 +1,66 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from core.plugin.entities.plugin_daemon import PluginDaemonInnerError
+from core.plugin.impl.base import BasePluginClient, _endpoint_label, _PluginDaemonSession
+
+
+@pytest.fixture(autouse=True)
+def reset_session():
+    _PluginDaemonSession.reset()
+    yield
+    _PluginDaemonSession.reset()
+
+
+def test_endpoint_label_hides_ids():
+    assert _endpoint_label("plugin/tenant-1/dispatch/llm/invoke") == "plugin/{tenant_id}/dispatch/llm/invoke"
+    assert (
+        _endpoint_label("plugin/tenant-1/management/install/tasks/0b9d6a3e-1f2c/delete/langgenius/openai:0.0.1")
+        == "plugin/{tenant_id}/management/install/tasks/{id}/delete/langgenius/{id}"
+    )
+
+
+def test_sessions_share_connection_pool():
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(_PluginDaemonSession.get()))
+    thread.start()
+    thread.join()
+
+    session = _PluginDaemonSession.get()
+
+    assert session is _PluginDaemonSession.get()
+    assert session is not sessions[0]
+    assert session.get_adapter("http://localhost:5002") is sessions[0].get_adapter("http://localhost:5002")
+
+
+@patch("core.plugin.impl.base._request_duration_histogram")
+@patch("requests.Session.request")
+def test_request_uses_pooled_session_and_records_latency(mock_request, mock_histogram):
+    mock_request.return_value = MagicMock(status_code=200)
+
+    BasePluginClient()._request("POST", "plugin/tenant-1/dispatch/llm/invoke", stream=True)
+
+    kwargs = mock_request.call_args.kwargs
+    assert kwargs["headers"]["X-Api-Key"]
+    assert kwargs["stream"] is True
+    assert kwargs["timeout"][0] > 0
+    duration, attributes = mock_histogram.record.call_args.args
+    assert duration >= 0
+    assert attributes == {
+        "endpoint": "plugin/{tenant_id}/dispatch/llm/invoke",
+        "method": "POST",
+        "status_code": "200",
+        "stream": True,
+    }
+
+
+@patch("core.plugin.impl.base._request_duration_histogram")
+@patch("requests.Session.request", side_effect=requests.exceptions.ConnectionError())
+def test_request_connection_error_records_latency(mock_request, mock_histogram):
+    with pytest.raises(PluginDaemonInnerError):
+        BasePluginClient()._request("GET", "plugin/tenant-1/management/list")
+
+    assert mock_histogram.record.call_args.args[1]["status_code"] == "error"
@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+from core.rag.models.document import Document
+
+
+def _dataset():
+    dataset = MagicMock()
+    dataset.id = "dataset-1"
+    return dataset
+
+
+def _segment(node_id: str):
+    segment = MagicMock()
+    segment.index_node_id = node_id
+    segment.content = f"content of {node_id}"
+    segment.index_node_hash = f"hash-{node_id}"
+    segment.document_id = "document-1"
+    segment.dataset_id = "dataset-1"
+    return segment
+
+
+@patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.db")
+def test_add_texts_inserts_only_new_postings(mock_db):
+    segment = _segment("node-1")
+    mock_db.session.scalars.return_value = [segment]
+
+    JiebaInvertedIndex(_dataset()).add_texts(
+        [Document(page_content="hello", metadata={"doc_id": "node-1"})],
+        keywords_list=[["apple", "banana", "apple"]],
+    )
+
+    assert segment.keywords == ["apple", "banana", "apple"]
+    insert_stmt = mock_db.session.execute.call_args_list[-1].args[0]
+    compiled = insert_stmt.compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT DO NOTHING" in str(compiled)
+    assert sorted(v for k, v in compiled.params.items() if k.startswith("keyword")) == ["apple", "banana"]
+
+
+@patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.db")
+def test_delete_by_ids_only_touches_given_nodes(mock_db):
+    JiebaInvertedIndex(_dataset()).delete_by_ids(["node-1", "node-2"])
+
+    delete_stmt = mock_db.session.execute.call_args.args[0]
+    compiled = delete_stmt.compile(dialect=postgresql.dialect())
+    assert str(compiled).startswith("DELETE FROM dataset_keyword_indexes")
+    assert compiled.params["node_id_1"] == ["node-1", "node-2"]
+    mock_db.session.commit.assert_called_once()
+
+
+@patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.SegmentLoader")
+@patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.JiebaKeywordTableHandler")
+@patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.db")
+def test_search_hydrates_segments_in_ranked_order(mock_db, mock_handler, mock_loader):
+    mock_handler.return_value.extract_keywords.return_value = {"apple", "banana"}
+    mock_db.session.execute.return_value = [("node-2", 2), ("node-1", 1)]
+    mock_loader.load_segments.return_value = ({"node-1": _segment("node-1"), "node-2": _segment("node-2")}, {})
+
+    documents = JiebaInvertedIndex(_dataset()).search("apple banana", top_k=2)
+
+    assert [document.metadata["doc_id"] for document in documents] == ["node-2", "node-1"]
+    mock_loader.load_segments.assert_called_once_with(dataset_ids=["dataset-1"], index_node_ids=["node-2", "node-1"])
+
+
+@patch("core.rag.datasource.keyword.jieba.jieba_inverted_index.db")
+def test_import_keyword_table(mock_db):
+    JiebaInvertedIndex(_dataset()).import_keyword_table({"apple": {"node-1"}, "banana": {"node-1", "node-2"}})
+
+    compiled = mock_db.session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert sorted(v for k, v in compiled.params.items() if k.startswith("node_id")) == ["node-1", "node-1", "node-2"]
@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+import pytest
+
+from core.rag.datasource.segment_loader import SegmentLoader
+from models.dataset import ChildChunk, DocumentSegment
+
+
+@pytest.fixture(autouse=True)
+def _reset_cache():
+    SegmentLoader.clear_cache()
+    yield
+    SegmentLoader.clear_cache()
+
+
+def _segment(segment_id: str, node_id: str, enabled: bool = True, status: str = "completed") -> DocumentSegment:
+    return DocumentSegment(
+        id=segment_id,
+        tenant_id="tenant-1",
+        dataset_id="dataset-1",
+        document_id="document-1",
+        position=1,
+        content=f"content of {node_id}",
+        word_count=3,
+        tokens=3,
+        index_node_id=node_id,
+        enabled=enabled,
+        status=status,
+        created_by="user-1",
+    )
+
+
+@patch("core.rag.datasource.segment_loader.db")
+def test_load_segments_uses_one_query(mock_db):
+    mock_db.session.scalars.return_value.all.return_value = [
+        _segment("seg-1", "node-1"),
+        _segment("seg-2", "node-2", enabled=False),
+        _segment("seg-3", "node-3"),
+    ]
+
+    by_node_id, by_id = SegmentLoader.load_segments(
+        dataset_ids=["dataset-1"], index_node_ids=["node-1", "node-2"], segment_ids=["seg-3"], completed_only=True
+    )
+
+    assert mock_db.session.scalars.call_count == 1
+    assert set(by_node_id) == {"node-1", "node-3"}
+    assert set(by_id) == {"seg-1", "seg-3"}
+
+
+@patch("core.rag.datasource.segment_loader.db")
+def test_load_segments_applies_document_filter(mock_db):
+    mock_db.session.scalars.return_value.all.return_value = [_segment("seg-1", "node-1")]
+
+    by_node_id, _ = SegmentLoader.load_segments(
+        dataset_ids=["dataset-1"], index_node_ids=["node-1"], document_ids_filter=["document-2"]
+    )
+
+    assert by_node_id == {}
+
+
+@patch("core.rag.datasource.segment_loader.dify_config.RETRIEVAL_SEGMENT_CACHE_TTL", 30)
+@patch("core.rag.datasource.segment_loader.db")
+def test_cached_segments_skip_the_database(mock_db):
+    mock_db.session.scalars.return_value.all.return_value = [_segment("seg-1", "node-1")]
+    mock_db.session.merge.side_effect = lambda instance, load: instance
+
+    SegmentLoader.load_segments(dataset_ids=["dataset-1"], index_node_ids=["node-1"])
+    by_node_id, by_id = SegmentLoader.load_segments(dataset_ids=["dataset-1"], index_node_ids=["node-1"])
+
+    assert mock_db.session.scalars.call_count == 1
+    assert by_node_id["node-1"].content == "content of node-1"
+    assert set(by_id) == {"seg-1"}
+    mock_db.session.merge.assert_called_once()
+
+
+@patch("core.rag.datasource.segment_loader.dify_config.RETRIEVAL_SEGMENT_CACHE_TTL", 30)
+@patch("core.rag.datasource.segment_loader.db")
+def test_load_child_chunks_caches_rows(mock_db):
+    child_chunk = ChildChunk(id="chunk-1", segment_id="seg-1", index_node_id="child-node-1", content="child")
+    mock_db.session.scalars.return_value.all.return_value = [child_chunk]
+    mock_db.session.merge.side_effect = lambda instance, load: instance
+
+    assert SegmentLoader.load_child_chunks(["child-node-1"])["child-node-1"] is child_chunk
+    cached = SegmentLoader.load_child_chunks(["child-node-1"])["child-node-1"]
+
+    assert cached.segment_id == "seg-1"
+    assert mock_db.session.scalars.call_count == 1
@@ -0,0 +1,200 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pydantic import BaseModel
+
+from core.rag.datasource.vdb.client_registry import VectorClientRegistry
+from core.rag.datasource.vdb.milvus.milvus_vector import MilvusConfig, MilvusVector
+from core.rag.datasource.vdb.pgvector.pgvector import PGVector, PGVectorConfig, _BlockingConnectionPool
+
+
+class _Config(BaseModel):
+    host: str
+    password: str = "secret"
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    VectorClientRegistry.clear(close=False)
+    with patch("core.rag.datasource.vdb.client_registry.dify_config") as mock_config:
+        mock_config.VECTOR_CLIENT_REGISTRY_ENABLED = True
+        mock_config.VECTOR_CLIENT_IDLE_TIMEOUT = 600
+        mock_config.VECTOR_CLIENT_HEALTH_CHECK_INTERVAL = 30
+        yield mock_config
+    VectorClientRegistry.clear(close=False)
+
+
+def test_clients_are_shared_per_backend_and_config():
+    factory = MagicMock(side_effect=lambda: object())
+
+    first = VectorClientRegistry.get("qdrant", _Config(host="a"), factory)
+    second = VectorClientRegistry.get("qdrant", _Config(host="a"), factory)
+    other_config = VectorClientRegistry.get("qdrant", _Config(host="b"), factory)
+    other_backend = VectorClientRegistry.get("milvus", _Config(host="a"), factory)
+
+    assert first is second
+    assert len({id(first), id(other_config), id(other_backend)}) == 3
+    assert factory.call_count == 3
+    assert all("secret" not in key for key in VectorClientRegistry._entries)
+
+
+def test_disabled_registry_creates_new_clients(registry):
+    registry.VECTOR_CLIENT_REGISTRY_ENABLED = False
+    factory = MagicMock(side_effect=lambda: object())
+
+    first = VectorClientRegistry.get("qdrant", _Config(host="a"), factory)
+    second = VectorClientRegistry.get("qdrant", _Config(host="a"), factory)
+
+    assert first is not second
+    assert VectorClientRegistry._entries == {}
+
+
+def test_concurrent_gets_create_a_single_client():
+    created = []
+
+    def factory():
+        time.sleep(0.05)
+        client = object()
+        created.append(client)
+        return client
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(VectorClientRegistry.get("qdrant", _Config(host="a"), factory)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
+
+
+def test_unhealthy_client_is_rebuilt_and_closed_once_idle(registry):
+    registry.VECTOR_CLIENT_HEALTH_CHECK_INTERVAL = 0
+    registry.VECTOR_CLIENT_IDLE_TIMEOUT = 1
+    close = MagicMock()
+    health_check = MagicMock(side_effect=[True, ConnectionError("gone"), True])
+    factory = MagicMock(side_effect=lambda: object())
+    config = _Config(host="a")
+
+    first = VectorClientRegistry.get("milvus", config, factory, close=close, health_check=health_check)
+    assert VectorClientRegistry.get("milvus", config, factory, close=close, health_check=health_check) is first
+    rebuilt = VectorClientRegistry.get("milvus", config, factory, close=close, health_check=health_check)
+
+    # threads which fetched the failed client may still be using it
+    assert rebuilt is not first
+    close.assert_not_called()
+
+    VectorClientRegistry._retired[0].last_used_at -= 10
+    VectorClientRegistry._last_evicted_at -= 10
+    assert VectorClientRegistry.get("milvus", config, factory, close=close, health_check=health_check) is rebuilt
+
+    close.assert_called_once_with(first)
+    assert VectorClientRegistry._retired == []
+
+
+def test_health_check_runs_at_most_once_per_interval():
+    health_check = MagicMock(return_value=True)
+    config = _Config(host="a")
+
+    for _ in range(5):
+        VectorClientRegistry.get("milvus", config, object, health_check=health_check)
+
+    health_check.assert_not_called()
+
+
+def test_idle_clients_are_evicted_unless_in_use(registry):
+    registry.VECTOR_CLIENT_IDLE_TIMEOUT = 1
+    close = MagicMock()
+    in_use = {"busy": 1, "idle": 0}
+    busy = VectorClientRegistry.get(
+        "pgvector", _Config(host="busy"), lambda: "busy", close=close, pool_usage=lambda c: (in_use[c], 5)
+    )
+    VectorClientRegistry.get(
+        "pgvector", _Config(host="idle"), lambda: "idle", close=close, pool_usage=lambda c: (in_use[c], 5)
+    )
+
+    for entry in VectorClientRegistry._entries.values():
+        entry.last_used_at -= 10
+    VectorClientRegistry._last_evicted_at -= 10
+    VectorClientRegistry.get("qdrant", _Config(host="other"), object)
+
+    close.assert_called_once_with("idle")
+    assert [entry.client for entry in VectorClientRegistry._entries.values()].count(busy) == 1
+
+
+def test_pool_utilization_observations():
+    VectorClientRegistry.get("pgvector", _Config(host="a"), lambda: "pool", pool_usage=lambda _: (2, 8))
+    VectorClientRegistry.get("qdrant", _Config(host="a"), object)
+
+    observations = list(VectorClientRegistry._observe_pool_utilization(MagicMock()))
+    clients = {o.attributes["backend"]: o.value for o in VectorClientRegistry._observe_clients(MagicMock())}
+
+    assert [(o.value, o.attributes["backend"]) for o in observations] == [(0.25, "pgvector")]
+    assert clients == {"pgvector": 1, "qdrant": 1}
+
+
+def test_vector_instances_do_not_hold_closed_clients():
+    clients = []
+
+    def create_client(config):
+        client = MagicMock()
+        client.has_collection.return_value = False
+        clients.append(client)
+        return client
+
+    config = MilvusConfig(uri="http://localhost:19530", user="root", password="Milvus")
+    with patch.object(MilvusVector, "_create_client", side_effect=create_client):
+        vector = MilvusVector("collection", config)
+        # e.g. evicted while the vector is held by a long-running indexing job
+        VectorClientRegistry.clear()
+        vector.delete()
+
+    assert len(clients) == 2
+    clients[0].close.assert_called_once()
+    assert clients[0].has_collection.call_count == 1
+    clients[1].has_collection.assert_called_once_with("collection")
+
+
+@patch("psycopg2.connect")
+def test_pgvector_instances_share_a_blocking_pool(mock_connect):
+    mock_connect.side_effect = lambda *args, **kwargs: MagicMock(closed=0)
+    config = PGVectorConfig(
+        host="localhost",
+        port=5432,
+        user="postgres",
+        password="difyai123456",
+        database="dify",
+        min_connection=1,
+        max_connection=1,
+    )
+
+    first = PGVector("first", config)
+    second = PGVector("second", config)
+    pool = first.pool
+
+    assert isinstance(pool, _BlockingConnectionPool)
+    assert second.pool is pool
+    assert mock_connect.call_count == 1
+
+    conn = pool.getconn()
+    assert pool.usage() == (1, 1)
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.getconn()))
+    waiter.start()
+    waiter.join(0.2)
+    assert acquired == []
+
+    pool.putconn(conn)
+    waiter.join(5)
+    assert acquired == [conn]
+    pool.putconn(conn)
+
+    with second._get_cursor():
+        assert pool.usage() == (1, 1)
+    assert pool.usage() == (0, 1)
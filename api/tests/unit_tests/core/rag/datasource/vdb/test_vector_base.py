@@ -0,0 +1,74 @@
+from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.models.document import Document
+
+
+class InMemoryVector(BaseVector):
+    def __init__(self, stored_ids: set[str]):
+        super().__init__("collection")
+        self.stored_ids = stored_ids
+        self.existing_ids_calls: list[list[str]] = []
+
+    def get_type(self) -> str:
+        return "in-memory"
+
+    def create(self, texts, embeddings, **kwargs):
+        raise NotImplementedError
+
+    def add_texts(self, documents, embeddings, **kwargs):
+        raise NotImplementedError
+
+    def text_exists(self, id: str) -> bool:
+        return id in self.stored_ids
+
+    def delete_by_ids(self, ids):
+        raise NotImplementedError
+
+    def delete_by_metadata_field(self, key, value):
+        raise NotImplementedError
+
+    def search_by_vector(self, query_vector, **kwargs):
+        raise NotImplementedError
+
+    def search_by_full_text(self, query, **kwargs):
+        raise NotImplementedError
+
+    def delete(self):
+        raise NotImplementedError
+
+
+class BulkInMemoryVector(InMemoryVector):
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        self.existing_ids_calls.append(ids)
+        return self.stored_ids.intersection(ids)
+
+    def text_exists(self, id: str) -> bool:
+        raise AssertionError("duplicates must be checked in bulk")
+
+
+def document(doc_id=None) -> Document:
+    return Document(page_content="text", metadata={"doc_id": doc_id} if doc_id else {})
+
+
+def test_existing_ids_falls_back_to_text_exists():
+    vector = InMemoryVector({"1", "3"})
+
+    assert vector.existing_ids(["1", "2", "3"]) == {"1", "3"}
+
+
+def test_duplicates_are_filtered_with_one_bulk_check():
+    vector = BulkInMemoryVector({"1", "3"})
+    texts = [document("1"), document("2"), document(), document("3"), document("4")]
+
+    filtered = vector._filter_duplicate_texts(texts)
+
+    assert [text.metadata.get("doc_id") for text in filtered] == ["2", None, "4"]
+    assert vector.existing_ids_calls == [["1", "2", "3", "4"]]
+    # filtered in place, like before
+    assert filtered is texts
+
+
+def test_no_bulk_check_without_doc_ids():
+    vector = BulkInMemoryVector({"1"})
+
+    assert len(vector._filter_duplicate_texts([document(), document()])) == 2
+    assert vector.existing_ids_calls == []
@@ -0,0 +1,126 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from configs import dify_config
+from core.rag.datasource.vdb.vector_factory import Vector
+from core.rag.models.document import Document
+
+
+class FakeEmbeddings:
+    def __init__(self, on_embed=None):
+        self.embedded_batches: list[list[str]] = []
+        self.on_embed = on_embed
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.on_embed:
+            self.on_embed(len(self.embedded_batches))
+        self.embedded_batches.append(texts)
+        return [[float(len(text))] for text in texts]
+
+
+class FakeVectorProcessor:
+    def __init__(self, on_create=None):
+        self.inserted_batches: list[list[str]] = []
+        self.on_create = on_create
+
+    def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
+        if self.on_create:
+            self.on_create(len(self.inserted_batches))
+        assert len(texts) == len(embeddings)
+        self.inserted_batches.append([document.page_content for document in texts])
+
+
+def build_vector(embeddings: FakeEmbeddings, vector_processor: FakeVectorProcessor) -> Vector:
+    vector = Vector.__new__(Vector)
+    vector._embeddings = embeddings
+    vector._vector_processor = vector_processor
+    return vector
+
+
+def documents(count: int) -> list[Document]:
+    return [Document(page_content=f"text {i}", metadata={"doc_id": str(i)}) for i in range(count)]
+
+
+@pytest.fixture
+def pipeline_config(monkeypatch):
+    monkeypatch.setattr(dify_config, "VECTOR_CREATE_PIPELINE_ENABLED", True)
+    monkeypatch.setattr(dify_config, "VECTOR_CREATE_PIPELINE_MAX_PENDING_BATCHES", 2)
+
+
+def test_next_batch_is_embedded_while_the_previous_one_is_inserted(pipeline_config):
+    second_batch_embedding = threading.Event()
+
+    def on_embed(batch_index):
+        if batch_index == 1:
+            second_batch_embedding.set()
+
+    def on_create(batch_index):
+        if batch_index == 0:
+            # the insert of the first batch only completes once the second batch is being embedded
+            assert second_batch_embedding.wait(timeout=5)
+
+    embeddings = FakeEmbeddings(on_embed)
+    vector_processor = FakeVectorProcessor(on_create)
+
+    build_vector(embeddings, vector_processor).create(documents(2500))
+
+    assert [len(batch) for batch in vector_processor.inserted_batches] == [1000, 1000, 500]
+    assert vector_processor.inserted_batches == embeddings.embedded_batches
+
+
+def test_pending_batches_are_bounded(pipeline_config):
+    embeddings = FakeEmbeddings()
+    pending_at_embed: list[int] = []
+
+    def on_embed(batch_index):
+        pending_at_embed.append(batch_index - len(vector_processor.inserted_batches))
+
+    def on_create(batch_index):
+        time.sleep(0.02)
+
+    embeddings.on_embed = on_embed
+    vector_processor = FakeVectorProcessor(on_create)
+
+    build_vector(embeddings, vector_processor).create(documents(6000))
+
+    assert len(vector_processor.inserted_batches) == 6
+    # embedding a batch while the 2 previous ones wait for or are being inserted
+    assert max(pending_at_embed) <= 2
+
+
+def test_failed_inserts_stop_the_pipeline(pipeline_config):
+    def on_create(batch_index):
+        raise ValueError("vector store unavailable")
+
+    embeddings = FakeEmbeddings()
+
+    with pytest.raises(ValueError, match="vector store unavailable"):
+        build_vector(embeddings, FakeVectorProcessor(on_create)).create(documents(10000))
+
+    assert len(embeddings.embedded_batches) < 10
+
+
+def test_batches_are_processed_one_after_another_when_disabled(monkeypatch):
+    monkeypatch.setattr(dify_config, "VECTOR_CREATE_PIPELINE_ENABLED", False)
+    steps: list[str] = []
+    embeddings = FakeEmbeddings(lambda batch_index: steps.append(f"embed {batch_index}"))
+    vector_processor = FakeVectorProcessor(lambda batch_index: steps.append(f"insert {batch_index}"))
+
+    build_vector(embeddings, vector_processor).create(documents(2001))
+
+    assert steps == ["embed 0", "insert 0", "embed 1", "insert 1", "embed 2", "insert 2"]
+
+
+def test_duplicate_texts_are_filtered_with_one_bulk_check():
+    vector_processor = FakeVectorProcessor()
+    vector_processor.existing_ids = MagicMock(return_value={"1"})
+    embeddings = FakeEmbeddings()
+    texts = documents(3)
+
+    build_vector(embeddings, vector_processor).add_texts(texts, duplicate_check=True)
+
+    vector_processor.existing_ids.assert_called_once_with(["0", "1", "2"])
+    assert vector_processor.inserted_batches == [["text 0", "text 2"]]
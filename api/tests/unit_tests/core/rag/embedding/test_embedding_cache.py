@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from core.rag.embedding.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture(autouse=True)
+def _reset_cache():
+    EmbeddingCache.clear_local()
+    EmbeddingCache.stats.reset()
+    yield
+    EmbeddingCache.clear_local()
+
+
+def _mock_pipeline(mock_redis, values):
+    pipe = MagicMock()
+    pipe.execute.return_value = values
+    mock_redis.pipeline.return_value = pipe
+    return pipe
+
+
+@patch("core.rag.embedding.embedding_cache.db")
+@patch("core.rag.embedding.embedding_cache.redis_client")
+def test_get_many_resolves_db_misses_in_one_batched_query(mock_redis, mock_db):
+    _mock_pipeline(mock_redis, [None, None, None])
+    row = MagicMock()
+    row.hash = "h1"
+    row.get_embedding.return_value = [0.6, 0.8]
+    mock_db.session.scalars.return_value = [row]
+
+    cache = EmbeddingCache(provider_name="openai", model_name="text-embedding-3-small")
+    result = cache.get_many(["h1", "h2", "h1", "h3"])
+
+    assert result == {"h1": [0.6, 0.8]}
+    assert mock_db.session.scalars.call_count == 1
+    assert EmbeddingCache.stats.to_dict() == {
+        "local_hits": 0,
+        "local_misses": 3,
+        "redis_hits": 0,
+        "redis_misses": 3,
+        "db_hits": 1,
+        "db_misses": 2,
+    }
+
+
+@patch("core.rag.embedding.embedding_cache.db")
+@patch("core.rag.embedding.embedding_cache.redis_client")
+def test_get_many_splits_db_lookup_by_batch_size(mock_redis, mock_db):
+    _mock_pipeline(mock_redis, [None] * 5)
+    mock_db.session.scalars.return_value = []
+
+    with patch("core.rag.embedding.embedding_cache.dify_config.EMBEDDING_CACHE_DB_BATCH_SIZE", 2):
+        EmbeddingCache(provider_name="p", model_name="m").get_many([f"h{i}" for i in range(5)])
+
+    assert mock_db.session.scalars.call_count == 3
+
+
+@patch("core.rag.embedding.embedding_cache.db")
+@patch("core.rag.embedding.embedding_cache.redis_client")
+def test_redis_hit_is_promoted_to_local_tier(mock_redis, mock_db):
+    encoded = np.asarray([0.6, 0.8], dtype=np.float64).tobytes()
+    _mock_pipeline(mock_redis, [encoded])
+
+    cache = EmbeddingCache(provider_name="p", model_name="m")
+    assert cache.get_many(["h1"]) == {"h1": [0.6, 0.8]}
+    assert cache.get_many(["h1"]) == {"h1": [0.6, 0.8]}
+
+    mock_db.session.scalars.assert_not_called()
+    assert mock_redis.pipeline.call_count == 1
+    stats = EmbeddingCache.stats.to_dict()
+    assert stats["local_hits"] == 1
+    assert stats["redis_hits"] == 1
+
+
+@patch("core.rag.embedding.embedding_cache.db")
+@patch("core.rag.embedding.embedding_cache.redis_client")
+def test_local_tier_is_bounded_by_bytes(mock_redis, mock_db):
+    pipe = _mock_pipeline(mock_redis, [])
+    # each two-dimensional float64 embedding takes 16 bytes
+    with patch("core.rag.embedding.embedding_cache.dify_config.EMBEDDING_CACHE_LOCAL_MAX_BYTES", 32):
+        cache = EmbeddingCache(provider_name="p", model_name="m")
+        cache.set_many({"h1": [1.0, 0.0], "h2": [0.0, 1.0], "h3": [0.6, 0.8]})
+        pipe.execute.return_value = [None]
+        mock_db.session.scalars.return_value = []
+        result = cache.get_many(["h1", "h2", "h3"])
+
+    assert result == {"h2": [0.0, 1.0], "h3": [0.6, 0.8]}
+    assert mock_db.session.commit.call_count == 1
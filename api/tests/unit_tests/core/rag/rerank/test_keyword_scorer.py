@@ -0,0 +1,118 @@
+import math
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from core.rag.models.document import Document
+from core.rag.rerank.keyword_scorer import KeywordScorer, get_documents_keywords
+
+
+def reference_scores(query_keywords, documents_keywords) -> list[float]:
+    """Dict based TF-IDF cosine similarity, as previously computed by the retrieval and weight rerank."""
+    total_documents = len(documents_keywords)
+    all_keywords = set()
+    for document_keywords in documents_keywords:
+        all_keywords.update(document_keywords)
+    keyword_idf = {}
+    for keyword in all_keywords:
+        doc_count_containing_keyword = sum(1 for doc_keywords in documents_keywords if keyword in doc_keywords)
+        keyword_idf[keyword] = math.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
+
+    query_tfidf = {keyword: count * keyword_idf.get(keyword, 0) for keyword, count in Counter(query_keywords).items()}
+    similarities = []
+    for document_keywords in documents_keywords:
+        document_tfidf = {
+            keyword: count * keyword_idf.get(keyword, 0) for keyword, count in Counter(document_keywords).items()
+        }
+        numerator = sum(query_tfidf[x] * document_tfidf[x] for x in set(query_tfidf) & set(document_tfidf))
+        denominator = math.sqrt(sum(v**2 for v in query_tfidf.values())) * math.sqrt(
+            sum(v**2 for v in document_tfidf.values())
+        )
+        similarities.append(float(numerator) / denominator if denominator else 0.0)
+    return similarities
+
+
+def make_keyword_sets(count: int, vocabulary_size: int, keywords_per_document: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"keyword{i}" for i in range(vocabulary_size)]
+    query = set(rng.choice(vocabulary, 5, replace=False).tolist())
+    documents = [set(rng.choice(vocabulary, keywords_per_document, replace=False).tolist()) for _ in range(count)]
+    return query, documents
+
+
+def test_scores_match_reference():
+    query, documents = make_keyword_sets(count=200, vocabulary_size=300, keywords_per_document=12)
+    documents.append(set())
+
+    scores = KeywordScorer(documents).score(query)
+
+    assert scores == pytest.approx(reference_scores(query, documents))
+    assert scores[-1] == 0.0
+
+
+def test_repeated_keywords_count_as_term_frequency():
+    documents = [["apple", "apple", "pear"], ["pear"], ["plum"]]
+    query = ["apple", "pear", "pear"]
+
+    assert KeywordScorer(documents).score(query) == pytest.approx(reference_scores(query, documents))
+
+
+def test_query_without_known_keywords_scores_zero():
+    scorer = KeywordScorer([{"apple"}, {"pear"}])
+
+    assert scorer.score({"plum"}) == [0.0, 0.0]
+    assert scorer.score(set()) == [0.0, 0.0]
+    assert KeywordScorer([]).score({"apple"}) == []
+
+
+@pytest.fixture
+def handler():
+    handler = MagicMock()
+    handler.extract_keywords.side_effect = lambda text, _: set(text.split())
+    return handler
+
+
+def _document(content, **metadata):
+    return Document(page_content=content, metadata={"dataset_id": "dataset", **metadata})
+
+
+@patch("core.rag.rerank.keyword_scorer.SegmentLoader")
+@patch("core.rag.rerank.keyword_scorer.dify_config")
+def test_documents_keywords_reuse_stored_segment_keywords(mock_config, mock_loader, handler):
+    mock_config.KEYWORD_SCORE_USE_SEGMENT_KEYWORDS = True
+    mock_loader.load_segments.return_value = (
+        {
+            "stored": MagicMock(dataset_id="dataset", keywords=["stored", "keyword"]),
+            "empty": MagicMock(dataset_id="dataset", keywords=[]),
+        },
+        {},
+    )
+    documents = [
+        _document("extracted from stored", doc_id="stored"),
+        _document("extracted from empty", doc_id="empty"),
+        _document("extracted from known", doc_id="known", keywords={"known"}),
+    ]
+
+    keywords = get_documents_keywords(documents, handler)
+
+    assert keywords == [{"stored", "keyword"}, {"extracted", "from", "empty"}, {"known"}]
+    assert documents[0].metadata["keywords"] == {"stored", "keyword"}
+    # limited like the stored keywords
+    handler.extract_keywords.assert_called_once_with("extracted from empty", 10)
+    _, kwargs = mock_loader.load_segments.call_args
+    assert kwargs["dataset_ids"] == {"dataset"}
+    assert sorted(kwargs["index_node_ids"]) == ["empty", "stored"]
+
+
+@patch("core.rag.rerank.keyword_scorer.SegmentLoader")
+@patch("core.rag.rerank.keyword_scorer.dify_config")
+def test_documents_keywords_without_stored_keywords(mock_config, mock_loader, handler):
+    mock_config.KEYWORD_SCORE_USE_SEGMENT_KEYWORDS = False
+
+    keywords = get_documents_keywords([_document("a b", doc_id="node")], handler)
+
+    assert keywords == [{"a", "b"}]
+    mock_loader.load_segments.assert_not_called()
+    handler.extract_keywords.assert_called_once_with("a b", None)
@@ -0,0 +1,33 @@
+"""
+Benchmarks of the keyword scorer against the previous dict based scoring.
+
+Compare the groups by running this file with `pytest -m benchmark --benchmark-only`,
+keywords are generated up front so only the scoring itself is measured.
+"""
+
+import pytest
+
+from core.rag.rerank.keyword_scorer import KeywordScorer
+from tests.unit_tests.core.rag.rerank.test_keyword_scorer import make_keyword_sets, reference_scores
+
+pytestmark = pytest.mark.benchmark
+
+CANDIDATE_COUNTS = [100, 1000, 10000]
+
+
+@pytest.fixture(scope="module", params=CANDIDATE_COUNTS, ids=lambda count: f"{count}_candidates")
+def keyword_sets(request):
+    return request.param, make_keyword_sets(count=request.param, vocabulary_size=2000, keywords_per_document=20)
+
+
+def test_reference_scoring(benchmark, keyword_sets):
+    count, (query, documents) = keyword_sets
+    benchmark.group = f"keyword_score_{count}"
+    benchmark.pedantic(reference_scores, args=(query, documents), rounds=1, iterations=1)
+
+
+def test_keyword_scorer(benchmark, keyword_sets):
+    count, (query, documents) = keyword_sets
+    benchmark.group = f"keyword_score_{count}"
+    scores = benchmark.pedantic(lambda: KeywordScorer(documents).score(query), rounds=3, iterations=1)
+    assert len(scores) == count
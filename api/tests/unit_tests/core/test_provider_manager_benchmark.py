@@ -0,0 +1,117 @@
+"""
+Benchmark of `ProviderManager.get_configurations` for a workspace with 20 custom providers, with and without the
+decryption cache.
+
+Compare the groups by running this file with `pytest -m benchmark --benchmark-only`.
+Provider records are served from memory and the credentials caches miss, so the private key loading and the
+decryption of the credentials dominate, as on a request after the credentials cache expired.
+"""
+
+import base64
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from configs import dify_config
+from core.entities.provider_entities import SystemConfiguration
+from core.helper.provider_configurations_cache import ProviderConfigurationsCache
+from core.model_runtime.entities.common_entities import I18nObject
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.entities.provider_entities import (
+    ConfigurateMethod,
+    CredentialFormSchema,
+    FormType,
+    ProviderCredentialSchema,
+    ProviderEntity,
+)
+from core.provider_manager import ProviderManager
+from libs import rsa
+from tests.unit_tests.libs.test_rsa import FakeRedis, FakeStorage
+
+pytestmark = pytest.mark.benchmark
+
+PROVIDER_COUNT = 20
+SECRET_VARIABLES = ["api_key", "api_secret"]
+TENANT_ID = "tenant"
+
+
+def provider_entity(name: str) -> ProviderEntity:
+    return ProviderEntity(
+        provider=name,
+        label=I18nObject(en_US=name),
+        supported_model_types=[ModelType.LLM],
+        configurate_methods=[ConfigurateMethod.PREDEFINED_MODEL],
+        provider_credential_schema=ProviderCredentialSchema(
+            credential_form_schemas=[
+                CredentialFormSchema(variable=variable, label=I18nObject(en_US=variable), type=FormType.SECRET_INPUT)
+                for variable in SECRET_VARIABLES
+            ]
+        ),
+    )
+
+
+@pytest.fixture(scope="module")
+def workspace():
+    redis, storage = FakeRedis(), FakeStorage()
+    with patch("libs.rsa.redis_client", redis), patch("libs.rsa.storage", storage):
+        public_key = rsa.generate_key_pair(TENANT_ID)
+    entities = [provider_entity(f"provider_{i}") for i in range(PROVIDER_COUNT)]
+    records = {
+        entity.provider: [
+            SimpleNamespace(
+                id=f"record_{entity.provider}",
+                provider_type="custom",
+                encrypted_config=json.dumps(
+                    {
+                        variable: base64.b64encode(rsa.encrypt(f"{entity.provider}-{variable}", public_key)).decode()
+                        for variable in SECRET_VARIABLES
+                    }
+                ),
+            )
+        ]
+        for entity in entities
+    }
+    return redis, storage, entities, records
+
+
+@pytest.fixture
+def provider_manager(workspace):
+    redis, storage, entities, records = workspace
+    model_provider_factory = MagicMock()
+    model_provider_factory.return_value.get_providers.return_value = entities
+    with (
+        patch("libs.rsa.redis_client", redis),
+        patch("libs.rsa.storage", storage),
+        patch("core.helper.model_provider_cache.redis_client", FakeRedis()),
+        patch("core.provider_manager.ModelProviderFactory", model_provider_factory),
+        patch.object(ProviderConfigurationsCache, "is_enabled", return_value=False),
+        patch.object(ProviderManager, "_get_all_providers", return_value=records),
+        patch.object(ProviderManager, "_init_trial_provider_records", side_effect=lambda tenant_id, records: records),
+        patch.object(ProviderManager, "_get_all_provider_models", return_value={}),
+        patch.object(ProviderManager, "_get_all_preferred_model_providers", return_value={}),
+        patch.object(ProviderManager, "_get_all_provider_model_settings", return_value={}),
+        patch.object(ProviderManager, "_get_all_provider_load_balancing_configs", return_value={}),
+        patch.object(ProviderManager, "_to_system_configuration", return_value=SystemConfiguration(enabled=False)),
+    ):
+        yield
+
+
+@pytest.mark.parametrize("cache_enabled", [False, True], ids=["without_cache", "with_cache"])
+def test_get_configurations(benchmark, provider_manager, monkeypatch, cache_enabled):
+    monkeypatch.setattr(dify_config, "DECRYPTION_CACHE_ENABLED", cache_enabled)
+    rsa.DecryptionCache.clear()
+    benchmark.group = f"get_configurations_{PROVIDER_COUNT}_providers"
+
+    def get_configurations():
+        # a request builds its own manager, the credentials cache is not shared with the next one
+        with patch("core.helper.model_provider_cache.redis_client", FakeRedis()):
+            return ProviderManager().get_configurations(TENANT_ID)
+
+    configurations = benchmark.pedantic(get_configurations, rounds=20, iterations=1, warmup_rounds=1)
+
+    assert len(list(configurations.values())) == PROVIDER_COUNT
+    credentials = configurations["provider_0"].custom_configuration.provider.credentials
+    assert credentials == {"api_key": "provider_0-api_key", "api_secret": "provider_0-api_secret"}
+    rsa.DecryptionCache.clear()
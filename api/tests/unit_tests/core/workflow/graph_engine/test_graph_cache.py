@@ -0,0 +1,93 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from configs import dify_config
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.graph_cache import CompiledGraphCache
+
+GRAPH = json.dumps(
+    {
+        "nodes": [
+            {"id": "start", "data": {"type": "start", "title": "Start"}},
+            {"id": "llm", "data": {"type": "llm", "title": "LLM"}},
+        ],
+        "edges": [{"id": "start-llm", "source": "start", "target": "llm"}],
+    }
+)
+
+
+@pytest.fixture(autouse=True)
+def graph_cache(monkeypatch):
+    monkeypatch.setattr(dify_config, "WORKFLOW_GRAPH_CACHE_ENABLED", True)
+    monkeypatch.setattr(dify_config, "WORKFLOW_GRAPH_CACHE_SIZE", 2)
+    CompiledGraphCache.clear()
+    yield
+    CompiledGraphCache.clear()
+
+
+def get(compile_graph, workflow_id="workflow", version="1", serialized_graph=GRAPH):
+    return CompiledGraphCache.get_or_compile(
+        workflow_id=workflow_id, version=version, serialized_graph=serialized_graph, compile_graph=compile_graph
+    )
+
+
+def test_graphs_are_compiled_once_per_version():
+    compile_graph = MagicMock(side_effect=lambda graph_config: Graph.init(graph_config=graph_config))
+
+    graph_config, graph = get(compile_graph)
+    cached_graph_config, cached_graph = get(compile_graph)
+
+    compile_graph.assert_called_once()
+    assert cached_graph is graph
+    assert cached_graph_config is graph_config
+    assert graph.root_node_id == "start"
+    assert graph.node_ids == ["start", "llm"]
+
+
+def test_drafts_edited_in_place_are_recompiled():
+    compile_graph = MagicMock(side_effect=lambda graph_config: Graph.init(graph_config=graph_config))
+    edited = json.loads(GRAPH)
+    edited["nodes"][1]["data"]["title"] = "Edited"
+
+    get(compile_graph, version="draft")
+    graph_config, graph = get(compile_graph, version="draft", serialized_graph=json.dumps(edited))
+
+    assert compile_graph.call_count == 2
+    assert graph.node_id_config_mapping["llm"]["data"]["title"] == "Edited"
+    assert graph_config == edited
+
+
+def test_least_recently_used_graphs_are_evicted():
+    compile_graph = MagicMock(side_effect=lambda graph_config: Graph.init(graph_config=graph_config))
+
+    get(compile_graph, workflow_id="a")
+    get(compile_graph, workflow_id="b")
+    get(compile_graph, workflow_id="a")
+    get(compile_graph, workflow_id="c")
+    get(compile_graph, workflow_id="a")
+    get(compile_graph, workflow_id="b")
+
+    assert compile_graph.call_count == 4
+
+
+def test_compile_errors_are_not_cached():
+    compile_graph = MagicMock(side_effect=ValueError("nodes or edges not found in workflow graph"))
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            get(compile_graph)
+
+    assert compile_graph.call_count == 2
+
+
+def test_graphs_are_compiled_on_every_run_when_disabled(monkeypatch):
+    monkeypatch.setattr(dify_config, "WORKFLOW_GRAPH_CACHE_ENABLED", False)
+    compile_graph = MagicMock(side_effect=lambda graph_config: Graph.init(graph_config=graph_config))
+
+    _, graph = get(compile_graph)
+    _, other_graph = get(compile_graph)
+
+    assert compile_graph.call_count == 2
+    assert other_graph is not graph
@@ -0,0 +1,139 @@
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+from core.workflow.graph_engine.graph_engine import GraphEngineThreadPool
+from core.workflow.graph_engine.parallel_scheduler import TaskGroup, WorkflowParallelScheduler
+
+
+def _blocking_task(started: threading.Semaphore, release: threading.Event, results: list, value):
+    started.release()
+    release.wait(5)
+    results.append(value)
+    return value
+
+
+def test_submit_runs_task_and_returns_result():
+    scheduler = WorkflowParallelScheduler(max_workers=2)
+    group = TaskGroup(max_workers=2)
+
+    future = scheduler.submit(group, lambda a, b: a + b, 1, b=2)
+
+    assert future.result(timeout=5) == 3
+
+
+def test_submit_propagates_exception():
+    scheduler = WorkflowParallelScheduler(max_workers=1)
+    group = TaskGroup(max_workers=1)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    future = scheduler.submit(group, fail)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        future.result(timeout=5)
+
+
+def test_global_and_group_limits():
+    scheduler = WorkflowParallelScheduler(max_workers=3)
+    first_group = TaskGroup(max_workers=2)
+    second_group = TaskGroup(max_workers=2)
+    started = threading.Semaphore(0)
+    release = threading.Event()
+    results: list = []
+
+    futures = [scheduler.submit(first_group, _blocking_task, started, release, results, i) for i in range(4)]
+    futures += [scheduler.submit(second_group, _blocking_task, started, release, results, i) for i in range(4, 6)]
+    for _ in range(3):
+        assert started.acquire(timeout=5)
+    assert not started.acquire(timeout=0.2)
+
+    stats = scheduler.stats()
+    assert stats["workers"] == 3
+    assert stats["running_tasks"] == 3
+    assert stats["queued_tasks"] == 3
+    # the first group can not take the third worker above its own limit, the second group gets it
+    assert sum(1 for f in futures[:4] if f.running()) == 2
+    assert sum(1 for f in futures[4:] if f.running()) == 1
+
+    release.set()
+    wait(futures, timeout=5)
+    assert sorted(results) == list(range(6))
+    stats = scheduler.stats()
+    assert stats["queued_tasks"] == 0
+    assert stats["queued_groups"] == 0
+
+
+def test_groups_are_served_in_turn():
+    scheduler = WorkflowParallelScheduler(max_workers=1)
+    blocking_group = TaskGroup(max_workers=1)
+    busy_group = TaskGroup(max_workers=10)
+    other_group = TaskGroup(max_workers=10)
+    started = threading.Semaphore(0)
+    release = threading.Event()
+    order: list = []
+
+    blocker = scheduler.submit(blocking_group, _blocking_task, started, release, [], None)
+    assert started.acquire(timeout=5)
+    futures = [scheduler.submit(busy_group, order.append, f"busy-{i}") for i in range(3)]
+    futures.append(scheduler.submit(other_group, order.append, "other"))
+
+    release.set()
+    wait([blocker, *futures], timeout=5)
+    # the busy group goes to the back of the line once served, the other group does not wait for its backlog
+    assert order == ["busy-0", "other", "busy-1", "busy-2"]
+
+
+def test_run_pending_runs_queued_task_in_caller():
+    scheduler = WorkflowParallelScheduler(max_workers=1)
+    group = TaskGroup(max_workers=1)
+    started = threading.Semaphore(0)
+    release = threading.Event()
+
+    blocker = scheduler.submit(group, _blocking_task, started, release, [], None)
+    assert started.acquire(timeout=5)
+    future = scheduler.submit(group, threading.current_thread)
+
+    assert scheduler.run_pending([future]) is True
+    assert future.result(timeout=0) is threading.current_thread()
+    assert scheduler.run_pending([future]) is False
+
+    release.set()
+    blocker.result(timeout=5)
+
+
+def test_nested_tasks_do_not_deadlock_saturated_scheduler():
+    scheduler = WorkflowParallelScheduler(max_workers=2)
+    group = TaskGroup(max_workers=2)
+
+    def parent(value):
+        children = [scheduler.submit(group, lambda v=v: v) for v in range(value, value + 3)]
+        while True:
+            done, not_done = wait(children, timeout=0.05)
+            if not not_done:
+                return sum(f.result() for f in done)
+            scheduler.run_pending(children)
+
+    parents = [scheduler.submit(group, parent, i * 10) for i in range(4)]
+
+    assert [f.result(timeout=5) for f in parents] == [3, 33, 63, 93]
+
+
+def test_graph_engine_thread_pool_enforces_submit_count():
+    scheduler = WorkflowParallelScheduler(max_workers=1)
+    thread_pool = GraphEngineThreadPool(max_workers=1, max_submit_count=1, scheduler=scheduler)
+
+    future = thread_pool.submit(lambda: 1)
+    future.add_done_callback(thread_pool.task_done_callback)
+    assert future.result(timeout=5) == 1
+    assert thread_pool.submit_count == 0
+
+    started = threading.Semaphore(0)
+    release = threading.Event()
+    thread_pool.submit(_blocking_task, started, release, [], None)
+    with pytest.raises(ValueError):
+        thread_pool.submit(lambda: None)
+
+    release.set()
@@ -1,7 +1,9 @@
+import json
 import uuid
 from collections.abc import Generator
 from datetime import UTC, datetime
 
+from configs import dify_config
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.graph_engine.entities.event import (
     GraphEngineEvent,
@@ -11,6 +13,7 @@ from core.workflow.graph_engine.entities.event import (
 )
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
+from core.workflow.graph_engine.graph_cache import CompiledGraphCache
 from core.workflow.nodes.answer.answer_stream_processor import AnswerStreamProcessor
 from core.workflow.nodes.enums import NodeType
 from core.workflow.nodes.start.entities import StartNodeData
@@ -214,3 +217,51 @@ def test_process():
         pass
 
     assert stream_contents == "c012da01b"
+
+
+def test_process_does_not_change_cached_graph(monkeypatch):
+    monkeypatch.setattr(dify_config, "WORKFLOW_GRAPH_CACHE_ENABLED", True)
+    CompiledGraphCache.clear()
+    serialized_graph = json.dumps(
+        {
+            "edges": [
+                {"id": "start-llm1", "source": "start", "target": "llm1"},
+                {"id": "llm1-answer", "source": "llm1", "sourceHandle": "success-branch", "target": "answer"},
+                {"id": "llm1-fallback", "source": "llm1", "sourceHandle": "fail-branch", "target": "fallback"},
+            ],
+            "nodes": [
+                {"data": {"type": "start"}, "id": "start"},
+                {"data": {"type": "llm", "error_strategy": "fail-branch"}, "id": "llm1"},
+                {"data": {"type": "answer", "title": "answer", "answer": "a{{#llm1.text#}}"}, "id": "answer"},
+                {"data": {"type": "answer", "title": "fallback", "answer": "failed"}, "id": "fallback"},
+            ],
+        }
+    )
+
+    def run() -> str:
+        _, graph = CompiledGraphCache.get_or_compile(
+            workflow_id="chatflow",
+            version="1",
+            serialized_graph=serialized_graph,
+            compile_graph=lambda graph_config: Graph.init(graph_config=graph_config),
+        )
+        variable_pool = VariablePool(system_variables=SystemVariable(user_id="aaa", files=[]), user_inputs={})
+        variable_pool.add(["llm1", "text"], "0")
+        answer_stream_processor = AnswerStreamProcessor(graph=graph, variable_pool=variable_pool)
+
+        def graph_generator() -> Generator[GraphEngineEvent, None, None]:
+            for node_id in ("start", "llm1", "answer"):
+                yield from _publish_events(graph, node_id)
+
+        stream_contents = "".join(
+            event.chunk_content
+            for event in answer_stream_processor.process(graph_generator())
+            if isinstance(event, NodeRunStreamChunkEvent)
+        )
+        assert graph.answer_stream_generate_routes.answer_dependencies["answer"] == ["llm1"]
+        return stream_contents
+
+    try:
+        assert run() == run()
+    finally:
+        CompiledGraphCache.clear()
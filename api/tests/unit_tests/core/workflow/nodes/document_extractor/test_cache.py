@@ -0,0 +1,217 @@
+import hashlib
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.file import File, FileTransferMethod, FileType
+from core.workflow.nodes.document_extractor.cache import ExtractedTextCache
+from core.workflow.nodes.document_extractor.node import _extract_text_from_file
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.ttls: dict[str, int] = {}
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def zadd(self, key, mapping):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    def zrangebyscore(self, key, min_score, max_score, start, num):
+        members = sorted(self.sorted_sets.get(key, {}).items(), key=lambda member: member[1])
+        return [member.encode() for member, score in members if min_score <= score <= max_score][start : start + num]
+
+    def zrem(self, key, member):
+        self.sorted_sets.get(key, {}).pop(member, None)
+
+
+class FakeStorage:
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+
+    def save(self, filename, data):
+        self.files[filename] = data
+
+    def load_once(self, filename):
+        if filename not in self.files:
+            raise FileNotFoundError(filename)
+        return self.files[filename]
+
+    def delete(self, filename):
+        self.files.pop(filename, None)
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def fake_storage():
+    return FakeStorage()
+
+
+@pytest.fixture(autouse=True)
+def cache_config(fake_redis, fake_storage):
+    with (
+        patch("core.workflow.nodes.document_extractor.cache.redis_client", fake_redis),
+        patch("core.workflow.nodes.document_extractor.cache.storage", fake_storage),
+        patch("core.workflow.nodes.document_extractor.cache.dify_config") as mock_config,
+    ):
+        mock_config.DOCUMENT_EXTRACTOR_CACHE_ENABLED = True
+        mock_config.DOCUMENT_EXTRACTOR_CACHE_TTL = 60
+        mock_config.DOCUMENT_EXTRACTOR_CACHE_MAX_TEXT_SIZE = 1024 * 1024
+        mock_config.DOCUMENT_EXTRACTOR_CACHE_REDIS_MAX_SIZE = 1024
+        yield mock_config
+
+
+def test_small_texts_are_cached_in_redis(fake_redis, fake_storage):
+    cache = ExtractedTextCache(content_hash="hash", file_type=".txt")
+    assert cache.get() is None
+
+    cache.set("extracted text " * 100)
+
+    assert cache.get() == "extracted text " * 100
+    assert fake_redis.ttls[cache.cache_key] == 60
+    assert fake_storage.files == {}
+
+
+def test_large_texts_are_cached_in_storage(fake_redis, fake_storage):
+    text = os.urandom(4096).hex()
+    cache = ExtractedTextCache(content_hash="hash", file_type=".pdf")
+
+    cache.set(text)
+
+    assert cache.storage_path in fake_storage.files
+    assert len(fake_redis.data[cache.cache_key]) == 1
+    assert cache.get() == text
+
+    # the entry is a miss once its storage object is gone
+    fake_storage.files.clear()
+    assert cache.get() is None
+    assert cache.cache_key not in fake_redis.data
+
+
+def test_texts_over_the_size_limit_are_not_cached(cache_config, fake_redis, fake_storage):
+    cache_config.DOCUMENT_EXTRACTOR_CACHE_MAX_TEXT_SIZE = 10
+    cache = ExtractedTextCache(content_hash="hash", file_type=".txt")
+
+    cache.set("a text longer than 10 bytes")
+
+    assert cache.get() is None
+    assert fake_redis.data == {}
+
+
+def test_expired_storage_entries_are_deleted_by_later_writes(fake_redis, fake_storage):
+    expired = ExtractedTextCache(content_hash="expired", file_type=".pdf")
+    expired.set(os.urandom(4096).hex())
+    fake_redis.sorted_sets[ExtractedTextCache._EXPIRATIONS_KEY][expired.entry_id] = 0
+
+    ExtractedTextCache(content_hash="fresh", file_type=".pdf").set(os.urandom(4096).hex())
+
+    assert expired.storage_path not in fake_storage.files
+    assert expired.entry_id not in fake_redis.sorted_sets[ExtractedTextCache._EXPIRATIONS_KEY]
+    assert len(fake_storage.files) == 1
+
+
+def test_entries_depend_on_file_type():
+    ExtractedTextCache(content_hash="hash", file_type=".txt").set("text")
+
+    assert ExtractedTextCache(content_hash="hash", file_type=".md").get() is None
+
+
+def _file(transfer_method: FileTransferMethod, extension: str = ".txt", size: int = 100) -> File:
+    return File(
+        id="file",
+        tenant_id="tenant",
+        type=FileType.DOCUMENT,
+        transfer_method=transfer_method,
+        related_id="upload-file" if transfer_method != FileTransferMethod.REMOTE_URL else None,
+        remote_url="https://example.com/file" if transfer_method == FileTransferMethod.REMOTE_URL else None,
+        extension=extension,
+        size=size,
+        storage_key="upload_files/tenant/file",
+    )
+
+
+@patch("core.workflow.nodes.document_extractor.node._get_upload_file_hash", return_value="stored-hash")
+@patch("core.workflow.nodes.document_extractor.node._download_file_content", return_value=b"uploaded content")
+def test_uploaded_files_are_not_downloaded_on_hit(mock_download, mock_get_hash):
+    file = _file(FileTransferMethod.LOCAL_FILE)
+
+    assert _extract_text_from_file(file) == "uploaded content"
+    assert _extract_text_from_file(file) == "uploaded content"
+
+    mock_download.assert_called_once_with(file)
+
+
+@patch("core.workflow.nodes.document_extractor.node._extract_text_by_file_extension", return_value="remote text")
+@patch("core.workflow.nodes.document_extractor.node._download_file_content", return_value=b"remote content")
+def test_remote_files_are_parsed_once_per_content(mock_download, mock_extract):
+    file = _file(FileTransferMethod.REMOTE_URL)
+
+    assert _extract_text_from_file(file) == "remote text"
+    assert _extract_text_from_file(file) == "remote text"
+
+    assert mock_download.call_count == 2
+    mock_extract.assert_called_once()
+
+
+@patch("core.workflow.nodes.document_extractor.node._extract_text_by_file_extension", return_value="text")
+@patch("core.workflow.nodes.document_extractor.node._download_file_content", return_value=b"content")
+def test_files_are_not_cached_when_disabled(mock_download, mock_extract, cache_config, fake_redis):
+    cache_config.DOCUMENT_EXTRACTOR_CACHE_ENABLED = False
+
+    _extract_text_from_file(_file(FileTransferMethod.REMOTE_URL))
+    _extract_text_from_file(_file(FileTransferMethod.REMOTE_URL))
+
+    assert mock_extract.call_count == 2
+    assert fake_redis.data == {}
+
+
+@patch("core.workflow.nodes.document_extractor.node.dify_config")
+@patch("core.workflow.nodes.document_extractor.node.file_manager")
+@patch("core.workflow.nodes.document_extractor.node._extract_text_from_pdf")
+def test_large_pdfs_are_extracted_from_a_temporary_file(mock_extract_pdf, mock_file_manager, mock_node_config):
+    mock_node_config.DOCUMENT_EXTRACTOR_STREAMING_THRESHOLD = 1024
+    chunks = [b"%PDF-1.5\n", os.urandom(2048)]
+    mock_file_manager.download_stream.return_value = iter(chunks)
+
+    def extract_pdf(file_path):
+        assert isinstance(file_path, str)
+        with open(file_path, "rb") as f:
+            assert f.read() == b"".join(chunks)
+        return "pdf text"
+
+    mock_extract_pdf.side_effect = extract_pdf
+    file = _file(FileTransferMethod.REMOTE_URL, extension=".pdf", size=2057)
+
+    assert _extract_text_from_file(file) == "pdf text"
+    mock_file_manager.download_stream.assert_called_once_with(file)
+    mock_file_manager.download.assert_not_called()
+
+    # the streamed content is hashed for the cache
+    cache = ExtractedTextCache(content_hash=hashlib.sha3_256(b"".join(chunks)).hexdigest(), file_type=".pdf")
+    assert cache.get() == "pdf text"
+
+
+@patch("core.workflow.nodes.document_extractor.node._download_file_content")
+def test_small_pdfs_are_extracted_from_memory(mock_download):
+    mock_download.return_value = b"%PDF"
+    with patch(
+        "core.workflow.nodes.document_extractor.node._extract_text_from_pdf", MagicMock(return_value="text")
+    ) as m:
+        assert _extract_text_from_file(_file(FileTransferMethod.REMOTE_URL, extension=".pdf")) == "text"
+
+    m.assert_called_once_with(b"%PDF")
@@ -1,3 +1,4 @@
+import contextvars
 import time
 import uuid
 from unittest.mock import patch
@@ -7,9 +8,11 @@ from core.variables.segments import ArrayAnySegment, ArrayStringSegment
 from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
+from core.workflow.graph_engine.entities.event import IterationRunFailedEvent
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
+from core.workflow.graph_engine.parallel_scheduler import TaskGroup, WorkflowParallelScheduler
 from core.workflow.nodes.event import RunCompletedEvent
 from core.workflow.nodes.iteration.entities import ErrorHandleMode
 from core.workflow.nodes.iteration.iteration_node import IterationNode
@@ -885,3 +888,87 @@ def test_iteration_run_error_handle():
             assert item.run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
             assert item.run_result.outputs == {"output": ArrayAnySegment(value=[])}
     assert count == 14
+
+
+def test_failed_parallel_iteration_releases_pending_iterations():
+    graph_config = {
+        "edges": [{"id": "start-source-iteration-1-target", "source": "start", "target": "iteration-1"}],
+        "nodes": [
+            {"data": {"title": "Start", "type": "start", "variables": []}, "id": "start"},
+            {
+                "data": {
+                    "iterator_selector": ["start", "items"],
+                    "output_selector": ["tt", "output"],
+                    "output_type": "array[string]",
+                    "start_node_id": "tt",
+                    "title": "iteration",
+                    "type": "iteration",
+                },
+                "id": "iteration-1",
+            },
+            {
+                "data": {
+                    "iteration_id": "iteration-1",
+                    "template": "{{ arg1 }}",
+                    "title": "template transform",
+                    "type": "template-transform",
+                    "variables": [{"value_selector": ["iteration-1", "item"], "variable": "arg1"}],
+                },
+                "id": "tt",
+            },
+        ],
+    }
+    node_config = {
+        "data": {
+            "iterator_selector": ["start", "items"],
+            "output_selector": ["tt", "output"],
+            "output_type": "array[string]",
+            "start_node_id": "tt",
+            "title": "iteration",
+            "type": "iteration",
+            "is_parallel": True,
+            "parallel_nums": 1,
+            "error_handle_mode": ErrorHandleMode.TERMINATED,
+        },
+        "id": "iteration-1",
+    }
+    pool = VariablePool(
+        system_variables=SystemVariable(user_id="1", files=[], query="dify", conversation_id="abababa"),
+        user_inputs={},
+        environment_variables=[],
+    )
+    pool.add(["start", "items"], [str(i) for i in range(5)])
+    iteration_node = IterationNode(
+        id=str(uuid.uuid4()),
+        graph_init_params=GraphInitParams(
+            tenant_id="1",
+            app_id="1",
+            workflow_type=WorkflowType.WORKFLOW,
+            workflow_id="1",
+            graph_config=graph_config,
+            user_id="1",
+            user_from=UserFrom.ACCOUNT,
+            invoke_from=InvokeFrom.DEBUGGER,
+            call_depth=0,
+        ),
+        graph=Graph.init(graph_config=graph_config),
+        graph_runtime_state=GraphRuntimeState(variable_pool=pool, start_at=time.perf_counter()),
+        config=node_config,
+    )
+    iteration_node.init_node_data(node_config["data"])
+
+    def tt_generator(self):
+        return NodeRunResult(status=WorkflowNodeExecutionStatus.FAILED, inputs={}, error="failed")
+
+    # the iteration runs on the only worker of the scheduler, its items can only run in the waiting thread
+    scheduler = WorkflowParallelScheduler(max_workers=1)
+    context = contextvars.copy_context()
+    with (
+        patch.object(WorkflowParallelScheduler, "_instance", scheduler),
+        patch.object(TemplateTransformNode, "_run", new=tt_generator),
+    ):
+        future = scheduler.submit(TaskGroup(max_workers=1), context.run, lambda: list(iteration_node._run()))
+        events = future.result(timeout=30)
+
+    assert any(isinstance(event, IterationRunFailedEvent) for event in events)
+    assert scheduler.stats()["queued_tasks"] == 0
@@ -0,0 +1,193 @@
+import subprocess
+import sys
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+import contexts
+from configs import dify_config
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor
+from core.variables.segments import ArrayAnySegment
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
+from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
+from core.workflow.nodes.event import RunCompletedEvent
+from core.workflow.nodes.iteration.entities import ErrorHandleMode
+from core.workflow.nodes.iteration.iteration_node import IterationNode
+from core.workflow.system_variable import SystemVariable
+from models.enums import UserFrom
+from models.workflow import WorkflowType
+
+CODE = """
+def main(arg1: str, suffix: str) -> dict:
+    if arg1 == "bad":
+        raise ValueError("bad item")
+    return {"result": arg1.upper() + suffix}
+"""
+
+ITEMS = ["a", "b", "c", "d", "e"]
+
+
+def build_iteration_node(
+    body_nodes: list[dict], body_edges: list[dict], items: list[str] = ITEMS, **iteration_data
+) -> IterationNode:
+    iteration_config = {
+        "id": "iteration-1",
+        "data": {
+            "iterator_selector": ["start", "items"],
+            "output_selector": ["code", "result"],
+            "output_type": "array[string]",
+            "start_node_id": "iteration-start",
+            "title": "iteration",
+            "type": "iteration",
+            **iteration_data,
+        },
+    }
+    graph_config = {
+        "edges": [{"id": "start-iteration", "source": "start", "target": "iteration-1"}, *body_edges],
+        "nodes": [
+            {"id": "start", "data": {"title": "Start", "type": "start", "variables": []}},
+            iteration_config,
+            {
+                "id": "iteration-start",
+                "data": {"iteration_id": "iteration-1", "title": "iteration-start", "type": "iteration-start"},
+            },
+            *body_nodes,
+        ],
+    }
+    init_params = GraphInitParams(
+        tenant_id="1",
+        app_id="1",
+        workflow_type=WorkflowType.WORKFLOW,
+        workflow_id="1",
+        graph_config=graph_config,
+        user_id="1",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.DEBUGGER,
+        call_depth=0,
+    )
+    pool = VariablePool(system_variables=SystemVariable(user_id="1", files=[]), user_inputs={})
+    pool.add(["start", "items"], items)
+    pool.add(["start", "suffix"], "!")
+
+    node = IterationNode(
+        id=str(uuid.uuid4()),
+        graph_init_params=init_params,
+        graph=Graph.init(graph_config=graph_config),
+        graph_runtime_state=GraphRuntimeState(variable_pool=pool, start_at=time.perf_counter()),
+        config=iteration_config,
+    )
+    node.init_node_data(iteration_config["data"])
+    return node
+
+
+def code_node(node_id: str = "code") -> dict:
+    return {
+        "id": node_id,
+        "data": {
+            "iteration_id": "iteration-1",
+            "title": "code",
+            "type": "code",
+            "code_language": "python3",
+            "code": CODE,
+            "variables": [
+                {"variable": "arg1", "value_selector": ["iteration-1", "item"]},
+                {"variable": "suffix", "value_selector": ["start", "suffix"]},
+            ],
+            "outputs": {"result": {"type": "string"}},
+        },
+    }
+
+
+CODE_BODY_EDGES = [{"id": "iteration-start-code", "source": "iteration-start", "target": "code"}]
+
+
+def run_iteration(node: IterationNode) -> RunCompletedEvent:
+    completed = [event for event in node._run() if isinstance(event, RunCompletedEvent)]
+    assert len(completed) == 1
+    return completed[0]
+
+
+def run_python(language, preload, code) -> str:
+    """Run the runner like the sandbox does, in a Python process."""
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+
+@pytest.fixture
+def batch_config(monkeypatch):
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_BATCH_ENABLED", True)
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_BATCH_SIZE", 2)
+
+
+@pytest.mark.parametrize("is_parallel", [False, True])
+@patch.object(CodeExecutor, "execute_code", side_effect=run_python)
+def test_code_body_is_executed_in_batches(mock_execute_code, batch_config, is_parallel):
+    node = build_iteration_node([code_node()], CODE_BODY_EDGES, is_parallel=is_parallel)
+
+    event = run_iteration(node)
+
+    assert event.run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
+    assert event.run_result.outputs["output"].value == ["A!", "B!", "C!", "D!", "E!"]
+    # 5 items in batches of 2
+    assert mock_execute_code.call_count == 3
+    assert contexts.code_execution_prefetched_results.get(None) is None
+
+
+@patch.object(CodeExecutor, "execute_code", side_effect=run_python)
+def test_item_errors_are_handled_by_the_iteration(mock_execute_code, batch_config):
+    node = build_iteration_node(
+        [code_node()],
+        CODE_BODY_EDGES,
+        items=["a", "bad", "c", "d", "e"],
+        error_handle_mode=ErrorHandleMode.CONTINUE_ON_ERROR,
+    )
+
+    event = run_iteration(node)
+
+    assert event.run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
+    assert event.run_result.outputs == {"output": ArrayAnySegment(value=["A!", None, "C!", "D!", "E!"])}
+    assert mock_execute_code.call_count == 3
+
+
+@patch.object(CodeExecutor, "execute_code")
+def test_failed_batches_are_executed_item_by_item(mock_execute_code, batch_config):
+    def fail_batches(language, preload, code):
+        if "inputs_list" in code:
+            raise CodeExecutionError("Code execution service is unavailable")
+        return run_python(language, preload, code)
+
+    mock_execute_code.side_effect = fail_batches
+    node = build_iteration_node([code_node()], CODE_BODY_EDGES)
+
+    event = run_iteration(node)
+
+    assert event.run_result.outputs["output"].value == ["A!", "B!", "C!", "D!", "E!"]
+    assert mock_execute_code.call_count == 3 + len(ITEMS)
+
+
+@patch.object(CodeExecutor, "execute_code", side_effect=run_python)
+def test_body_with_other_nodes_is_not_batched(mock_execute_code, batch_config):
+    node = build_iteration_node(
+        [code_node(), code_node("code-2")],
+        [*CODE_BODY_EDGES, {"id": "code-code-2", "source": "code", "target": "code-2"}],
+    )
+
+    event = run_iteration(node)
+
+    assert event.run_result.outputs["output"].value == ["A!", "B!", "C!", "D!", "E!"]
+    assert mock_execute_code.call_count == 2 * len(ITEMS)
+
+
+@patch.object(CodeExecutor, "execute_code", side_effect=run_python)
+def test_batches_disabled(mock_execute_code, monkeypatch):
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_BATCH_ENABLED", False)
+    node = build_iteration_node([code_node()], CODE_BODY_EDGES)
+
+    run_iteration(node)
+
+    assert mock_execute_code.call_count == len(ITEMS)
@@ -234,6 +234,30 @@ def test_handle_workflow_run_success(workflow_cycle_manager, mock_workflow_execu
     assert result.finished_at is not None
 
 
+def test_handle_workflow_run_success_flushes_node_executions(workflow_cycle_manager, mock_node_execution_repository):
+    """Test that buffered node executions are flushed when the workflow run finishes"""
+    workflow_execution = WorkflowExecution(
+        id_="test-workflow-run-id",
+        workflow_id="test-workflow-id",
+        workflow_version="1.0",
+        workflow_type=WorkflowType.CHAT,
+        graph={"nodes": [], "edges": []},
+        inputs={"query": "test query"},
+        started_at=datetime.now(UTC).replace(tzinfo=None),
+    )
+    workflow_cycle_manager._workflow_execution_cache[workflow_execution.id_] = workflow_execution
+    mock_node_execution_repository.flush = MagicMock()
+
+    workflow_cycle_manager.handle_workflow_run_success(
+        workflow_run_id="test-workflow-run-id",
+        total_tokens=100,
+        total_steps=5,
+        outputs={"answer": "test answer"},
+    )
+
+    mock_node_execution_repository.flush.assert_called_once()
+
+
 def test_handle_workflow_run_failed(workflow_cycle_manager, mock_workflow_execution_repository):
     """Test handle_workflow_run_failed method"""
     # Create a real WorkflowExecution
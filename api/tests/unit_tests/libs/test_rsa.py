@@ -1,7 +1,11 @@
+from unittest.mock import patch
+
+import pytest
 import rsa as pyrsa
 from Crypto.PublicKey import RSA
 
-from libs import gmpy2_pkcs10aep_cipher
+from configs import dify_config
+from libs import gmpy2_pkcs10aep_cipher, rsa
 
 
 def test_gmpy2_pkcs10aep_cipher() -> None:
@@ -27,3 +31,96 @@ def test_gmpy2_pkcs10aep_cipher() -> None:
     encrypted_by_private_key = private_cipher_rsa.encrypt(message=raw_text_bytes)
     decrypted_by_private_key = private_cipher_rsa.decrypt(encrypted_by_private_key)
     assert decrypted_by_private_key == raw_text_bytes
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeStorage:
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+        self.load_count = 0
+
+    def save(self, filename, data):
+        self.files[filename] = data
+
+    def load(self, filename):
+        self.load_count += 1
+        if filename not in self.files:
+            raise FileNotFoundError(filename)
+        return self.files[filename]
+
+
+@pytest.fixture
+def key_store():
+    redis, storage = FakeRedis(), FakeStorage()
+    with patch("libs.rsa.redis_client", redis), patch("libs.rsa.storage", storage):
+        yield redis, storage
+
+
+@pytest.fixture
+def decryption_cache(monkeypatch):
+    monkeypatch.setattr(dify_config, "DECRYPTION_CACHE_ENABLED", True)
+    rsa.DecryptionCache.clear()
+    yield
+    rsa.DecryptionCache.clear()
+
+
+def test_private_keys_are_parsed_once(key_store, decryption_cache):
+    public_key = rsa.generate_key_pair("tenant")
+    encrypted = rsa.encrypt("secret", public_key)
+
+    with patch("libs.rsa.RSA.import_key", wraps=RSA.import_key) as mock_import_key:
+        assert rsa.decrypt(encrypted, "tenant") == "secret"
+        assert rsa.decrypt(encrypted, "tenant") == "secret"
+
+    mock_import_key.assert_called_once()
+
+
+def test_decrypted_texts_are_cached_by_encrypted_text(key_store, decryption_cache):
+    public_key = rsa.generate_key_pair("tenant")
+    encrypted, other_encrypted = rsa.encrypt("secret", public_key), rsa.encrypt("other", public_key)
+
+    with patch("libs.rsa._decrypt_token_with_decoding", wraps=rsa._decrypt_token_with_decoding) as mock_decrypt:
+        assert [rsa.decrypt(text, "tenant") for text in (encrypted, other_encrypted, encrypted)] == [
+            "secret",
+            "other",
+            "secret",
+        ]
+
+    assert mock_decrypt.call_count == 2
+
+
+def test_rotated_keys_are_not_served_from_the_cache(key_store, decryption_cache):
+    rsa.decrypt(rsa.encrypt("secret", rsa.generate_key_pair("tenant")), "tenant")
+
+    public_key = rsa.generate_key_pair("tenant")
+
+    assert rsa.decrypt(rsa.encrypt("new secret", public_key), "tenant") == "new secret"
+    rsa_key, _ = rsa.get_decrypt_decoding("tenant")
+    assert rsa_key.publickey().export_key().decode() == public_key
+
+
+def test_nothing_is_cached_when_disabled(key_store, monkeypatch):
+    monkeypatch.setattr(dify_config, "DECRYPTION_CACHE_ENABLED", False)
+    rsa.DecryptionCache.clear()
+    _, storage = key_store
+    encrypted = rsa.encrypt("secret", rsa.generate_key_pair("tenant"))
+
+    with patch("libs.rsa._decrypt_token_with_decoding", wraps=rsa._decrypt_token_with_decoding) as mock_decrypt:
+        assert rsa.decrypt(encrypted, "tenant") == "secret"
+        assert rsa.decrypt(encrypted, "tenant") == "secret"
+
+    assert mock_decrypt.call_count == 2
+    assert rsa.DecryptionCache._texts is None
@@ -287,3 +287,97 @@ def test_to_domain_model(repository):
     assert domain_model.metadata == metadata_dict
     assert domain_model.created_at == db_model.created_at
     assert domain_model.finished_at == db_model.finished_at
+
+
+@pytest.fixture
+def write_behind_repository(session, mock_user, mocker: MockerFixture):
+    """Create a repository instance with write-behind enabled."""
+    config = "core.repositories.sqlalchemy_workflow_node_execution_repository.dify_config"
+    mocker.patch(f"{config}.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED", True)
+    mocker.patch(f"{config}.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_INTERVAL", 60.0)
+    mocker.patch(f"{config}.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE", 3)
+    _, session_factory = session
+    repository = SQLAlchemyWorkflowNodeExecutionRepository(
+        session_factory=session_factory,
+        user=mock_user,
+        app_id="test-app",
+        triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
+    )
+    yield repository
+    if repository._flush_timer:
+        repository._flush_timer.cancel()
+
+
+def _make_db_model(execution_id: str, status: str = "running") -> WorkflowNodeExecutionModel:
+    db_model = WorkflowNodeExecutionModel()
+    db_model.id = execution_id
+    db_model.node_execution_id = f"node-{execution_id}"
+    db_model.workflow_run_id = "test-workflow-run-id"
+    db_model.status = status
+    return db_model
+
+
+def test_save_write_behind_coalesces_until_flush(write_behind_repository, session):
+    """Test that write-behind saves are buffered and coalesced by id."""
+    session_obj, _ = session
+    running = _make_db_model("exec-1")
+    succeeded = _make_db_model("exec-1", status="succeeded")
+    write_behind_repository.to_db_model = MagicMock(side_effect=[running, succeeded])
+
+    write_behind_repository.save(MagicMock())
+    write_behind_repository.save(MagicMock())
+
+    session_obj.merge.assert_not_called()
+    session_obj.execute.assert_not_called()
+    assert write_behind_repository._pending_executions == {"exec-1": succeeded}
+    assert write_behind_repository._node_execution_cache["node-exec-1"] is succeeded
+    assert write_behind_repository._flush_timer is not None
+
+    write_behind_repository.flush()
+
+    session_obj.execute.assert_called_once()
+    statement = str(session_obj.execute.call_args.args[0])
+    assert "ON CONFLICT (id) DO UPDATE" in statement
+    session_obj.commit.assert_called_once()
+    assert write_behind_repository._pending_executions == {}
+    assert write_behind_repository._flush_timer is None
+
+
+def test_save_write_behind_flushes_at_batch_size(write_behind_repository, session):
+    """Test that reaching the batch size flushes the buffer immediately."""
+    session_obj, _ = session
+    write_behind_repository.to_db_model = MagicMock(side_effect=[_make_db_model(f"exec-{i}") for i in range(3)])
+
+    for _ in range(3):
+        write_behind_repository.save(MagicMock())
+
+    session_obj.execute.assert_called_once()
+    session_obj.commit.assert_called_once()
+    assert write_behind_repository._pending_executions == {}
+
+
+def test_flush_failure_keeps_executions_buffered(write_behind_repository, session):
+    """Test that executions stay buffered when the upsert fails."""
+    session_obj, _ = session
+    db_model = _make_db_model("exec-1")
+    write_behind_repository.to_db_model = MagicMock(return_value=db_model)
+    session_obj.execute.side_effect = RuntimeError("database unavailable")
+
+    write_behind_repository.save(MagicMock())
+    with pytest.raises(RuntimeError):
+        write_behind_repository.flush()
+
+    assert write_behind_repository._pending_executions == {"exec-1": db_model}
+
+
+def test_get_by_workflow_run_flushes_write_behind_buffer(write_behind_repository, session):
+    """Test that reads flush buffered writes first."""
+    session_obj, _ = session
+    write_behind_repository.to_db_model = MagicMock(return_value=_make_db_model("exec-1"))
+    session_obj.scalars.return_value.all.return_value = []
+
+    write_behind_repository.save(MagicMock())
+    write_behind_repository.get_db_models_by_workflow_run(workflow_run_id="test-workflow-run-id")
+
+    session_obj.execute.assert_called_once()
+    assert write_behind_repository._pending_executions == {}
@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from services.feature_service import FeatureService, FeatureSnapshotCache
+from tests.unit_tests.stub_http_server import StubRequestHandler, StubResponse
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        with self.lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = str(value).encode()
+            return True
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class StubBilling:
+    """Billing API answering the subscription info of tenants from `plans`."""
+
+    def __init__(self):
+        self.plans: dict[str, str] = {}
+        self.requests: list[str] = []
+        self.failing = False
+        self.released = threading.Event()
+        self.released.set()
+        self.redis = FakeRedis()
+
+    def respond(self, request: StubRequestHandler) -> StubResponse:
+        url = urlparse(request.path)
+        tenant_id = parse_qs(url.query)["tenant_id"][0]
+        self.requests.append(tenant_id)
+        self.released.wait(5)
+        if self.failing or url.path != "/subscription/info":
+            return StubResponse(status=500)
+
+        body = json.dumps({"enabled": True, "subscription": {"plan": self.plans[tenant_id], "interval": "month"}})
+        return StubResponse(body=body.encode())
+
+
+@pytest.fixture
+def billing_server(monkeypatch, stub_http_server):
+    billing = StubBilling()
+    monkeypatch.setattr("services.feature_service.BillingService.base_url", stub_http_server(billing.respond).url)
+    monkeypatch.setattr("services.feature_service.redis_client", billing.redis)
+    monkeypatch.setattr("services.feature_service.dify_config.BILLING_ENABLED", True)
+    monkeypatch.setattr("services.feature_service.dify_config.ENTERPRISE_ENABLED", False)
+    monkeypatch.setattr("services.feature_service.dify_config.FEATURE_SNAPSHOT_CACHE_ENABLED", True)
+    monkeypatch.setattr("services.feature_service.dify_config.FEATURE_SNAPSHOT_CACHE_FRESH_TTL", 60)
+    monkeypatch.setattr("services.feature_service.dify_config.FEATURE_SNAPSHOT_CACHE_STALE_TTL", 3600)
+    yield billing
+    billing.released.set()
+
+
+def _age_snapshot(redis: FakeRedis, tenant_id: str, seconds: int):
+    key = FeatureSnapshotCache(tenant_id).cache_key
+    snapshot = json.loads(redis.data[key])
+    snapshot["fetched_at"] -= seconds
+    redis.data[key] = json.dumps(snapshot).encode()
+
+
+def _wait_for(condition, timeout: float = 5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_features_are_loaded_once_and_served_from_the_snapshot(billing_server):
+    billing_server.plans["tenant"] = "team"
+
+    assert FeatureService.get_features("tenant").billing.subscription.plan == "team"
+    assert FeatureService.get_features("tenant").billing.subscription.plan == "team"
+
+    assert billing_server.requests == ["tenant"]
+
+
+def test_stale_snapshots_are_served_while_refreshed_in_the_background(billing_server):
+    billing_server.plans["tenant"] = "sandbox"
+    FeatureService.get_features("tenant")
+    _age_snapshot(billing_server.redis, "tenant", 120)
+
+    billing_server.plans["tenant"] = "team"
+    billing_server.released.clear()
+    # callers do not wait for the billing API, and only one of them refreshes the snapshot
+    assert [FeatureService.get_features("tenant").billing.subscription.plan for _ in range(3)] == ["sandbox"] * 3
+    _wait_for(lambda: len(billing_server.requests) == 2)
+    billing_server.released.set()
+
+    _wait_for(lambda: FeatureService.get_features("tenant").billing.subscription.plan == "team")
+    assert len(billing_server.requests) == 2
+    assert "feature_snapshot_refresh:tenant" not in billing_server.redis.data
+
+
+def test_failed_refreshes_keep_the_stale_snapshot(billing_server):
+    billing_server.plans["tenant"] = "team"
+    FeatureService.get_features("tenant")
+    _age_snapshot(billing_server.redis, "tenant", 120)
+
+    billing_server.failing = True
+    assert FeatureService.get_features("tenant").billing.subscription.plan == "team"
+    _wait_for(lambda: "tenant" not in FeatureSnapshotCache._refreshing)
+
+    # the refresh is not retried by every call until the lock expires
+    assert FeatureService.get_features("tenant").billing.subscription.plan == "team"
+    assert len(billing_server.requests) == 2
+
+
+def test_invalidated_snapshots_are_loaded_again(billing_server):
+    billing_server.plans["tenant"] = "sandbox"
+    FeatureService.get_features("tenant")
+
+    billing_server.plans["tenant"] = "professional"
+    FeatureSnapshotCache.invalidate("tenant")
+
+    assert FeatureService.get_features("tenant").billing.subscription.plan == "professional"
+    assert len(billing_server.requests) == 2
+
+
+def test_snapshots_of_older_versions_are_ignored(billing_server, monkeypatch):
+    billing_server.plans["tenant"] = "team"
+    FeatureService.get_features("tenant")
+
+    monkeypatch.setattr(FeatureSnapshotCache, "SNAPSHOT_VERSION", "2")
+    FeatureService.get_features("tenant")
+
+    assert len(billing_server.requests) == 2
+
+
+def test_features_are_loaded_on_every_call_when_disabled(billing_server, monkeypatch):
+    monkeypatch.setattr("services.feature_service.dify_config.FEATURE_SNAPSHOT_CACHE_ENABLED", False)
+    billing_server.plans["tenant"] = "team"
+
+    FeatureService.get_features("tenant")
+    FeatureService.get_features("tenant")
+    assert len(billing_server.requests) == 2
+
+
+def test_subscription_plans_bypass_the_snapshots(billing_server):
+    billing_server.plans["tenant"] = "team"
+    FeatureService.get_features("tenant")
+    _age_snapshot(billing_server.redis, "tenant", 120)
+    billing_server.plans["tenant"] = "sandbox"
+
+    # tasks deleting data by plan read it from billing, then from their short-lived plan cache
+    assert FeatureService.get_subscription_plan("tenant") == "sandbox"
+    assert FeatureService.get_subscription_plan("tenant") == "sandbox"
+    assert billing_server.redis.data["features:tenant"] == b"sandbox"
+    assert billing_server.requests == ["tenant", "tenant"]
@@ -0,0 +1,143 @@
+import datetime
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from models.model import Message, MessageFeedback
+from models.web import SavedMessage
+from services.message_retention_service import MessageRetentionService
+
+BEFORE = datetime.datetime(2025, 1, 1)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeSession:
+    """Session answering the app and message id selects from lists, and recording the deletes."""
+
+    def __init__(self, app_batches: list, message_batches: list, deleted: list):
+        self.app_batches = app_batches
+        self.message_batches = message_batches
+        self.deleted = deleted
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, stmt):
+        if stmt.is_select:
+            result = MagicMock()
+            result.all.return_value = self.app_batches.pop(0) if self.app_batches else []
+            return result
+        self.deleted.append(stmt.table.name)
+        return SimpleNamespace(rowcount=1)
+
+    def scalars(self, stmt):
+        result = MagicMock()
+        result.all.return_value = self.message_batches.pop(0) if self.message_batches else []
+        return result
+
+    def commit(self):
+        self.deleted.append("commit")
+
+
+class _Row(tuple):
+    """Row of the app select."""
+
+    def __new__(cls, app_id: str, tenant_id: str):
+        return super().__new__(cls, (app_id, tenant_id))
+
+    @property
+    def id(self):
+        return self[0]
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with (
+        patch("services.message_retention_service.redis_client", redis),
+        patch("services.feature_service.redis_client", redis),
+    ):
+        yield redis
+
+
+def run(app_batches, message_batches, plans, batch_size=2):
+    deleted: list[str] = []
+    with (
+        patch(
+            "services.message_retention_service.Session",
+            side_effect=lambda *args, **kwargs: FakeSession(app_batches, message_batches, deleted),
+        ),
+        patch("services.message_retention_service.db"),
+        patch("services.message_retention_service.FeatureService._load_features") as mock_load_features,
+    ):
+        mock_load_features.side_effect = lambda tenant_id: SimpleNamespace(
+            billing=SimpleNamespace(subscription=SimpleNamespace(plan=plans[tenant_id]))
+        )
+        count = MessageRetentionService.clean_sandbox_messages(BEFORE, batch_size=batch_size)
+    return count, deleted, mock_load_features
+
+
+def test_tenant_plans_are_resolved_once_per_run(fake_redis):
+    app_batches = [[_Row("app-1", "sandbox"), _Row("app-2", "sandbox"), _Row("app-3", "team")]]
+
+    count, _, mock_load_features = run(app_batches, [["m-1"]], {"sandbox": "sandbox", "team": "team"})
+
+    assert count == 1
+    assert mock_load_features.call_count == 2
+    assert fake_redis.data["features:sandbox"] == b"sandbox"
+
+
+def test_messages_are_deleted_with_related_records_by_batch(fake_redis):
+    app_batches = [[_Row("app-1", "tenant")]]
+
+    count, deleted, _ = run(app_batches, [["m-1", "m-2"], ["m-3"]], {"tenant": "sandbox"})
+
+    assert count == 3
+    batch = [
+        *(model.__tablename__ for model in MessageRetentionService.RELATED_MODELS),
+        Message.__tablename__,
+        "commit",
+    ]
+    assert deleted == batch * 2
+    assert MessageFeedback.__tablename__ in batch
+    assert SavedMessage.__tablename__ in batch
+    # the run completed, nothing to resume
+    assert MessageRetentionService.CHECKPOINT_KEY not in fake_redis.data
+
+
+def test_apps_of_paid_tenants_are_skipped(fake_redis):
+    count, deleted, _ = run([[_Row("app-1", "tenant")]], [["m-1"]], {"tenant": "professional"})
+
+    assert count == 0
+    assert deleted == []
+
+
+def test_interrupted_runs_resume_after_the_checkpoint(fake_redis):
+    checkpoint_before = datetime.datetime(2024, 6, 1)
+    fake_redis.data[MessageRetentionService.CHECKPOINT_KEY] = json.dumps(
+        {"last_app_id": "app-1", "before": checkpoint_before.isoformat()}
+    ).encode()
+
+    with patch.object(MessageRetentionService, "_delete_app_messages", return_value=0) as mock_delete:
+        run([[_Row("app-2", "tenant")]], [], {"tenant": "sandbox"})
+
+    mock_delete.assert_called_once_with(["app-2"], checkpoint_before, 2, 0)
+    assert MessageRetentionService.CHECKPOINT_KEY not in fake_redis.data
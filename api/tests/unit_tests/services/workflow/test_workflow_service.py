@@ -1,9 +1,15 @@
-from unittest.mock import MagicMock
+from datetime import datetime
+from unittest.mock import MagicMock, patch
 
 import pytest
+from sqlalchemy.orm import sessionmaker
 
+from core.repositories import SQLAlchemyWorkflowNodeExecutionRepository
+from core.workflow.entities.workflow_node_execution import WorkflowNodeExecution, WorkflowNodeExecutionStatus
+from core.workflow.nodes.enums import NodeType
+from models.account import Account
 from models.model import App
-from models.workflow import Workflow
+from models.workflow import Workflow, WorkflowNodeExecutionTriggeredFrom
 from services.workflow_service import WorkflowService
 
 
@@ -161,3 +167,61 @@ class TestWorkflowService:
         assert workflows == []
         assert has_more is False
         mock_session.scalars.assert_called_once()
+
+    def test_run_draft_workflow_node_persists_buffered_execution(self, workflow_service, mock_app):
+        config = "core.repositories.sqlalchemy_workflow_node_execution_repository.dify_config"
+        account = Account()
+        account.id = "account-id"
+        account._current_tenant = MagicMock(id="tenant-id-1")
+        draft_workflow = MagicMock(spec=Workflow)
+        draft_workflow.id = "workflow-id-1"
+        draft_workflow.environment_variables = []
+        draft_workflow.get_node_config_by_id.return_value = {"id": "llm", "data": {"type": "llm"}}
+        draft_workflow.get_enclosing_node_type_and_id.return_value = None
+        node_execution = WorkflowNodeExecution(
+            id="execution-id",
+            workflow_id="",
+            index=1,
+            node_id="llm",
+            node_type=NodeType.LLM,
+            title="LLM",
+            status=WorkflowNodeExecutionStatus.SUCCEEDED,
+            created_at=datetime(2025, 1, 1),
+        )
+
+        with (
+            patch(f"{config}.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED", True),
+            patch(f"{config}.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_INTERVAL", 60.0),
+            patch(f"{config}.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE", 100),
+        ):
+            repository = SQLAlchemyWorkflowNodeExecutionRepository(
+                session_factory=MagicMock(spec=sessionmaker),
+                user=account,
+                app_id=mock_app.id,
+                triggered_from=WorkflowNodeExecutionTriggeredFrom.SINGLE_STEP,
+            )
+        persisted = {}
+        repository._bulk_upsert = lambda db_models: persisted.update({m.id: m for m in db_models})
+        workflow_service._node_execution_service_repo = MagicMock()
+        workflow_service._node_execution_service_repo.get_execution_by_id.side_effect = persisted.get
+
+        with (
+            patch("services.workflow_service.db"),
+            patch("services.workflow_service.Session"),
+            patch("services.workflow_service.WorkflowDraftVariableService"),
+            patch("services.workflow_service.DraftVarLoader"),
+            patch("services.workflow_service.DraftVariableSaver"),
+            patch("services.workflow_service.WorkflowEntry"),
+            patch(
+                "services.workflow_service.DifyCoreRepositoryFactory.create_workflow_node_execution_repository",
+                return_value=repository,
+            ),
+            patch.object(workflow_service, "_handle_node_run_result", return_value=node_execution),
+        ):
+            workflow_node_execution = workflow_service.run_draft_workflow_node(
+                app_model=mock_app, draft_workflow=draft_workflow, node_id="llm", user_inputs={}, account=account
+            )
+
+        assert workflow_node_execution is persisted["execution-id"]
+        assert repository._pending_executions == {}
+        assert repository._flush_timer is None
@@ -0,0 +1,56 @@
+"""
+Local HTTP server answering requests with a callback, for tests and benchmarks of HTTP clients.
+
+Use it through the `stub_http_server` fixture.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass(frozen=True)
+class StubResponse:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "application/json"
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "StubHTTPServer"
+    body: bytes = b""
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def _respond(self):
+        self.body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        response = self.server.responder(self)
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+Responder = Callable[[StubRequestHandler], StubResponse]
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    """Server on a free local port answering each request with `responder`, called in the request thread."""
+
+    def __init__(self, responder: Responder):
+        super().__init__(("127.0.0.1", 0), StubRequestHandler)
+        self.responder = responder
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
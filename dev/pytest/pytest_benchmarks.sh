@@ -0,0 +1,8 @@
+#!/bin/bash
+set -x
+
+SCRIPT_DIR="$(dirname "$(realpath "$0")")"
+cd "$SCRIPT_DIR/../.."
+
+# benchmarks are deselected from the unit tests by default
+pytest api/tests/unit_tests -m benchmark --benchmark-only